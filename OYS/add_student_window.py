@@ -6,9 +6,6 @@ from PyQt5.QtCore import Qt, QThread, pyqtSignal
 
 from veritabani import ogrenci_ekle
 import numpy as np
-import face_recognition
-import cv2
-from ultralytics import YOLO
 
 # ============================================================
 # === BİRDEN FAZLA FOTOĞRAFTAN EMBEDDING ÇIKARAN THREAD ===
@@ -17,39 +14,26 @@ from ultralytics import YOLO
 class MultiEmbeddingWorker(QThread):
     finished = pyqtSignal(np.ndarray)
     error = pyqtSignal(str)
+    ilerleme = pyqtSignal(int, int)   # işlenen, toplam
+    rapor = pyqtSignal(dict)          # yuz_cikarim.build_template raporu
 
     def __init__(self, file_paths):
         super().__init__()
         self.file_paths = file_paths
 
     def run(self):
-        try:
-            embeddings = []
-
-            for path in self.file_paths:
-                img = cv2.imread(path)
-                if img is None:
-                    continue
-
-                rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                boxes = face_recognition.face_locations(rgb)
-
-                if len(boxes) == 0:
-                    continue  # yüz yoksa fotoğrafı atla
+        # Ağır kütüphaneler pencere açılışında değil, embedding çıkarılırken (işçi süreçlerde) yüklenir
+        from yuz_cikarim import build_template
 
-                encs = face_recognition.face_encodings(rgb, boxes,model="large")
-                if len(encs) == 0:
-                    continue
-
-                embeddings.append(encs[0])
+        try:
+            # Fotoğraflar süreç havuzunda paralel işlenir; aykırı embedding'ler şablona katılmaz
+            final_emb, rapor = build_template(self.file_paths, progress=self.ilerleme.emit)
+            self.rapor.emit(rapor)
 
-            if len(embeddings) == 0:
+            if final_emb is None:
                 self.error.emit("Hiçbir fotoğraftan yüz çıkarılamadı.")
                 return
 
-            # ORTALAMA EMBEDDING (daha stabil tanıma sağlar)
-            final_emb = np.mean(np.array(embeddings), axis=0)
-
             self.finished.emit(final_emb)
 
         except Exception as e:
@@ -104,6 +88,7 @@ class AddStudentWindow(QWidget):
 
         # Embedding burada tutulacak
         self.embedding_vector = None
+        self.son_rapor = None
 
 
 
@@ -124,7 +109,9 @@ class AddStudentWindow(QWidget):
             QMessageBox.warning(self, "Uyarı", "Lütfen yüz vektörü alın.")
             return
 
-        basarili = ogrenci_ekle(ad, soyad, okul_no, self.embedding_vector)
+        # Fotoğraf başına embedding'ler de saklanır (tanıma tarafı çoklu prototip kullanır)
+        sablonlar = (self.son_rapor or {}).get("sablonlar")
+        basarili = ogrenci_ekle(ad, soyad, okul_no, self.embedding_vector, sablonlar=sablonlar)
 
         if basarili:
             QMessageBox.information(self, "Başarılı", "Öğrenci kaydı oluşturuldu.")
@@ -153,18 +140,29 @@ class AddStudentWindow(QWidget):
             QMessageBox.warning(self, "Uyarı", "En az 3 fotoğraf seçmelisiniz (Önerilen: 25–40).")
             return
 
-        QMessageBox.information(
-            self,
-            "Bekleyin",
-            f"{len(file_paths)} fotoğraftan embedding çıkarılıyor. Lütfen bekleyin…"
-        )
+        # İlerleme buton üzerinde gösterilir; iş bitene kadar tekrar tıklanamaz
+        self.vector_btn.setEnabled(False)
+        self.vector_btn.setText(f"Embedding çıkarılıyor… 0/{len(file_paths)}")
+        self.son_rapor = None
 
         # Thread başlat
         self.worker = MultiEmbeddingWorker(file_paths)
+        self.worker.ilerleme.connect(self.ilerleme_guncelle)
+        self.worker.rapor.connect(self.rapor_alindi)
         self.worker.finished.connect(self.embedding_alindi)
         self.worker.error.connect(self.embedding_hatasi)
         self.worker.start()
 
+    def ilerleme_guncelle(self, bitti, toplam):
+        self.vector_btn.setText(f"Embedding çıkarılıyor… {bitti}/{toplam}")
+
+    def rapor_alindi(self, rapor):
+        self.son_rapor = rapor
+
+    def _buton_sifirla(self):
+        self.vector_btn.setEnabled(True)
+        self.vector_btn.setText("Yüz Vektörü Al (25–40 Fotoğraf)")
+
 
 
     # ============================================================
@@ -173,7 +171,15 @@ class AddStudentWindow(QWidget):
 
     def embedding_alindi(self, vector):
         self.embedding_vector = vector
-        QMessageBox.information(self, "Başarılı", "Tüm fotoğraflardan ortalama yüz vektörü çıkarıldı.")
+        self._buton_sifirla()
+        r = self.son_rapor or {}
+        QMessageBox.information(
+            self,
+            "Başarılı",
+            f"Yüz vektörü çıkarıldı: {r.get('kullanilan', 0)}/{r.get('toplam', 0)} fotoğraf kullanıldı "
+            f"({len(r.get('atlanan', {}))} yüz bulunamadı, {len(r.get('aykiri', []))} aykırı atıldı)."
+        )
 
     def embedding_hatasi(self, hata):
+        self._buton_sifirla()
         QMessageBox.warning(self, "Hata", hata)
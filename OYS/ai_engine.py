@@ -1,25 +1,33 @@
 # ai_engine.py
 
 import json
-import sqlite3
-from openai import OpenAI
+import threading
+
+import veri_erisim
 
 
 API_KEY = "apiKey"   # <-- API key buraya
 MODEL_ADI = "gpt-4o-mini"        # en ekonomik ve güçlü model
-DB_YOLU = "/home/krm/Desktop/dlibenv/OYS/ogrenciler.db"
 
-client = OpenAI(api_key=API_KEY)
+# İstemci ilk soruda kurulur: openai paketinin içe aktarımı ve istemci kurulumu
+# uygulama açılışını yavaşlatmasın.
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=API_KEY)
+    return _client
 
 
 def ogrencileri_al_dbden():
     try:
-        conn = sqlite3.connect(DB_YOLU)
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT ad, soyad, okul_numarasi, dikkat_orani, yoklama FROM ogrenciler")
-        rows = cursor.fetchall()
-        conn.close()
+        rows = veri_erisim.fetchall("SELECT ad, soyad, okul_numarasi, dikkat_orani, yoklama FROM ogrenciler")
 
         ogrenciler = []
 
@@ -63,7 +71,7 @@ Kurallar:
 """
 
     try:
-        response = client.responses.create(
+        response = get_client().responses.create(
             model=MODEL_ADI,
             input=prompt,
             max_output_tokens=180  # ekonomik kullanım için
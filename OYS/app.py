@@ -1,5 +1,16 @@
+import os
+import time
+
+# Başlangıç ölçümü: import'lardan önce saat başlar (OYS_STARTUP_TIMING=1 ile raporlanır)
+_T0 = time.perf_counter()
+STARTUP_TIMING = os.environ.get("OYS_STARTUP_TIMING", "0") == "1"
+# Girişten sonra ağır modülleri (face_recognition, cv2, YOLO, OpenAI) arka planda ısıt
+PREWARM = os.environ.get("OYS_PREWARM", "1") == "1"
+
+import importlib
 import sys
 import subprocess
+import threading
 from pathlib import Path
 from typing import Optional, Tuple
 
@@ -10,9 +21,11 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QPixmap, QGuiApplication, QPainter, QPalette, QColor, QFont
 
-from add_student_window import AddStudentWindow
-from ai_chatbox import AIArayuz
+# Not: add_student_window (face_recognition, cv2, YOLO) ve ai_chatbox (OpenAI) burada
+# içe aktarılmaz; pencereleri ilk açıldığında (ya da girişten sonra arka planda) yüklenir.
 from register_window import RegisterWindow
+from canli_durum import CanliDurumIstemcisi
+import veri_erisim
 from forgot_password_window import ForgotPasswordWindow
 
 LOGIN_BG = Path("/home/krm/Desktop/dlibenv/OYS/login.png")   # Login arkaplanı (gönderdiğin görsel)
@@ -20,6 +33,56 @@ APP_BG   = Path("/home/krm/Desktop/dlibenv/OYS/arka_tema.jpg")  # Uygulama arkap
 APP_LOGO = Path("/home/krm/Desktop/dlibenv/OYS/logo.png")       # Uygulama logosu (opsiyonel)
 USERS_TXT = Path(__file__).resolve().parent / "users.txt"       # kullanıcı:sifre satırları
 
+# Ağır modüller: ilk kullanımda yüklenir, girişten sonra arka planda ön ısıtılır.
+# add_student_window yüz kütüphanelerini kendisi içe aktarmaz; onlar yuz_cikarim.prewarm ile ısınır.
+HEAVY_MODULES = ("add_student_window", "yuz_cikarim", "ai_chatbox")
+
+
+def _startup_log(msg: str) -> None:
+    if STARTUP_TIMING:
+        print(f"[BAŞLANGIÇ] {(time.perf_counter() - _T0) * 1000.0:8.1f} ms  {msg}", flush=True)
+
+
+def lazy_module(name: str):
+    """
+    Modülü ilk çağrıda içe aktarır (ön ısıtma iş parçacığıyla aynı anda çağrılabilir).
+    sys.modules doğrudan okunmaz: ön ısıtma yarıdayken modül orada yarım haliyle durur.
+    import_module modül başına içe aktarma kilidiyle yüklenmenin bitmesini bekler; farklı
+    modüller birbirini bekletmez.
+    """
+    loaded = name in sys.modules  # yalnızca süre kaydı için
+    t0 = time.perf_counter()
+    mod = importlib.import_module(name)
+    if STARTUP_TIMING and not loaded:
+        print(f"[BAŞLANGIÇ] {name} yüklendi: {(time.perf_counter() - t0) * 1000.0:.1f} ms", flush=True)
+    return mod
+
+
+def prewarm_heavy_modules() -> None:
+    """Girişten sonra ağır modülleri arka planda yükler; pencere açılışı beklemesin."""
+    def worker() -> None:
+        for name in HEAVY_MODULES:
+            try:
+                lazy_module(name)
+            except Exception as e:
+                # Ön ısıtma opsiyonel: hata pencere açılırken tekrar görünür
+                print(f"[BAŞLANGIÇ] {name} ön yüklenemedi: {e}")
+        try:
+            # face_recognition (dlib modelleri) + cv2: ilk kayıt bunları beklemesin
+            t0 = time.perf_counter()
+            lazy_module("yuz_cikarim").prewarm()
+            _startup_log(f"yüz kütüphaneleri yüklendi ({(time.perf_counter() - t0) * 1000.0:.1f} ms)")
+        except Exception as e:
+            print(f"[BAŞLANGIÇ] Yüz kütüphaneleri ön yüklenemedi: {e}")
+        try:
+            lazy_module("ai_engine").get_client()
+        except Exception as e:
+            print(f"[BAŞLANGIÇ] OpenAI istemcisi kurulamadı: {e}")
+        _startup_log("ön ısıtma bitti")
+
+    threading.Thread(target=worker, name="oys-prewarm", daemon=True).start()
+
+
 def load_pixmap(path: Path) -> Optional[QPixmap]:
     if path.exists() and path.is_file():
         pm = QPixmap(str(path))
@@ -55,6 +118,7 @@ class LoginWindow(QWidget):
         self.setMinimumSize(520, 360)
         self._bg = load_pixmap(LOGIN_BG)
         self._login_logo = load_pixmap(APP_LOGO)
+        self._first_paint = True
 
         pal = self.palette()
         pal.setColor(QPalette.Window, QColor(0, 0, 0))
@@ -72,6 +136,9 @@ class LoginWindow(QWidget):
             y = (self.height() - bg.height()) // 2
             p.drawPixmap(x, y, bg.width(), bg.height(), bg)
         p.fillRect(self.rect(), QColor(0, 0, 0, 110))  # scrim/overlay
+        if self._first_paint:
+            self._first_paint = False
+            _startup_log("giriş penceresi ilk çizim")
 
     def _build_ui(self):
         root = QVBoxLayout(self)
@@ -268,6 +335,20 @@ class MainWindow(QWidget):
         title.setStyleSheet("font-weight: bold; font-size: 22px;")
         card_layout.addWidget(title)
 
+        # Canlı yoklama (tanıma sistemi çalışırken, canlı kanaldan)
+        self.live_label = QLabel("")
+        self.live_label.setAlignment(Qt.AlignCenter)
+        self.live_label.setStyleSheet("color: rgba(255,255,255,0.92); font-size: 14px;")
+        self.live_label.hide()
+        card_layout.addWidget(self.live_label)
+        self._live_stats = {}
+        self._live_students = {}
+        self.canli = CanliDurumIstemcisi(parent=self)
+        self.canli.istatistik.connect(self._on_live_stats)
+        self.canli.ogrenciler.connect(self._on_live_students)
+        self.canli.baglanti.connect(lambda ok: None if ok else self.live_label.hide())
+        self.canli.start()
+
         # Butonlar (işlevler aynı)
         self.btn_add = QPushButton("Öğrenci Ekle")
         self.btn_add_db = QPushButton("Öğrenci Veritabanı")
@@ -292,16 +373,33 @@ class MainWindow(QWidget):
         root.addLayout(h)
         root.addStretch(1)
 
+    def _on_live_stats(self, stats: dict):
+        self._live_stats = stats
+        self._refresh_live()
+
+    def _on_live_students(self, students: dict):
+        self._live_students = students
+        self._refresh_live()
+
+    def _refresh_live(self):
+        if not self._live_stats and not self._live_students:
+            self.live_label.hide()
+            return
+        present = sum(1 for s in self._live_students.values() if s.get("present"))
+        attentive = sum(1 for s in self._live_students.values() if s.get("attentive"))
+        pct = int(self._live_stats.get("percent", 0))
+        self.live_label.setText(f"Canlı: %{pct} katılım  |  Yoklama: {present}  |  Dikkatli: {attentive}")
+        self.live_label.show()
+
     def open_add_window(self):
-        self.add_window = AddStudentWindow()
+        self.add_window = lazy_module("add_student_window").AddStudentWindow()
         self.add_window.show()
 
     def open_student_list(self):
-        db_path = "/home/krm/Desktop/dlibenv/OYS/ogrenciler.db"
-        subprocess.Popen(["xdg-open", db_path])
+        subprocess.Popen(["xdg-open", veri_erisim.DB_PATH])
 
     def open_ai(self):
-        self.ai_arayuz = AIArayuz()
+        self.ai_arayuz = lazy_module("ai_chatbox").AIArayuz()
         self.ai_arayuz.show()
 
     def open_hybrid(self):
@@ -333,6 +431,7 @@ class LoadingPopup(QDialog):
 
 # --- Uygulama akışı (splash -> login -> main) --------------------------------
 def main():
+    _startup_log("import'lar bitti")
     app = QApplication(sys.argv)
 
     # 1) Login
@@ -344,6 +443,8 @@ def main():
         w.show()
         # MainWindow referansını sakla ki GC olmasın
         app._main_ref = w  # minimal hack; why: scope dışına çıkınca kapanmasın
+        if PREWARM:
+            prewarm_heavy_modules()
 
     login.parent_open_main = open_main_after_login  # LoginWindow.accept_login içinde çağrılır
     login.show()
@@ -0,0 +1,84 @@
+# file: canli_durum.py
+# Tanıma sisteminin canlı durum kanalına (detect/hybrid/canli_yayin.py) Qt aboneliği.
+# Satır başına bir JSON mesaj; bağlantı koparsa birkaç saniyede bir yeniden bağlanır.
+
+import json
+import os
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtNetwork import QLocalSocket
+
+LIVE_SOCKET = os.environ.get("ATTENDANCE_LIVE_SOCKET", "/tmp/attendance_live.sock")
+
+
+class CanliDurumIstemcisi(QObject):
+    """
+    Sinyaller Qt olay döngüsünde yayılır (ek iş parçacığı yok):
+    - istatistik(dict): anlık/maks yüz sayısı, yüzde (+ varsa tanılama alanları)
+    - ogrenciler(dict): okul_no -> {present, visible, attentive} (her değişiklikte tamamı)
+    - ders(str): "started" / "ended" / "idle"
+    - baglanti(bool): kanal bağlı mı
+    """
+
+    istatistik = pyqtSignal(dict)
+    ogrenciler = pyqtSignal(dict)
+    ders = pyqtSignal(str)
+    baglanti = pyqtSignal(bool)
+
+    def __init__(self, path: str = LIVE_SOCKET, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.stats = {}
+        self.students = {}
+        self._buf = b""
+        self._sock = QLocalSocket(self)
+        self._sock.readyRead.connect(self._oku)
+        self._sock.connected.connect(lambda: self.baglanti.emit(True))
+        self._sock.disconnected.connect(self._koptu)
+        # PyQt5 >= 5.15: errorOccurred; eski sürümlerde error sinyali
+        getattr(self._sock, "errorOccurred", self._sock.error).connect(lambda _err: self._koptu())
+        self._retry = QTimer(self)
+        self._retry.setInterval(3000)
+        self._retry.timeout.connect(self._baglan)
+
+    def start(self) -> None:
+        self._baglan()
+        self._retry.start()
+
+    def _baglan(self) -> None:
+        if self._sock.state() == QLocalSocket.UnconnectedState:
+            self._sock.connectToServer(self.path)
+
+    def _koptu(self) -> None:
+        self._buf = b""
+        self.baglanti.emit(False)
+
+    def _oku(self) -> None:
+        self._buf += bytes(self._sock.readAll())
+        *lines, self._buf = self._buf.split(b"\n")
+        for line in lines:
+            if not line:
+                continue
+            try:
+                self._isle(json.loads(line.decode("utf-8")))
+            except ValueError:
+                continue
+
+    def _isle(self, msg: dict) -> None:
+        kind = msg.get("type")
+        if kind == "snapshot":
+            self.stats = dict(msg.get("stats") or {})
+            self.students = dict(msg.get("students") or {})
+            self.ders.emit((msg.get("lesson") or {}).get("state", "idle"))
+            self.istatistik.emit(self.stats)
+            self.ogrenciler.emit(self.students)
+        elif kind == "stats":
+            self.stats.update({k: v for k, v in msg.items() if k != "type"})
+            self.istatistik.emit(self.stats)
+        elif kind == "student":
+            self.students[msg["okul_no"]] = msg
+            self.ogrenciler.emit(self.students)
+        elif kind == "lesson":
+            if msg.get("state") == "started":
+                self.stats, self.students = {}, {}
+            self.ders.emit(msg.get("state", "idle"))
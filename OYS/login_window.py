@@ -14,6 +14,7 @@ from PyQt5.QtGui import QPixmap, QGuiApplication, QPainter, QPalette, QColor, QF
 # --- Dış modüller (senin mevcut kodların) ------------------------------------
 from add_student_window import AddStudentWindow
 from ai_chatbox import AIArayuz
+import veri_erisim
 
 # --- Yollar (gerekirse değiştir) ---------------------------------------------
 LOGIN_BG = Path("/home/krm/Desktop/dlibenv/OYS/login_bg.png")   # Login arkaplanı (gönderdiğin görsel)
@@ -262,8 +263,7 @@ class MainWindow(QWidget):
         self.add_window.show()
 
     def open_student_list(self):
-        db_path = "/home/krm/Desktop/dlibenv/OYS/ogrenciler.db"
-        subprocess.Popen(["xdg-open", db_path])
+        subprocess.Popen(["xdg-open", veri_erisim.DB_PATH])
 
     def open_ai(self):
         self.ai_arayuz = AIArayuz()
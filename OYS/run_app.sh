@@ -2,4 +2,7 @@
 
 cd /home/krm/Desktop/dlibenv/OYS
 source /home/krm/Desktop/dlibenv/dlibenv/bin/activate
+# Öğrenci DB yolu: OYS ve tanıma sistemi bu tek ayarı okur (veri_erisim.py)
+export STUDENT_DB_PATH="${STUDENT_DB_PATH:-/home/krm/Desktop/dlibenv/OYS/ogrenciler.db}"
+
 python app.py
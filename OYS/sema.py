@@ -0,0 +1,147 @@
+# file: sema.py
+# Sürümlü şema göçleri (PRAGMA user_version)
+# - Her göç bir kez ve sırayla uygulanır; sürüm DB dosyasının başlığında saklanır
+# - veri_erisim her DB için süreç başına bir kez (havuz açılırken) migrate() çağırır;
+#   sıcak yollar (yoklama / dikkat yazımı) şemanın hazır olduğunu varsayar
+# - Yeni göç: fonksiyonu yazıp GOCLER listesinin sonuna ekleyin (mevcutları değiştirmeyin)
+
+import sqlite3
+from typing import Callable, List
+
+
+def _sutunlar(con: sqlite3.Connection, tablo: str) -> set:
+    return {row[1] for row in con.execute(f"PRAGMA table_info({tablo})")}
+
+
+def _sutun_ekle(con: sqlite3.Connection, tablo: str, sutun: str, tanim: str) -> None:
+    """Eski DB'lerde elle eklenmiş olabilir: yalnızca yoksa ekler."""
+    if sutun not in _sutunlar(con, tablo):
+        con.execute(f"ALTER TABLE {tablo} ADD COLUMN {sutun} {tanim}")
+
+
+def _indeksli_mi(con: sqlite3.Connection, tablo: str, sutun: str) -> bool:
+    """sutun, tablodaki herhangi bir indeksin ilk sütunu mu (UNIQUE kısıtının otomatik indeksi dahil)."""
+    for row in con.execute(f"PRAGMA index_list({tablo})").fetchall():
+        ilk = con.execute(f"PRAGMA index_info({row[1]})").fetchone()
+        if ilk is not None and ilk[2] == sutun:
+            return True
+    return False
+
+
+def _g1_temel_tablolar(con: sqlite3.Connection) -> None:
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS ogrenciler (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ad TEXT NOT NULL,
+            soyad TEXT NOT NULL,
+            okul_numarasi TEXT NOT NULL UNIQUE,
+            yuz_vektoru BLOB NOT NULL,
+            yoklama TEXT DEFAULT 'yok',
+            dikkat_orani REAL DEFAULT 0
+        )
+    """)
+    # Çoklu şablon: öğrencinin her kayıt fotoğrafının embedding'i (tanıma tarafı prototipe sıkıştırır)
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS yuz_sablonlari (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            okul_numarasi TEXT NOT NULL,
+            vektor BLOB NOT NULL
+        )
+    """)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_yuz_sablonlari_okul ON yuz_sablonlari(okul_numarasi)")
+
+
+def _g2_dikkat_sutunlari(con: sqlite3.Connection) -> None:
+    # write_attentions_to_db tek sabit UPDATE ile dikkat_orani + dikkat_sure yazar
+    _sutun_ekle(con, "ogrenciler", "yoklama", "TEXT DEFAULT 'yok'")
+    _sutun_ekle(con, "ogrenciler", "dikkat_orani", "REAL DEFAULT 0")
+    _sutun_ekle(con, "ogrenciler", "dikkat_sure", "REAL DEFAULT 0")
+    # Yoklama / dikkat UPDATE'leri okul_numarasi ile arar; UNIQUE'siz eski tablolarda tam tarama olmasın
+    if not _indeksli_mi(con, "ogrenciler", "okul_numarasi"):
+        con.execute("CREATE INDEX idx_ogrenciler_okul ON ogrenciler(okul_numarasi)")
+
+
+def _g3_ders_gorunurluk(con: sqlite3.Connection) -> None:
+    # Dilimler ders başlangıcına göre float32 saniye ofseti olarak saklanır (zaman_cizelgesi.py):
+    # dilim başına 12 bayt (45 dk'lık derste onlarca dilim -> birkaç yüz bayt).
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS ders_gorunurluk (
+            ders_baslangic REAL NOT NULL,
+            okul_numarasi TEXT NOT NULL,
+            ilk_gorulme REAL NOT NULL,
+            ders_bitis REAL NOT NULL,
+            araliklar BLOB NOT NULL,
+            PRIMARY KEY (ders_baslangic, okul_numarasi)
+        )
+    """)
+    # Ders bazlı sorgular birincil anahtarı kullanır; öğrenci geçmişi için ters sıra
+    con.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ders_gorunurluk_ogrenci ON ders_gorunurluk(okul_numarasi, ders_baslangic)"
+    )
+
+
+def _g4_ders_yoklama(con: sqlite3.Connection) -> None:
+    # ogrenciler.yoklama yalnızca son dersin anlık durumu; ders başına kalıcı geçmiş burada.
+    # tarih: ders başlangıcının yerel günü ('YYYY-MM-DD'); metin karşılaştırması aralık sorgusu için yeterli
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ders_baslangic REAL NOT NULL UNIQUE,
+            ders_bitis REAL,
+            tarih TEXT NOT NULL
+        )
+    """)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_sessions_tarih ON sessions(tarih)")
+    # Ders sonunda her kayıtlı öğrenci için bir satır (devamsızlar dahil). tarih, öğrenci bazlı
+    # aralık sorgusu birleştirme olmadan indeksten çözülsün diye burada da tutulur.
+    # Birincil anahtar session_id ile başlar: ders bazlı sorgular ayrıca indeks istemez.
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS session_attendance (
+            session_id INTEGER NOT NULL,
+            okul_numarasi TEXT NOT NULL,
+            tarih TEXT NOT NULL,
+            durum TEXT NOT NULL,
+            ilk_gorulme REAL,
+            dikkat_orani REAL DEFAULT 0,
+            dikkat_sure REAL DEFAULT 0,
+            PRIMARY KEY (session_id, okul_numarasi)
+        ) WITHOUT ROWID
+    """)
+    con.execute(
+        "CREATE INDEX IF NOT EXISTS idx_session_attendance_ogrenci ON session_attendance(okul_numarasi, tarih)"
+    )
+
+
+# Sıra önemlidir: i. eleman user_version i -> i+1 göçüdür
+GOCLER: List[Callable[[sqlite3.Connection], None]] = [
+    _g1_temel_tablolar,
+    _g2_dikkat_sutunlari,
+    _g3_ders_gorunurluk,
+    _g4_ders_yoklama,
+]
+SON_SURUM = len(GOCLER)
+
+
+def surum(con: sqlite3.Connection) -> int:
+    return int(con.execute("PRAGMA user_version").fetchone()[0])
+
+
+def migrate(con: sqlite3.Connection) -> int:
+    """
+    Eksik göçleri tek transaction'da uygular; yeni sürümü döner.
+    BEGIN IMMEDIATE: aynı anda açılan iki süreç (OYS + tanıma) göçü iki kez çalıştırmaz;
+    ikincisi kilidi aldığında sürümü güncel bulur.
+    """
+    if surum(con) >= SON_SURUM:
+        return surum(con)
+    con.execute("BEGIN IMMEDIATE")
+    try:
+        mevcut = surum(con)
+        for goc in GOCLER[mevcut:]:
+            goc(con)
+        con.execute(f"PRAGMA user_version={SON_SURUM}")
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return SON_SURUM
@@ -0,0 +1,144 @@
+# file: toplu_kayit.py
+# Bir sınıfın tamamını fotoğraf klasöründen toplu kaydeder (arayüzsüz)
+# Klasör yapısı: kok/<okul_no>_<ad>_<soyad>/*.jpg  (ad birden fazla kelimeyse "_" ile ayrılabilir)
+# - Fotoğraflar tek bir süreç havuzunda paralel işlenir (yuz_cikarim)
+# - Her parti (--batch öğrenci) tek transaction ile yazılır, ardından kontrol noktası güncellenir
+# - Yarıda kesilen aktarım aynı komutla kaldığı yerden devam eder
+# Kullanım: python toplu_kayit.py /yol/sinif_fotograflari [--db ogrenciler.db] [--workers 8]
+
+import argparse
+import json
+import os
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import yuz_cikarim
+
+RESIM_UZANTILARI = (".jpg", ".jpeg", ".png")
+# Öğrenci başına en az bu kadar yüz bulunan fotoğraf gerekir (AddStudentWindow ile aynı)
+MIN_FOTO = 3
+
+# (okul_no, ad, soyad, fotoğraf yolları)
+Ogrenci = Tuple[str, str, str, List[str]]
+
+
+def klasor_tara(kok: str) -> List[Ogrenci]:
+    """kok/<okul_no>_<ad>_<soyad>/ klasörlerini okul numarası sırasıyla listeler."""
+    out = []
+    for isim in sorted(os.listdir(kok)):
+        yol = os.path.join(kok, isim)
+        parca = isim.split("_")
+        if not os.path.isdir(yol) or len(parca) < 3:
+            continue
+        okul, ad, soyad = parca[0], " ".join(parca[1:-1]), parca[-1]
+        fotolar = sorted(
+            os.path.join(yol, f) for f in os.listdir(yol) if f.lower().endswith(RESIM_UZANTILARI)
+        )
+        if fotolar:
+            out.append((okul, ad, soyad, fotolar))
+    return out
+
+
+def kontrol_noktasi_oku(yol: str) -> Dict:
+    if not os.path.exists(yol):
+        return {"tamamlanan": [], "basarisiz": {}}
+    with open(yol, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def kontrol_noktasi_yaz(yol: str, durum: Dict) -> None:
+    # Önce geçici dosyaya yaz, sonra atomik olarak değiştir (kesintide dosya bozulmasın)
+    tmp = yol + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(durum, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, yol)
+
+
+def parti_isle(parti: List[Ogrenci], executor: ProcessPoolExecutor) -> Tuple[List, Dict, Dict[str, str], int]:
+    """
+    Partideki tüm fotoğraflar birlikte havuza verilir (öğrenci sınırında işçiler boşta kalmaz).
+    Dönüş: (veritabanı satırları, okul_no -> şablonlar, başarısız okul_no -> neden, işlenen fotoğraf)
+    """
+    yollar = [p for _, _, _, fotolar in parti for p in fotolar]
+    sonuc = {p: e for p, e, _ in yuz_cikarim.extract_embeddings(yollar, executor=executor)}
+
+    satirlar, sablonlar, basarisiz = [], {}, {}
+    for okul, ad, soyad, fotolar in parti:
+        embs = [sonuc[p] for p in fotolar if sonuc[p] is not None]
+        if len(embs) < MIN_FOTO:
+            basarisiz[okul] = f"{len(embs)}/{len(fotolar)} fotoğrafta yüz bulundu"
+            continue
+        sablon, keep = yuz_cikarim.robust_template(embs)
+        satirlar.append((ad, soyad, okul, sablon))
+        sablonlar[okul] = [e for e, k in zip(embs, keep) if k]
+    return satirlar, sablonlar, basarisiz, len(yollar)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Fotoğraf klasöründen toplu öğrenci kaydı")
+    ap.add_argument("kok", help="kok/<okul_no>_<ad>_<soyad>/*.jpg")
+    ap.add_argument("--db", default=None, help="verilmezse STUDENT_DB_PATH")
+    ap.add_argument("--workers", type=int, default=yuz_cikarim.ENROLL_WORKERS)
+    ap.add_argument("--batch", type=int, default=25, help="transaction başına öğrenci")
+    ap.add_argument("--checkpoint", default=None, help="varsayılan: <kok>/.toplu_kayit.json")
+    ap.add_argument("--retry-failed", action="store_true", help="önceki çalıştırmada başarısız olanları tekrar dene")
+    args = ap.parse_args()
+
+    import veri_erisim
+    if args.db:
+        veri_erisim.set_db_path(args.db)
+    import veritabani
+
+    ckpt_yol = args.checkpoint or os.path.join(args.kok, ".toplu_kayit.json")
+    durum = kontrol_noktasi_oku(ckpt_yol)
+    atla = set(durum["tamamlanan"])
+    if not args.retry_failed:
+        atla |= set(durum["basarisiz"])
+
+    ogrenciler = klasor_tara(args.kok)
+    bekleyen = [o for o in ogrenciler if o[0] not in atla]
+    print(f"[TOPLU] {len(ogrenciler)} klasör, {len(ogrenciler) - len(bekleyen)} önceden işlenmiş, "
+          f"{len(bekleyen)} bekliyor ({args.workers} işçi)")
+    if not bekleyen:
+        return
+
+    t0 = time.perf_counter()
+    foto_say = yazilan = 0
+    # Komut satırında Qt yok: fork ile işçiler hızlı açılır
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=mp.get_context("fork"),
+        initializer=yuz_cikarim._worker_init,
+    ) as ex:
+        for i in range(0, len(bekleyen), args.batch):
+            parti = bekleyen[i:i + args.batch]
+            satirlar, sablonlar, basarisiz, n = parti_isle(parti, ex)
+            foto_say += n
+
+            if satirlar and veritabani.ogrenci_ekle_toplu(satirlar, sablonlar) != len(satirlar):
+                raise SystemExit("[TOPLU] Veritabanı yazımı başarısız; kontrol noktası güncellenmedi.")
+            yazilan += len(satirlar)
+
+            durum["tamamlanan"].extend(okul for _, _, okul, _ in satirlar)
+            for okul, neden in basarisiz.items():
+                durum["basarisiz"][okul] = neden
+            for _, _, okul, _ in satirlar:
+                durum["basarisiz"].pop(okul, None)
+            kontrol_noktasi_yaz(ckpt_yol, durum)
+
+            gecen = time.perf_counter() - t0
+            print(f"[TOPLU] {min(i + args.batch, len(bekleyen))}/{len(bekleyen)} öğrenci, "
+                  f"{foto_say / gecen:.1f} foto/sn")
+
+    gecen = time.perf_counter() - t0
+    print(f"[TOPLU] Bitti: {yazilan} öğrenci yazıldı, {len(bekleyen) - yazilan} başarısız, "
+          f"{foto_say} fotoğraf, {gecen:.1f} sn "
+          f"({foto_say / gecen:.1f} foto/sn, {len(bekleyen) / gecen:.2f} öğrenci/sn)")
+    for okul, neden in durum["basarisiz"].items():
+        print(f"  - {okul}: {neden}")
+
+
+if __name__ == "__main__":
+    main()
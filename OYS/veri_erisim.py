@@ -0,0 +1,187 @@
+# file: veri_erisim.py
+# OYS uygulaması ve tanıma sistemi (detect/hybrid) için ortak SQLite erişim katmanı
+# - DB yolu tek ayardan: STUDENT_DB_PATH (varsayılan: bu klasördeki ogrenciler.db)
+# - DB dosyası başına küçük, iş parçacığı güvenli bağlantı havuzu (çağrı başına connect/close yok)
+# - Her bağlantı: WAL (okuyucular yazanı, yazan okuyucuları bekletmez), busy_timeout
+#   ("database is locked" yerine bekle), synchronous=NORMAL (WAL'da commit başına fsync yok)
+# - sqlite3'ün bağlantı başına hazırlanmış ifade önbelleği büyütülür: havuzdaki bağlantılar
+#   yaşadıkça sık çalışan sabit SQL'ler yeniden derlenmez
+# - Şema göçleri (sema.py) DB başına süreçte bir kez, havuz ilk açıldığında uygulanır
+# Bu modül yalnızca standart kütüphane kullanır (tanıma tarafı da içe aktarır).
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import sema
+
+DB_PATH = os.environ.get(
+    "STUDENT_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ogrenciler.db"),
+)
+POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "4"))
+# Kilitli DB'de hata vermeden önce en fazla bekleme (sn)
+BUSY_TIMEOUT = float(os.environ.get("DB_BUSY_TIMEOUT", "10"))
+CACHED_STATEMENTS = 256
+
+
+def set_db_path(path: str) -> None:
+    """Varsayılan DB yolunu değiştirir (ör. toplu_kayit --db); yol verilmeyen çağrılar bunu kullanır."""
+    global DB_PATH
+    DB_PATH = path
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """Havuz dışı, ayarları uygulanmış tek bağlantı (kendi bağlantısını tutması gerekenler için)."""
+    con = sqlite3.connect(
+        path or DB_PATH,
+        timeout=BUSY_TIMEOUT,
+        check_same_thread=False,
+        cached_statements=CACHED_STATEMENTS,
+    )
+    con.execute(f"PRAGMA busy_timeout={int(BUSY_TIMEOUT * 1000)}")
+    try:
+        con.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.OperationalError:
+        pass  # başka bağlantı kilitliyken mod değiştirilemez; kalıcı ayar, sonraki bağlantı yapar
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+class ConnectionPool:
+    """
+    Bir DB dosyası için en fazla `size` bağlantı. Boşta bağlantı yoksa ve sınıra ulaşıldıysa
+    biri geri gelene kadar beklenir. fork sonrası çocuk süreç ebeveynin bağlantılarını
+    kullanmaz (yeni havuz açar).
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self.size = max(1, size)
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return connect(self.path)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=BUSY_TIMEOUT)
+
+    def release(self, con: sqlite3.Connection) -> None:
+        if con.in_transaction:
+            con.rollback()  # yarım kalan transaction sonraki kullanıcıya taşınmasın
+        self._idle.put(con)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created = 0
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+_migrated: set = set()
+
+
+def migrate(path: Optional[str] = None) -> int:
+    """Şemayı son sürüme getirir (süreç başına DB yolu için bir kez); şema sürümünü döner."""
+    path = os.path.abspath(path or DB_PATH)
+    con = connect(path)
+    try:
+        v = sema.migrate(con)
+    finally:
+        con.close()
+    _migrated.add(path)
+    return v
+
+
+def get_pool(path: Optional[str] = None) -> ConnectionPool:
+    path = os.path.abspath(path or DB_PATH)
+    pool = _pools.get(path)
+    if pool is None or pool._pid != os.getpid():
+        with _pools_lock:
+            pool = _pools.get(path)
+            if pool is None or pool._pid != os.getpid():
+                if path not in _migrated:
+                    migrate(path)
+                pool = _pools[path] = ConnectionPool(path)
+    return pool
+
+
+def close_pool(path: Optional[str] = None) -> None:
+    """Havuzdaki bağlantıları kapatır (geçici DB silinmeden önce / kapanışta)."""
+    path = os.path.abspath(path or DB_PATH)
+    with _pools_lock:
+        pool = _pools.pop(path, None)
+        _migrated.discard(path)  # aynı yolda yeniden oluşturulan DB tekrar göç görsün
+    if pool is not None:
+        pool.close()
+
+
+@contextmanager
+def connection(path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """Havuzdan bağlantı ödünç alır; blok bitince geri verir (commit çağıranın işidir)."""
+    pool = get_pool(path)
+    con = pool.acquire()
+    try:
+        yield con
+    finally:
+        pool.release(con)
+
+
+@contextmanager
+def transaction(path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """Tek transaction: blok hatasız biterse commit, hata olursa rollback."""
+    with connection(path) as con:
+        with con:
+            yield con
+
+
+# ---- Kısayollar ----
+def fetchall(sql: str, params: Sequence = (), path: Optional[str] = None) -> List[tuple]:
+    with connection(path) as con:
+        return con.execute(sql, params).fetchall()
+
+
+def fetchone(sql: str, params: Sequence = (), path: Optional[str] = None) -> Optional[tuple]:
+    with connection(path) as con:
+        return con.execute(sql, params).fetchone()
+
+
+def execute(sql: str, params: Sequence = (), path: Optional[str] = None) -> int:
+    """Tek ifade, kendi transaction'ında; etkilenen satır sayısı."""
+    with transaction(path) as con:
+        return con.execute(sql, params).rowcount
+
+
+def executemany(sql: str, rows: Iterable[Sequence], path: Optional[str] = None) -> int:
+    """Toplu yazım: tüm satırlar tek transaction + executemany."""
+    rows = list(rows)
+    if not rows:
+        return 0
+    with transaction(path) as con:
+        con.executemany(sql, rows)
+    return len(rows)
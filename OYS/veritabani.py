@@ -1,38 +1,28 @@
 # ============================================
 # file: veritabani.py
+# Bağlantılar veri_erisim havuzundan (WAL, busy_timeout); DB yolu STUDENT_DB_PATH ayarından
 # ============================================
 
 import sqlite3
+import time
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import Dict, Iterable, List, Tuple, Optional, Sequence
 
-DB_PATH = "/home/krm/Desktop/dlibenv/OYS/ogrenciler.db"
+import veri_erisim
+from veri_erisim import DB_PATH  # noqa: F401 (eski içe aktarımlar için)
 
 
 def get_connection() -> sqlite3.Connection:
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    """Havuz dışı tek bağlantı (WAL + busy_timeout); çağıran kapatır."""
+    return veri_erisim.connect()
 
 
 def tablo_olustur() -> None:
     """
-    Veritabanı ilk kez oluşturulurken tabloyu oluşturur.
-    Bu sürümde dikkat_orani sütunu doğrudan eklenmiştir.
-    """
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS ogrenciler (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ad TEXT NOT NULL,
-            soyad TEXT NOT NULL,
-            okul_numarasi TEXT NOT NULL UNIQUE,
-            yuz_vektoru BLOB NOT NULL,
-            yoklama TEXT DEFAULT 'yok',
-            dikkat_orani REAL DEFAULT 0
-        );
-    """)
-    con.commit()
-    con.close()
+    Şemayı son sürüme getirir (eski çağıranlar için; göçler sema.py'de).
+    Havuz ilk açıldığında zaten çalışır; süreç başına bir kez uygulanır.
+    """
+    veri_erisim.migrate()
 
 
 def _vec_to_blob(vec: np.ndarray) -> bytes:
@@ -59,25 +49,36 @@ def _blob_to_vec(blob: bytes) -> Optional[np.ndarray]:
     return v if v.size == 128 and np.isfinite(v).all() else None
 
 
-def ogrenci_ekle(ad: str, soyad: str, okul_numarasi: str, yuz_vektoru: np.ndarray) -> bool:
+def _sablonlari_yaz(cur: sqlite3.Cursor, okul_numarasi: str, sablonlar: Sequence[np.ndarray]) -> None:
+    """Öğrencinin eski şablonlarını siler, yenilerini yazar (çağıranın transaction'ı içinde)."""
+    cur.execute("DELETE FROM yuz_sablonlari WHERE okul_numarasi=?", (okul_numarasi,))
+    cur.executemany(
+        "INSERT INTO yuz_sablonlari (okul_numarasi, vektor) VALUES(?,?)",
+        [(okul_numarasi, sqlite3.Binary(_vec_to_blob(v))) for v in sablonlar]
+    )
+
+
+def ogrenci_ekle(ad: str, soyad: str, okul_numarasi: str, yuz_vektoru: np.ndarray,
+                 sablonlar: Optional[Sequence[np.ndarray]] = None) -> bool:
     """
     Yeni öğrenci ekler.
     yoklama = 'yok', dikkat_orani = 0 olarak başlar.
+    sablonlar: fotoğraf başına embedding'ler (verilirse yuz_sablonlari'na yazılır).
+    Kayıt yenilenirken şablon verilmezse eski şablonlar silinir; yoksa galeri prototipleri
+    yeni ortalama vektörün yerine eski fotoğraflardan kurulur.
     """
     try:
-        tablo_olustur()
         blob = _vec_to_blob(yuz_vektoru)
 
-        con = get_connection()
-        cur = con.cursor()
-        cur.execute("""
-            INSERT OR REPLACE INTO ogrenciler
-            (ad, soyad, okul_numarasi, yuz_vektoru, yoklama, dikkat_orani)
-            VALUES(?,?,?,?,?,?)
-        """, (ad, soyad, okul_numarasi, sqlite3.Binary(blob), "yok", 0.0))
+        with veri_erisim.transaction() as con:
+            cur = con.cursor()
+            cur.execute("""
+                INSERT OR REPLACE INTO ogrenciler
+                (ad, soyad, okul_numarasi, yuz_vektoru, yoklama, dikkat_orani)
+                VALUES(?,?,?,?,?,?)
+            """, (ad, soyad, okul_numarasi, sqlite3.Binary(blob), "yok", 0.0))
+            _sablonlari_yaz(cur, okul_numarasi, sablonlar or ())
 
-        con.commit()
-        con.close()
         return True
 
     except Exception as e:
@@ -85,32 +86,62 @@ def ogrenci_ekle(ad: str, soyad: str, okul_numarasi: str, yuz_vektoru: np.ndarra
         return False
 
 
+def ogrenci_ekle_toplu(kayitlar: Iterable[Tuple[str, str, str, np.ndarray]],
+                       sablonlar: Optional[Dict[str, Sequence[np.ndarray]]] = None) -> int:
+    """
+    Çok sayıda öğrenciyi tek transaction içinde ekler (toplu kayıt).
+    kayitlar: (ad, soyad, okul_numarasi, yuz_vektoru)
+    sablonlar: okul_numarasi -> fotoğraf başına embedding'ler (opsiyonel; şablonu verilmeyen
+    öğrencinin eski şablonları silinir, bkz. ogrenci_ekle)
+    Dönüş: yazılan kayıt sayısı (hata olursa 0; transaction geri alınır).
+    """
+    satirlar = [
+        (ad, soyad, okul, sqlite3.Binary(_vec_to_blob(vec)), "yok", 0.0)
+        for ad, soyad, okul, vec in kayitlar
+    ]
+    if not satirlar:
+        return 0
+
+    try:
+        with veri_erisim.transaction() as con:
+            con.executemany("""
+                INSERT OR REPLACE INTO ogrenciler
+                (ad, soyad, okul_numarasi, yuz_vektoru, yoklama, dikkat_orani)
+                VALUES(?,?,?,?,?,?)
+            """, satirlar)
+            sablonlar = sablonlar or {}
+            con.executemany("DELETE FROM yuz_sablonlari WHERE okul_numarasi=?",
+                            [(satir[2],) for satir in satirlar])
+            con.executemany(
+                "INSERT INTO yuz_sablonlari (okul_numarasi, vektor) VALUES(?,?)",
+                [(satir[2], sqlite3.Binary(_vec_to_blob(v)))
+                 for satir in satirlar for v in sablonlar.get(satir[2], ())]
+            )
+        return len(satirlar)
+
+    except Exception as e:
+        print("DB Hata:", e)
+        return 0
+
+
 def yoklama_guncelle(okul_numarasi: str, durum: str) -> None:
     """
     durum: 'var' veya 'yok'
     """
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute(
+    veri_erisim.execute(
         "UPDATE ogrenciler SET yoklama=? WHERE okul_numarasi=?",
         (durum, okul_numarasi)
     )
-    con.commit()
-    con.close()
 
 
 def dikkat_orani_guncelle(okul_numarasi: str, oran: float) -> None:
     """
     Öğrencinin dikkat oranını (0–100) günceller.
     """
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute(
+    veri_erisim.execute(
         "UPDATE ogrenciler SET dikkat_orani=? WHERE okul_numarasi=?",
         (float(oran), okul_numarasi)
     )
-    con.commit()
-    con.close()
 
 
 def ogrencileri_cek() -> List[Tuple[str, str, str, np.ndarray, str, float]]:
@@ -118,16 +149,11 @@ def ogrencileri_cek() -> List[Tuple[str, str, str, np.ndarray, str, float]]:
     Tüm öğrencileri çeker:
     (ad, soyad, okul_no, yüz vektörü, yoklama, dikkat_orani)
     """
-    con = get_connection()
-    cur = con.cursor()
-    cur.execute("""
+    rows = veri_erisim.fetchall("""
         SELECT ad, soyad, okul_numarasi, yuz_vektoru, yoklama, dikkat_orani
         FROM ogrenciler
     """)
 
-    rows = cur.fetchall()
-    con.close()
-
     out = []
     for ad, soyad, no, blob, yoklama, dikkat in rows:
         if isinstance(blob, (bytes, bytearray, memoryview)):
@@ -138,6 +164,40 @@ def ogrencileri_cek() -> List[Tuple[str, str, str, np.ndarray, str, float]]:
     return out
 
 
-# Veritabanı oluşturulsun
-tablo_olustur()
 
+def _ay_araligi(yil: int, ay: int) -> Tuple[str, str]:
+    """[ayın ilk günü, sonraki ayın ilk günü) 'YYYY-MM-DD' sınırları."""
+    sonraki = (yil + 1, 1) if ay == 12 else (yil, ay + 1)
+    return f"{yil:04d}-{ay:02d}-01", f"{sonraki[0]:04d}-{sonraki[1]:02d}-01"
+
+
+def ogrenci_devamsizliklari(okul_numarasi: str, yil: Optional[int] = None,
+                            ay: Optional[int] = None) -> List[Tuple[str, float]]:
+    """
+    Öğrencinin bir ayda (varsayılan: bu ay) devamsız olduğu dersler:
+    [(tarih, ders_baslangic), ...] tarih sırasıyla.
+    (okul_numarasi, tarih) indeksinden aralık taraması; geçmiş büyüdükçe yavaşlamaz.
+    """
+    if yil is None or ay is None:
+        bugun = time.localtime()
+        yil, ay = bugun.tm_year, bugun.tm_mon
+    bas, bit = _ay_araligi(yil, ay)
+    return veri_erisim.fetchall("""
+        SELECT a.tarih, s.ders_baslangic
+        FROM session_attendance a JOIN sessions s ON s.id = a.session_id
+        WHERE a.okul_numarasi=? AND a.tarih >= ? AND a.tarih < ? AND a.durum='yok'
+        ORDER BY a.tarih, s.ders_baslangic
+    """, (okul_numarasi, bas, bit))
+
+
+def gunun_yoklamalari(tarih: str) -> List[Tuple[int, float, str, str, float]]:
+    """
+    tarih ('YYYY-MM-DD') günündeki tüm derslerin yoklaması:
+    [(ders id, ders_baslangic, okul_no, durum, dikkat_orani), ...]
+    """
+    return veri_erisim.fetchall("""
+        SELECT s.id, s.ders_baslangic, a.okul_numarasi, a.durum, a.dikkat_orani
+        FROM sessions s JOIN session_attendance a ON a.session_id = s.id
+        WHERE s.tarih=?
+        ORDER BY s.ders_baslangic, a.okul_numarasi
+    """, (tarih,))
@@ -0,0 +1,178 @@
+# file: yuz_cikarim.py
+# Öğrenci kaydı için fotoğraflardan yüz embedding'i çıkarma (paralel + kaliteye duyarlı)
+# - Her fotoğraf ayrı süreçte işlenir (ProcessPoolExecutor)
+# - Yüz, küçültülmüş görüntüde aranır (HOG tam çözünürlükte çok yavaş); encoding yalnızca
+#   tam çözünürlükten alınan (gerekirse büyütülen) yüz kırpıntısında yapılır
+# - Şablon: medyana uzak (aykırı) embedding'ler atılıp kalanların ortalaması
+
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Yüz arama bu uzun kenara küçültülmüş görüntüde yapılır
+DETECT_MAX_SIDE = int(os.environ.get("ENROLL_DETECT_MAX_SIDE", "640"))
+# Encoding için yüz en az bu genişlikte olacak şekilde kırpıntı büyütülür (dlib çipi 150 px)
+ENCODE_MIN_FACE = int(os.environ.get("ENROLL_ENCODE_MIN_FACE", "150"))
+ENROLL_WORKERS = int(os.environ.get("ENROLL_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+# spawn: Qt iş parçacıkları varken fork güvenli değil; komut satırında fork kullanılabilir
+ENROLL_MP_START = os.environ.get("ENROLL_MP_START", "spawn")
+# Medyana bu mesafeden uzak embedding aykırı sayılır (aynı kişi eşiği ~0.6)
+OUTLIER_MAX_DIST = float(os.environ.get("ENROLL_OUTLIER_DIST", "0.45"))
+
+# (yol, embedding ya da None, açıklama)
+ExtractResult = Tuple[str, Optional[np.ndarray], str]
+
+
+def _worker_init() -> None:
+    # Modeller işçi başına bir kez yüklensin
+    import face_recognition  # noqa: F401
+
+
+def prewarm() -> None:
+    """
+    Ağır kütüphaneleri bu süreçte yükler (OYS girişten sonra arka planda çağırır).
+    Tek işçili kayıt bu süreçte çalışır; ilk kayıt içe aktarma süresini ödemesin.
+    """
+    import cv2  # noqa: F401
+    import face_recognition  # noqa: F401
+
+
+def extract_one(path: str, model: str = "large") -> ExtractResult:
+    """Tek fotoğraftan en büyük yüzün embedding'i."""
+    import cv2
+    import face_recognition
+
+    try:
+        img = cv2.imread(path)
+        if img is None:
+            return path, None, "okunamadı"
+        h, w = img.shape[:2]
+
+        scale = min(1.0, DETECT_MAX_SIDE / float(max(h, w)))
+        small = cv2.resize(img, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else img
+        boxes = face_recognition.face_locations(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+        if not boxes:
+            return path, None, "yüz yok"
+
+        # Birden fazla yüz varsa en büyüğü (kayıt fotoğrafında öğrencinin kendisi)
+        top, right, bottom, left = max(boxes, key=lambda b: (b[2] - b[0]) * (b[1] - b[3]))
+        top, right, bottom, left = (int(round(v / scale)) for v in (top, right, bottom, left))
+
+        # Yüzün çevresinden yarım yüz payla kırp (landmark'lar kutu dışına taşabilir)
+        fw, fh = right - left, bottom - top
+        x0, y0 = max(0, left - fw // 2), max(0, top - fh // 2)
+        x1, y1 = min(w, right + fw // 2), min(h, bottom + fh // 2)
+        crop = img[y0:y1, x0:x1]
+        loc = (top - y0, right - x0, bottom - y0, left - x0)
+
+        up = ENCODE_MIN_FACE / float(max(fw, 1))
+        if up > 1.0:
+            crop = cv2.resize(crop, None, fx=up, fy=up, interpolation=cv2.INTER_CUBIC)
+            loc = tuple(int(round(v * up)) for v in loc)
+
+        encs = face_recognition.face_encodings(
+            cv2.cvtColor(crop, cv2.COLOR_BGR2RGB), known_face_locations=[loc], model=model
+        )
+        if not encs:
+            return path, None, "encoding alınamadı"
+        return path, np.asarray(encs[0], dtype=np.float32), "ok"
+    except Exception as e:
+        return path, None, f"hata: {e}"
+
+
+def robust_template(embeddings: Sequence[np.ndarray], max_dist: float = OUTLIER_MAX_DIST) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Aykırıları atılmış ortalama şablon.
+    - Medyan embedding'e mesafe d_i hesaplanır
+    - Eşik: min(max_dist, medyan(d) + 3 * 1.4826 * MAD(d))
+    - En az yarısı her zaman tutulur (çoğunluk kötü fotoğrafsa bile şablon boş kalmasın)
+    Dönüş: (128,) float32 şablon, tutulanlar maskesi
+    """
+    x = np.asarray(embeddings, dtype=np.float32).reshape(-1, 128)
+    if x.shape[0] <= 2:
+        return x.mean(axis=0), np.ones(x.shape[0], dtype=bool)
+
+    med = np.median(x, axis=0)
+    d = np.linalg.norm(x - med, axis=1)
+    d_med = float(np.median(d))
+    mad = float(np.median(np.abs(d - d_med)))
+    thr = min(max_dist, d_med + 3.0 * 1.4826 * mad)
+    keep = d <= thr
+    min_keep = (x.shape[0] + 1) // 2
+    if keep.sum() < min_keep:
+        keep = np.zeros_like(keep)
+        keep[np.argsort(d)[:min_keep]] = True
+    return x[keep].mean(axis=0), keep
+
+
+def extract_embeddings(
+    paths: Sequence[str],
+    workers: int = ENROLL_WORKERS,
+    progress: Optional[Callable[[int, int], None]] = None,
+    start_method: str = ENROLL_MP_START,
+    executor: Optional[ProcessPoolExecutor] = None,
+) -> List[ExtractResult]:
+    """Fotoğrafları paralel işler; sonuçlar `paths` sırasıyla döner. progress(bitti, toplam)."""
+    total = len(paths)
+    results: Dict[str, ExtractResult] = {}
+    if total == 0:
+        return []
+
+    if workers <= 1 and executor is None:
+        for i, p in enumerate(paths, 1):
+            results[p] = extract_one(p)
+            if progress:
+                progress(i, total)
+        return [results[p] for p in paths]
+
+    own = executor is None
+    if own:
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, total),
+            mp_context=mp.get_context(start_method),
+            initializer=_worker_init,
+        )
+    try:
+        futures = [executor.submit(extract_one, p) for p in paths]
+        for done, fut in enumerate(as_completed(futures), 1):
+            res = fut.result()
+            results[res[0]] = res
+            if progress:
+                progress(done, total)
+    finally:
+        if own:
+            executor.shutdown()
+    return [results[p] for p in paths]
+
+
+def build_template(
+    paths: Sequence[str],
+    workers: int = ENROLL_WORKERS,
+    progress: Optional[Callable[[int, int], None]] = None,
+    **kwargs,
+) -> Tuple[Optional[np.ndarray], Dict]:
+    """
+    Fotoğraflardan şablon + rapor.
+    Rapor: {"toplam", "yuz_bulunan", "kullanilan", "aykiri", "atlanan": {yol: neden},
+            "sablonlar": aykırı olmayan fotoğraf embedding'leri (çoklu şablon tablosu için)}
+    """
+    results = extract_embeddings(paths, workers=workers, progress=progress, **kwargs)
+    ok = [(p, e) for p, e, _ in results if e is not None]
+    report = {
+        "toplam": len(paths),
+        "yuz_bulunan": len(ok),
+        "kullanilan": 0,
+        "aykiri": [],
+        "atlanan": {p: why for p, e, why in results if e is None},
+        "sablonlar": [],
+    }
+    if not ok:
+        return None, report
+    template, keep = robust_template([e for _, e in ok])
+    report["kullanilan"] = int(keep.sum())
+    report["aykiri"] = [p for (p, _), k in zip(ok, keep) if not k]
+    report["sablonlar"] = [e for (_, e), k in zip(ok, keep) if k]
+    return template, report
@@ -0,0 +1,81 @@
+# ============================================
+# file: ann_dogrulama.py
+# IVF indeksli galeri aramasının tam aramayla tutarlı olduğunu rastgele galerilerle doğrular:
+# tek vektörlü ve çoklu şablonlu (prototipli) galeriler, küçük nprobe (taranan listelerde
+# k'dan az aday -> tam aramaya düşüş) ve tüm listelerin tarandığı durum.
+# Kullanım: python ann_dogrulama.py [--cases 300] [--seed 0]
+# ============================================
+
+from __future__ import annotations
+
+import argparse
+import random
+
+import numpy as np
+
+from ann_indeks import IVFIndex
+from galeri import EMB_DIM, Galeri
+
+
+def _random_gallery(rng: np.random.Generator, n_students: int, max_protos: int) -> Galeri:
+    """Öğrenci başına 1..max_protos prototip (ardışık satırlar, aynı okul_no)."""
+    means = rng.normal(0.0, 0.1, size=(n_students, EMB_DIM)).astype(np.float32)
+    counts = rng.integers(1, max_protos + 1, size=n_students)
+    rows = np.repeat(means, counts, axis=0)
+    rows += rng.normal(0.0, 0.02, size=rows.shape).astype(np.float32)
+    okul_nos = np.repeat([str(1000 + i) for i in range(n_students)], counts).tolist()
+    labels = [f"Ogrenci{o}" for o in okul_nos]
+    return Galeri(rows, labels, okul_nos)
+
+
+def check_case(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    prng = random.Random(seed)
+    n_students = prng.randint(1, 40)
+    max_protos = prng.choice([1, 2, 4, 6])
+    galeri = _random_gallery(rng, n_students, max_protos)
+    n = len(galeri)
+    nlist = prng.randint(1, n)
+    k = prng.randint(1, min(5, galeri.n_students))
+    queries = galeri.vectors[rng.integers(0, n, size=prng.randint(1, 16))]
+    queries = queries + rng.normal(0.0, 0.02, size=queries.shape).astype(np.float32)
+
+    _, exact_d = galeri.topk(queries, k, exact=True)
+    galeri.index = IVFIndex.build(galeri.vectors, nlist=nlist, nprobe=1)
+
+    # Küçük nprobe: sonuç şekli ve öğrenci tekilliği korunmalı (tam aramaya düşüş dahil)
+    for nprobe in (1, 2):
+        galeri.index.nprobe = min(nprobe, galeri.index.nlist)
+        idx, dist = galeri.topk(queries, k)
+        assert idx.shape == dist.shape == (queries.shape[0], k), (idx.shape, dist.shape, k)
+        assert np.all(np.diff(dist, axis=1) >= -1e-6), "mesafeler artan değil"
+        for row in idx:
+            students = [galeri.okul_nos[j] for j in row]
+            assert len(set(students)) == k, ("aynı öğrenci iki kez", students)
+        assert np.all(dist >= exact_d - 1e-5), "indeks tam aramadan yakın aday buldu"
+        galeri.match_all(queries)
+
+    # Tüm listeler taranınca tam aramayla aynı mesafeler (eşit mesafede öğrenci sırası farklı olabilir)
+    galeri.index.nprobe = galeri.index.nlist
+    _, dist = galeri.topk(queries, k)
+    assert np.allclose(dist, exact_d, atol=1e-5), (dist, exact_d)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="IVF indeks / galeri aramasının tutarlılık kontrolü")
+    ap.add_argument("--cases", type=int, default=300)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    for i in range(args.cases):
+        case_seed = rng.randrange(2**32)
+        try:
+            check_case(case_seed)
+        except AssertionError as e:
+            raise SystemExit(f"FARKLI: senaryo {i} (seed={case_seed}): {e}")
+    print(f"{args.cases} senaryo: indeksli ve tam arama tutarlı.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+# ============================================
+# file: ann_indeks.py
+# Büyük galeriler (yüz binlerce öğrenci) için yaklaşık en yakın komşu indeksi (IVF)
+# - Kaba k-means merkezleri: her embedding en yakın merkezin listesine düşer
+# - Sorguda yalnızca en yakın nprobe listesi taranır, aday kısa liste tam mesafeyle
+#   yeniden sıralanır (dönen mesafeler brute-force ile birebir aynıdır)
+# - İndeks DB'nin yanına kaydedilir: <db>.ivf.npz
+# Kullanım:
+#   python ann_indeks.py build --db ogrenciler.db
+#   python ann_indeks.py bench [--db ogrenciler.db] [--n 200000] [--nprobe 4 8 16 32]
+# ============================================
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from galeri import EMB_DIM, Galeri, gallery_fingerprint, load_student_rows
+
+# Galeri bu boyuttan küçükse indeks kurulmaz (tam arama zaten yeterince hızlı); 0: kapalı
+ANN_MIN_GALLERY = int(os.environ.get("ANN_MIN_GALLERY", "50000"))
+# Sorgu başına taranan liste sayısı (recall <-> gecikme dengesi)
+ANN_NPROBE = int(os.environ.get("ANN_NPROBE", "16"))
+
+# k-means, liste başına bu kadar örnekle eğitilir (tüm galeri yerine)
+_TRAIN_PER_LIST = 32
+_CHUNK = 65536
+
+
+def index_path(db_path: str) -> str:
+    return db_path + ".ivf.npz"
+
+
+def _nearest_centroid(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Her satır için en yakın merkezin indeksi (bellek için parça parça)."""
+    c_norms = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(x.shape[0], dtype=np.int32)
+    for s in range(0, x.shape[0], _CHUNK):
+        block = x[s:s + _CHUNK]
+        # ||x||^2 sabit olduğundan argmin için gerekmez
+        out[s:s + _CHUNK] = np.argmin(c_norms[None, :] - 2.0 * (block @ centroids.T), axis=1)
+    return out
+
+
+def _kmeans(x: np.ndarray, nlist: int, iters: int, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd k-means; boş kalan küme rastgele bir örnekle yeniden başlatılır."""
+    centroids = x[rng.choice(x.shape[0], nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = _nearest_centroid(x, centroids)
+        counts = np.bincount(assign, minlength=nlist)
+        order = np.argsort(assign, kind="stable")
+        nonempty = counts > 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.add.reduceat(x[order], starts[nonempty], axis=0)
+        centroids[nonempty] = sums / counts[nonempty, None]
+        empty = np.flatnonzero(~nonempty)
+        if empty.size:
+            centroids[empty] = x[rng.choice(x.shape[0], empty.size, replace=False)]
+    return centroids
+
+
+class IVFIndex:
+    """
+    Ters dosya (inverted file) indeksi.
+    - centroids: (nlist,128) float32
+    - order: galeri satır indeksleri, listeye göre gruplanmış
+    - offsets: (nlist+1,) -> liste c = order[offsets[c]:offsets[c+1]]
+    Vektörlerin kendisi tutulmaz; yeniden sıralama Galeri matrisinden yapılır.
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        order: np.ndarray,
+        offsets: np.ndarray,
+        nprobe: int = ANN_NPROBE,
+        fingerprint: Tuple[int, int] = (0, 0),
+    ):
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.order = np.asarray(order, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.nprobe = max(1, min(int(nprobe), self.nlist))
+        self.fingerprint = (int(fingerprint[0]), int(fingerprint[1]))
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @property
+    def size(self) -> int:
+        return int(self.order.shape[0])
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        nlist: Optional[int] = None,
+        iters: int = 10,
+        seed: int = 0,
+        nprobe: int = ANN_NPROBE,
+        fingerprint: Tuple[int, int] = (0, 0),
+    ) -> "IVFIndex":
+        """Galeri vektörlerinden indeks kurar (varsayılan nlist ~ 4*sqrt(N))."""
+        x = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, EMB_DIM)
+        n = x.shape[0]
+        if n == 0:
+            raise ValueError("Boş galeriden indeks kurulamaz.")
+        if nlist is None:
+            nlist = int(round(4 * np.sqrt(n)))
+        nlist = max(1, min(int(nlist), n))
+
+        rng = np.random.default_rng(seed)
+        n_train = min(n, nlist * _TRAIN_PER_LIST)
+        train = x[rng.choice(n, n_train, replace=False)] if n_train < n else x
+        centroids = _kmeans(train, nlist, iters, rng)
+
+        assign = _nearest_centroid(x, centroids)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=nlist))))
+        return cls(centroids, order, offsets, nprobe=nprobe, fingerprint=fingerprint)
+
+    def updated(self, keep: np.ndarray, new_vectors: np.ndarray,
+                fingerprint: Optional[Tuple[int, int]] = None) -> "IVFIndex":
+        """
+        Galeri.updated için: keep maskesindeki satırlar sırasını koruyarak kalır, yeni vektörler
+        sona eklenip en yakın merkezin listesine girer (merkezler yeniden eğitilmez).
+        """
+        row_list = np.empty(self.size, dtype=np.int32)
+        row_list[self.order] = np.repeat(np.arange(self.nlist, dtype=np.int32), np.diff(self.offsets))
+        assign = row_list[np.asarray(keep, dtype=bool)]
+        new_vectors = np.asarray(new_vectors, dtype=np.float32).reshape(-1, EMB_DIM)
+        if new_vectors.shape[0]:
+            assign = np.concatenate([assign, _nearest_centroid(new_vectors, self.centroids)])
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=self.nlist))))
+        return IVFIndex(self.centroids, order, offsets, nprobe=self.nprobe,
+                        fingerprint=fingerprint if fingerprint is not None else self.fingerprint)
+
+    def search(self, galeri: Galeri, queries, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Galeri.topk ile aynı dönüş: (indices (M,k), distances (M,k)), artan sırada.
+        Dönen indeksler galeri satırlarıdır (çoklu şablonda öğrenciye indirgeme Galeri.topk'da).
+        Taranan listelerde k'dan az aday varsa o sorgu için satırlar üzerinde tam aramaya düşülür.
+        """
+        q = np.ascontiguousarray(np.asarray(queries, dtype=np.float32).reshape(-1, EMB_DIM))
+        m = q.shape[0]
+        idx_out = np.empty((m, k), dtype=np.int64)
+        dist_out = np.empty((m, k), dtype=np.float32)
+        if m == 0:
+            return idx_out, dist_out
+
+        c_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+        cd = c_norms[None, :] - 2.0 * (q @ self.centroids.T)
+        if self.nprobe < self.nlist:
+            probes = np.argpartition(cd, self.nprobe - 1, axis=1)[:, :self.nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(self.nlist), (m, self.nlist))
+        q_norms = np.einsum("ij,ij->i", q, q)
+
+        for i in range(m):
+            cand = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in probes[i]])
+            if cand.size < k:
+                # Satırlar üzerinde tam arama: galeri.topk çoklu şablonda öğrenci döndürür (k satır değil)
+                fi, fd = galeri._smallest(galeri.distances(q[i:i + 1]), k)
+                idx_out[i], dist_out[i] = fi[0], fd[0]
+                continue
+            # Kısa listenin tam yeniden sıralanması
+            d2 = q_norms[i] + galeri.sq_norms[cand] - 2.0 * (galeri.vectors[cand] @ q[i])
+            np.maximum(d2, 0.0, out=d2)
+            if k < cand.size:
+                part = np.argpartition(d2, k - 1)[:k]
+            else:
+                part = np.arange(cand.size)
+            part = part[np.argsort(d2[part], kind="stable")]
+            idx_out[i] = cand[part]
+            dist_out[i] = np.sqrt(d2[part])
+        return idx_out, dist_out
+
+    # ---- Kalıcılık ----
+    def save(self, path: str) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            centroids=self.centroids,
+            order=self.order,
+            offsets=self.offsets,
+            fingerprint=np.asarray(self.fingerprint, dtype=np.int64),
+        )
+        os.replace(tmp, path)  # yarım yazılmış dosya okunmasın
+
+    @classmethod
+    def load(cls, path: str, nprobe: int = ANN_NPROBE) -> Optional["IVFIndex"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(
+                    data["centroids"], data["order"], data["offsets"],
+                    nprobe=nprobe, fingerprint=tuple(data["fingerprint"].tolist()),
+                )
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[ANN] İndeks okunamadı ({path}): {e}")
+            return None
+
+
+def load_or_build(galeri: Galeri, db_path: str, nprobe: int = ANN_NPROBE) -> IVFIndex:
+    """
+    DB'nin yanındaki indeksi yükler; DB değişmişse (satır sayısı / en büyük id) ya da
+    galeri boyutu uyuşmuyorsa yeniden kurup kaydeder.
+    """
+    path = index_path(db_path)
+    fp = gallery_fingerprint(db_path)
+    index = IVFIndex.load(path, nprobe=nprobe)
+    if index is not None and index.fingerprint == fp and index.size == len(galeri):
+        print(f"[ANN] İndeks yüklendi: {index.nlist} liste, nprobe={index.nprobe}")
+        return index
+
+    t0 = time.perf_counter()
+    index = IVFIndex.build(galeri.vectors, nprobe=nprobe, fingerprint=fp)
+    try:
+        index.save(path)
+    except OSError as e:
+        print(f"[ANN] İndeks kaydedilemedi ({path}): {e}")
+    print(f"[ANN] İndeks kuruldu: {len(galeri)} vektör, {index.nlist} liste, "
+          f"{time.perf_counter() - t0:.1f} sn")
+    return index
+
+
+# ---- Komut satırı ----
+def _synthetic_gallery(n: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Gerçek yüz embedding'lerine benzer şekilde kümeli veri: birkaç yüz "grup" merkezi
+    etrafında dağılmış kimlikler (tamamen düzgün gürültü ANN için gerçekçi değil).
+    """
+    groups = rng.normal(0.0, 0.1, size=(256, EMB_DIM)).astype(np.float32)
+    vecs = groups[rng.integers(0, groups.shape[0], size=n)]
+    vecs = vecs + rng.normal(0.0, 0.05, size=(n, EMB_DIM)).astype(np.float32)
+    return vecs
+
+
+def _bench(galeri: Galeri, nprobes: Sequence[int], n_queries: int, nlist: Optional[int],
+           rng: np.random.Generator) -> None:
+    n = len(galeri)
+    # Sorgular: galerideki öğrencilerin gürültülü hali (kamera karesinden gelen encoding gibi)
+    pick = rng.integers(0, n, size=n_queries)
+    queries = galeri.vectors[pick] + rng.normal(0.0, 0.02, size=(n_queries, EMB_DIM)).astype(np.float32)
+
+    t0 = time.perf_counter()
+    index = IVFIndex.build(galeri.vectors, nlist=nlist)
+    build_s = time.perf_counter() - t0
+    print(f"{n} vektör, {index.nlist} liste, kurulum {build_s:.1f} sn, {n_queries} sorgu")
+
+    t0 = time.perf_counter()
+    exact_idx, _ = galeri.topk(queries, k=1, exact=True)
+    exact_ms = (time.perf_counter() - t0) * 1000.0 / n_queries
+    # Çoklu şablonda topk öğrencinin ilk satırını, indeks ise satırı verir: öğrenci üzerinden karşılaştır
+    okul_nos = np.asarray(galeri.okul_nos)
+
+    print(f"{'nprobe':>7} | {'recall@1':>9} | {'ms/sorgu':>9} | {'tam (ms)':>9} | {'hızlanma':>9}")
+    for nprobe in nprobes:
+        index.nprobe = max(1, min(int(nprobe), index.nlist))
+        index.search(galeri, queries[:1], 1)  # ısınma
+        t0 = time.perf_counter()
+        ann_idx, _ = index.search(galeri, queries, 1)
+        ann_ms = (time.perf_counter() - t0) * 1000.0 / n_queries
+        recall = float(np.mean(okul_nos[ann_idx[:, 0]] == okul_nos[exact_idx[:, 0]]))
+        print(f"{index.nprobe:>7} | {recall:>9.4f} | {ann_ms:>9.3f} | {exact_ms:>9.3f} | "
+              f"{exact_ms / ann_ms:>8.1f}x")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Galeri için IVF yaklaşık en yakın komşu indeksi")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="DB'den indeks kur ve yanına kaydet")
+    b.add_argument("--db", required=True)
+    b.add_argument("--nlist", type=int, default=None)
+
+    t = sub.add_parser("bench", help="recall@1 (brute-force'a karşı) ve sorgu gecikmesi")
+    t.add_argument("--db", default=None, help="verilmezse sentetik kümeli galeri")
+    t.add_argument("--n", type=int, default=200_000, help="sentetik galeri boyutu")
+    t.add_argument("--queries", type=int, default=1000)
+    t.add_argument("--nlist", type=int, default=None)
+    t.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    args = ap.parse_args()
+
+    if args.cmd == "build":
+        # load_or_build ile aynı: fingerprint satırlardan önce, galeri prototipli (hybrid ile aynı)
+        fp = gallery_fingerprint(args.db)
+        galeri = Galeri.from_rows(load_student_rows(args.db))
+        t0 = time.perf_counter()
+        index = IVFIndex.build(galeri.vectors, nlist=args.nlist, fingerprint=fp)
+        index.save(index_path(args.db))
+        print(f"{len(galeri)} vektör, {index.nlist} liste, {time.perf_counter() - t0:.1f} sn -> "
+              f"{index_path(args.db)}")
+        return
+
+    rng = np.random.default_rng(0)
+    if args.db:
+        galeri = Galeri.from_rows(load_student_rows(args.db))
+    else:
+        vecs = _synthetic_gallery(args.n, rng)
+        galeri = Galeri(vecs, [f"Ogrenci{i}" for i in range(args.n)], [str(i) for i in range(args.n)])
+    _bench(galeri, args.nprobe, args.queries, args.nlist, rng)
+
+
+if __name__ == "__main__":
+    main()
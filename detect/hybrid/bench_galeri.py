@@ -0,0 +1,120 @@
+# ============================================
+# file: bench_galeri.py
+# Galeri eşleştirme benchmark'ı: eski öğrenci-döngüsü vs. toplu (vektörel) eşleştirme
+# ve tek ortalama vektör vs. öğrenci başına K prototip (çoklu şablon) maliyeti
+# Kullanım: python bench_galeri.py [--faces 30] [--repeat 20] [--prototypes 4]
+# ============================================
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from galeri import Galeri, EMB_DIM
+
+SIZES = (100, 1_000, 10_000, 100_000)
+# Eski döngü 100k'da frame başına saniyeler sürüyor; bu boyuttan sonra ölçülmez
+LEGACY_MAX = 10_000
+
+
+def _synthetic_students(n: int, rng: np.random.Generator):
+    vecs = rng.normal(0.0, 0.1, size=(n, EMB_DIM)).astype(np.float32)
+    return [(f"Ad{i}", f"Soyad{i}", str(100000 + i), vecs[i]) for i in range(n)]
+
+
+def _legacy_match(enc: np.ndarray, students, thr: float):
+    """hybrid.match_face'in önceki (öğrenci başına np.linalg.norm) sürümü."""
+    best_dist = float("inf")
+    best_okul = None
+    for ad, soyad, okul, vec in students:
+        d = float(np.linalg.norm(enc - vec))
+        if d < best_dist:
+            best_dist = d
+            best_okul = okul
+    return best_okul if best_dist < thr else None, best_dist
+
+
+def _prototype_gallery(students, k: int, rng: np.random.Generator) -> Galeri:
+    """Her öğrenciye ortalama çevresinde k prototip: ardışık satırlar, aynı okul_no."""
+    n = len(students)
+    means = np.stack([vec for *_, vec in students])
+    protos = np.repeat(means, k, axis=0) + rng.normal(0.0, 0.03, size=(n * k, EMB_DIM)).astype(np.float32)
+    labels = np.repeat([f"{ad} {soyad}" for ad, soyad, _, _ in students], k)
+    okul_nos = np.repeat([okul for _, _, okul, _ in students], k)
+    return Galeri(protos, labels, okul_nos)
+
+
+def _time_ms(fn, repeat: int) -> float:
+    fn()  # ısınma
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) * 1000.0 / repeat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Galeri eşleştirme frame gecikmesi")
+    ap.add_argument("--faces", type=int, default=30, help="frame başına yüz sayısı")
+    ap.add_argument("--repeat", type=int, default=20)
+    ap.add_argument("--thr", type=float, default=0.55)
+    ap.add_argument("--prototypes", type=int, default=4, help="öğrenci başına prototip (0: ölçme)")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"frame başına {args.faces} yüz, {args.repeat} tekrar ortalaması")
+    print(f"{'öğrenci':>10} | {'eski (ms)':>12} | {'galeri (ms)':>12} | {'hızlanma':>9}")
+
+    for n in SIZES:
+        students = _synthetic_students(n, rng)
+        galeri = Galeri.from_students(students)
+        # Yarısı galerideki öğrencilere yakın, yarısı tanımsız yüzler
+        known = galeri.vectors[rng.integers(0, n, size=args.faces - args.faces // 2)]
+        known = known + rng.normal(0.0, 0.02, size=known.shape).astype(np.float32)
+        unknown = rng.normal(0.0, 0.1, size=(args.faces // 2, EMB_DIM)).astype(np.float32)
+        queries = np.vstack([known, unknown]).astype(np.float32)
+
+        new_ms = _time_ms(lambda: galeri.match_all(queries, thr=args.thr), args.repeat)
+
+        if n <= LEGACY_MAX:
+            legacy_repeat = max(1, args.repeat // 10) if n >= 10_000 else args.repeat
+            old_ms = _time_ms(
+                lambda: [_legacy_match(q, students, args.thr) for q in queries],
+                legacy_repeat,
+            )
+            # Aynı sonucu verdiğini de doğrula
+            old = [_legacy_match(q, students, args.thr)[0] for q in queries]
+            new = [okul for _, _, okul in galeri.match_all(queries, thr=args.thr)]
+            if old != new:
+                print(f"UYARI: {n} öğrencide sonuçlar farklı!")
+            print(f"{n:>10} | {old_ms:>12.2f} | {new_ms:>12.2f} | {old_ms / new_ms:>8.1f}x")
+        else:
+            print(f"{n:>10} | {'-':>12} | {new_ms:>12.2f} | {'-':>9}")
+
+    if args.prototypes > 0:
+        _bench_prototypes(args, rng)
+
+
+def _bench_prototypes(args, rng: np.random.Generator) -> None:
+    k = args.prototypes
+    print(f"\ntek ortalama vs. öğrenci başına {k} prototip (öğrenci başına minimum)")
+    print(f"{'öğrenci':>10} | {'ortalama (ms)':>13} | {f'{k} prototip (ms)':>15} | {'oran':>6}")
+    for n in SIZES:
+        students = _synthetic_students(n, rng)
+        single = Galeri.from_students(students)
+        multi = _prototype_gallery(students, k, rng)
+        known = single.vectors[rng.integers(0, n, size=args.faces)]
+        queries = (known + rng.normal(0.0, 0.02, size=known.shape)).astype(np.float32)
+
+        single_ms = _time_ms(lambda: single.match_all(queries, thr=args.thr), args.repeat)
+        multi_ms = _time_ms(lambda: multi.match_all(queries, thr=args.thr), args.repeat)
+        # Öğrenci minimumu, satır bazında en yakın prototiple aynı öğrenciyi vermeli
+        rows = np.argmin(multi.distances(queries), axis=1)
+        if [str(o) for o in multi.okul_nos[rows]] != [o for _, _, o in multi.match_all(queries, thr=1e9)]:
+            print(f"UYARI: {n} öğrencide prototip eşleşmesi farklı!")
+        print(f"{n:>10} | {single_ms:>13.2f} | {multi_ms:>15.2f} | {multi_ms / single_ms:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
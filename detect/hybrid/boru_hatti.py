@@ -0,0 +1,231 @@
+# ============================================
+# file: boru_hatti.py
+# Kamera -> tespit -> tanıma -> gösterim aşamaları için iş parçacığı yardımcıları
+# ============================================
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from olcum import StageTimings
+
+
+class FramePacket:
+    """Aşamalar arasında taşınan frame + o frame'e ait sonuçlar."""
+
+    __slots__ = ("seq", "ts", "t0", "frame", "boxes", "matches", "current_faces", "cam")
+
+    def __init__(self, seq: int, ts: float, frame: np.ndarray, cam: int = 0):
+        self.seq = seq
+        self.cam = cam            # kamera sırası (CAMERA_SOURCES içindeki konum)
+        self.ts = ts              # yakalama anı (time.time); dikkat takibi bu zamanla beslenir
+        self.t0 = time.perf_counter()  # uçtan uca gecikme ölçümü için monotonik yakalama anı
+        self.frame = frame
+        self.boxes = []           # [(x1, y1, x2, y2), ...]
+        self.matches = []         # [(ad_soyad, mesafe, okul_no), ...] boxes ile aynı sırada
+        self.current_faces = 0
+
+
+class DropOldestQueue:
+    """
+    Sınırlı kuyruk: doluyken put() en eski öğeyi atar, üreticiyi asla bekletmez.
+    Neden: geride kalan frame'leri işlemek yerine her zaman en yenisine yetişmek.
+    """
+
+    def __init__(self, maxsize: int, name: str = ""):
+        if maxsize < 1:
+            raise ValueError("maxsize en az 1 olmalı.")
+        self.name = name
+        self.maxsize = maxsize
+        self._items: deque = deque()
+        self._cond = threading.Condition()
+        self.put_count = 0
+        self.dropped = 0
+        self._closed = False
+
+    def put(self, item: Any) -> None:
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Öğe yoksa timeout kadar bekler; süre dolarsa veya kuyruk kapanırsa None döner."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self) -> None:
+        """Bekleyen tüketicileri uyandırır (kapanışta)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "depth": len(self._items),
+                "maxsize": self.maxsize,
+                "put": self.put_count,
+                "dropped": self.dropped,
+            }
+
+
+class LatestFrameGrabber:
+    """
+    Kameradan sürekli okuyan iş parçacığı; yalnızca en yeni frame'i saklar.
+    Neden: sürücü tamponu dolup eski frame'ler işlenmesin, gecikme birikmesin.
+    Çok kamerada tüm yakalayıcılar aynı koşul değişkenini paylaşır (MultiFrameReader).
+    """
+
+    def __init__(
+        self,
+        cap,
+        name: str = "capture",
+        timings: Optional[StageTimings] = None,
+        cam: int = 0,
+        cond: Optional[threading.Condition] = None,
+    ):
+        self.cap = cap
+        self.name = name
+        self.cam = cam
+        self.timings = timings if timings is not None else StageTimings()
+        self._cond = cond if cond is not None else threading.Condition()
+        self._packet: Optional[FramePacket] = None
+        self._seq = 0
+        self._last_read_seq = 0
+        self.dropped = 0          # hiç okunmadan üzerine yazılan frame sayısı
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> "LatestFrameGrabber":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        capture = self.timings.hist("capture")
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            ok, frame = self.cap.read()
+            capture.record(time.perf_counter() - t0)
+            if not ok or frame is None:
+                time.sleep(0.005)
+                continue
+            ts = time.time()
+            with self._cond:
+                if self._packet is not None and self._packet.seq > self._last_read_seq:
+                    self.dropped += 1
+                self._seq += 1
+                self._packet = FramePacket(self._seq, ts, frame, cam=self.cam)
+                self._cond.notify_all()
+
+    def _pending(self) -> bool:
+        """Kilit tutulurken çağrılır."""
+        return self._packet is not None and self._packet.seq > self._last_read_seq
+
+    def _take(self) -> Optional[FramePacket]:
+        """Kilit tutulurken çağrılır: yeni frame varsa verir, yoksa None."""
+        if not self._pending():
+            return None
+        self._last_read_seq = self._packet.seq
+        return self._packet
+
+    def read(self, timeout: Optional[float] = None) -> Optional[FramePacket]:
+        """Daha önce verilmemiş en yeni frame'i döndürür; yoksa timeout kadar bekler."""
+        with self._cond:
+            if not self._pending():
+                self._cond.wait(timeout)
+            return self._take()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join(timeout=2.0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            pending = self._packet is not None and self._packet.seq > self._last_read_seq
+            return {
+                "depth": 1 if pending else 0,
+                "maxsize": 1,
+                "put": self._seq,
+                "dropped": self.dropped,
+            }
+
+
+class MultiFrameReader:
+    """
+    Birden fazla kameranın yakalayıcısından tek seferde frame kümesi toplar.
+    Herhangi bir kamerada yeni frame olunca uyanır ve o an yeni frame'i olan tüm kameraları
+    alır (yavaş kamera diğerlerini bekletmez). Yakalayıcılar `cond` koşulunu paylaşmalıdır.
+    """
+
+    def __init__(self, grabbers: Sequence[LatestFrameGrabber], cond: threading.Condition):
+        self.grabbers = list(grabbers)
+        self._cond = cond
+
+    def read(self, timeout: Optional[float] = None) -> Optional[List[FramePacket]]:
+        with self._cond:
+            if not any(g._pending() for g in self.grabbers):
+                self._cond.wait(timeout)
+            pkts = [p for p in (g._take() for g in self.grabbers) if p is not None]
+        return pkts or None
+
+
+class StageWorker:
+    """
+    Tek bir aşamayı kendi iş parçacığında çalıştırır:
+    source() -> fn(item) -> sink(result). fn None dönerse sonuç iletilmez.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        source: Callable[[float], Optional[Any]],
+        fn: Callable[[Any], Optional[Any]],
+        sink: Optional[Callable[[Any], None]],
+        stop_event: threading.Event,
+    ):
+        self.name = name
+        self._source = source
+        self._fn = fn
+        self._sink = sink
+        self._stop = stop_event
+        self.error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self) -> "StageWorker":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                item = self._source(0.1)
+                if item is None:
+                    continue
+                out = self._fn(item)
+                if out is not None and self._sink is not None:
+                    self._sink(out)
+        except BaseException as e:  # hata ana iş parçacığına raporlanır, döngü durur
+            self.error = e
+            self._stop.set()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout)
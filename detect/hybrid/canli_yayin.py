@@ -0,0 +1,203 @@
+# ============================================
+# file: canli_yayin.py
+# Canlı durum kanalı (yayıncı/abone): Unix domain soket üzerinden satır başına bir JSON
+# - Yayıncı (hybrid / tanima_servisi) yalnızca değişiklik olduğunda mesaj gönderir;
+#   yeni bağlanan aboneye önce tam anlık görüntü (snapshot) yollanır.
+# - Yavaş abone boru hattını bekletmez: gönderim bloklamaz, tampon dolarsa abone düşürülür.
+# - /tmp/attendance_stats.json dosyası eski okuyucular için yazılmaya devam eder.
+# Mesajlar:
+#   {"type": "snapshot", "lesson": {...}, "stats": {...}, "students": {okul_no: {...}}}
+#   {"type": "stats", "current": .., "max": .., "percent": .., [fps, stages, ...]}
+#   {"type": "student", "okul_no": .., "present": bool, "visible": bool, "attentive": bool}
+#   {"type": "lesson", "state": "started" | "ended", "lesson_start": ts}
+# Bu modül yalnızca standart kütüphane kullanır (gui_app hafif kalsın).
+# ============================================
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+LIVE_SOCKET = os.environ.get("ATTENDANCE_LIVE_SOCKET", "/tmp/attendance_live.sock")
+# Abone başına çekirdek gönderim tamponu; dolarsa abone düşürülür
+_SNDBUF = 256 * 1024
+
+
+def _encode(msg: Dict[str, Any]) -> bytes:
+    return (json.dumps(msg, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class LivePublisher:
+    """Abonelere JSON satırları yayınlar; son durumu yeni abonelere anlık görüntü olarak verir."""
+
+    def __init__(self, path: str = LIVE_SOCKET):
+        self.path = path
+        self._subs: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._lesson: Dict[str, Any] = {"state": "idle"}
+        self._stats: Dict[str, Any] = {}
+        self._students: Dict[str, Dict[str, bool]] = {}
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def start(self) -> "LivePublisher":
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # önceki süreçten kalan soket dosyası
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        os.chmod(self.path, 0o600)
+        sock.listen(8)
+        sock.settimeout(0.5)
+        self._sock = sock
+        self._thread = threading.Thread(target=self._accept_loop, name="canli-yayin", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        with self._lock:
+            for s in self._subs:
+                s.close()
+            self._subs.clear()
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subs)
+
+    def _accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SNDBUF)
+            with self._lock:
+                snapshot = {
+                    "type": "snapshot",
+                    "lesson": dict(self._lesson),
+                    "stats": dict(self._stats),
+                    "students": {k: dict(v) for k, v in self._students.items()},
+                }
+                try:
+                    conn.sendall(_encode(snapshot))   # bloklayan gönderim yalnızca ilk mesajda
+                except OSError:
+                    conn.close()
+                    continue
+                conn.setblocking(False)
+                self._subs.append(conn)
+
+    def _send(self, data: bytes) -> None:
+        """Kilit tutulurken çağrılır."""
+        if not self._subs:
+            return
+        alive = []
+        for s in self._subs:
+            try:
+                # Kısmi gönderim satırı bölerdi: tamponu dolu abone düşürülür
+                if s.send(data) == len(data):
+                    alive.append(s)
+                    continue
+                s.close()
+                self.dropped_subscribers += 1
+            except (BlockingIOError, OSError):
+                # Okumayan / kopan abone: bağlantıyı kapat (yeniden bağlanınca snapshot alır)
+                s.close()
+                self.dropped_subscribers += 1
+        self._subs = alive
+        self.published += 1
+
+    # ---- Yayın API'si ----
+    def lesson(self, state: str, lesson_start: Optional[float] = None) -> None:
+        with self._lock:
+            self._lesson = {"state": state, "lesson_start": lesson_start}
+            if state == "started":
+                self._students.clear()
+                self._stats = {}
+            self._send(_encode({"type": "lesson", **self._lesson}))
+
+    def stats(self, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._stats = payload
+            self._send(_encode({"type": "stats", **payload}))
+
+    def student(self, okul_no: str, present: bool, visible: bool, attentive: bool) -> None:
+        state = {"present": present, "visible": visible, "attentive": attentive}
+        with self._lock:
+            if self._students.get(okul_no) == state:
+                return
+            self._students[okul_no] = state
+            self._send(_encode({"type": "student", "okul_no": okul_no, **state}))
+
+
+def subscribe(
+    on_message: Callable[[Dict[str, Any]], None],
+    stop: threading.Event,
+    path: str = LIVE_SOCKET,
+    on_connection: Optional[Callable[[bool], None]] = None,
+    retry: float = 2.0,
+) -> threading.Thread:
+    """
+    Arka plan iş parçacığında abone olur; her mesaj için on_message çağrılır (bu iş parçacığında).
+    Bağlantı koparsa `retry` saniyede bir yeniden bağlanır; on_connection(bağlı mı) bildirilir.
+    """
+    def run() -> None:
+        while not stop.is_set():
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                    s.connect(path)
+                    s.settimeout(0.5)
+                    if on_connection:
+                        on_connection(True)
+                    buf = b""
+                    while not stop.is_set():
+                        try:
+                            chunk = s.recv(65536)
+                        except socket.timeout:
+                            continue
+                        if not chunk:
+                            break
+                        buf += chunk
+                        *lines, buf = buf.split(b"\n")
+                        for line in lines:
+                            if line:
+                                on_message(json.loads(line.decode("utf-8")))
+            except (OSError, ValueError):
+                pass
+            if on_connection:
+                on_connection(False)
+            stop.wait(retry)
+
+    t = threading.Thread(target=run, name="canli-abone", daemon=True)
+    t.start()
+    return t
+
+
+def _main() -> None:
+    """Hata ayıklama: kanalı dinleyip mesajları yazdırır."""
+    stop = threading.Event()
+    subscribe(lambda m: print(json.dumps(m, ensure_ascii=False)), stop)
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        stop.set()
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,383 @@
+# ============================================
+# file: dedektor.py
+# Değiştirilebilir yüz dedektörü arka ucu
+# - ultralytics: best.pt, PyTorch CPU (önceki davranış; import'u yavaş ve ağır)
+# - onnx: best.pt bir kez ONNX'e çevrilir, ONNX Runtime CPU ile çalışır
+#         (letterbox + NMS burada; ultralytics/PyTorch yüklenmez)
+# - onnx-int8: sınıf görüntüleriyle kalibre edilmiş statik INT8 kuantize model
+# Hepsi frame -> [(x1, y1, x2, y2), ...] döndürür (tanima.yolo_boxes ile aynı biçim);
+# çok kamera için detect_batch birden fazla frame'i tek çıkarım çağrısında işler.
+# Kullanım:
+#   python dedektor.py export --model best.pt [--batch 3] [--int8 --calib sinif_kareleri/]
+#   python dedektor.py bench --model best.pt --source video.mp4 [--backend onnx onnx-int8]
+# ============================================
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import cv2
+
+from tanima import Box, clip_boxes, yolo_boxes
+
+# ultralytics | onnx | onnx-int8
+DETECTOR_BACKEND = os.environ.get("DETECTOR_BACKEND", "ultralytics")
+# INT8 modeli yoksa kalibrasyon için kullanılacak görüntü klasörü / video
+DETECTOR_CALIB = os.environ.get("DETECTOR_CALIB", "")
+# ONNX Runtime iş parçacığı sayısı (0: ORT varsayılanı)
+DETECTOR_THREADS = int(os.environ.get("DETECTOR_THREADS", "0"))
+# ONNX export'un sabit batch boyutu (çok kamerada kamera sayısı; 1: tek frame)
+DETECTOR_BATCH = int(os.environ.get("DETECTOR_BATCH", "1"))
+
+# ultralytics predict varsayılanlarıyla aynı
+CONF_THR = float(os.environ.get("DETECTOR_CONF", "0.25"))
+NMS_IOU = float(os.environ.get("DETECTOR_NMS_IOU", "0.7"))
+MAX_DET = 300
+PAD_VALUE = 114
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class UltralyticsDetector:
+    """best.pt'yi ultralytics (PyTorch, CPU) ile çalıştırır."""
+
+    name = "ultralytics"
+
+    def __init__(self, model_path: str, imgsz: int = 640):
+        from ultralytics import YOLO  # ağır import: yalnızca bu arka uç seçilirse
+
+        self.model = YOLO(model_path)
+        self.imgsz = imgsz
+
+    def __call__(self, frame: np.ndarray) -> List[Box]:
+        res = self.model(frame, device="cpu", verbose=False, imgsz=self.imgsz)[0]
+        h, w = frame.shape[:2]
+        return yolo_boxes(res, w, h)
+
+    def batch(self, frames: Sequence[np.ndarray]) -> List[List[Box]]:
+        """Frame listesi tek predict çağrısında (tek tensör batch'i) işlenir."""
+        results = self.model(list(frames), device="cpu", verbose=False, imgsz=self.imgsz)
+        return [yolo_boxes(res, f.shape[1], f.shape[0]) for res, f in zip(results, frames)]
+
+
+def letterbox(frame: np.ndarray, imgsz: int) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    Oranı koruyarak imgsz x imgsz kareye sığdırır, kenarları 114 ile doldurur (ultralytics ile aynı).
+    Dönüş: (BGR kare, ölçek, (sol dolgu, üst dolgu))
+    """
+    h, w = frame.shape[:2]
+    gain = min(imgsz / h, imgsz / w)
+    nw, nh = int(round(w * gain)), int(round(h * gain))
+    if (nw, nh) != (w, h):
+        frame = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    dw, dh = (imgsz - nw) / 2.0, (imgsz - nh) / 2.0
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    out = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT,
+                             value=(PAD_VALUE, PAD_VALUE, PAD_VALUE))
+    return out, gain, (left, top)
+
+
+def preprocess(frame: np.ndarray, imgsz: int) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """BGR frame -> (1,3,imgsz,imgsz) float32 RGB [0,1] tensör."""
+    img, gain, pad = letterbox(frame, imgsz)
+    blob = cv2.dnn.blobFromImage(img, scalefactor=1.0 / 255.0, swapRB=True)
+    return blob.astype(np.float32, copy=False), gain, pad
+
+
+def postprocess(
+    pred: np.ndarray,
+    gain: float,
+    pad: Tuple[float, float],
+    w: int,
+    h: int,
+    conf_thr: float = CONF_THR,
+    iou_thr: float = NMS_IOU,
+) -> List[Box]:
+    """
+    YOLOv8 çıktısı (1, 4+nc, A) -> frame koordinatında kutular.
+    Sınıf bazlı NMS (nc=1 için sınıfsız ile aynı), güvene göre azalan sırada.
+    """
+    p = pred[0]
+    if p.shape[0] < p.shape[1]:
+        p = p.T                               # (A, 4+nc)
+    scores_all = p[:, 4:]
+    cls = scores_all.argmax(axis=1)
+    scores = scores_all[np.arange(p.shape[0]), cls]
+    keep = scores > conf_thr
+    if not keep.any():
+        return []
+    p, cls, scores = p[keep], cls[keep], scores[keep]
+
+    cx, cy, bw, bh = p[:, 0], p[:, 1], p[:, 2], p[:, 3]
+    xyxy = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+
+    # Sınıflar birbirini bastırmasın diye kutular sınıfa göre kaydırılır
+    offs = xyxy + (cls[:, None] * 7680.0)
+    rects = np.concatenate([offs[:, :2], offs[:, 2:] - offs[:, :2]], axis=1)
+    idx = cv2.dnn.NMSBoxes(rects.tolist(), scores.tolist(), conf_thr, iou_thr, top_k=MAX_DET)
+    idx = np.asarray(idx, dtype=np.int64).reshape(-1)
+    if idx.size == 0:
+        return []
+    xyxy = xyxy[idx]
+
+    xyxy[:, [0, 2]] -= pad[0]
+    xyxy[:, [1, 3]] -= pad[1]
+    xyxy /= gain
+    return clip_boxes(xyxy, w, h)
+
+
+class OnnxDetector:
+    """ONNX Runtime CPU sağlayıcısıyla YOLOv8 yüz dedektörü."""
+
+    def __init__(self, onnx_path: str, threads: int = DETECTOR_THREADS, name: str = "onnx"):
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(onnx_path, sess_options=opts, providers=["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        self.input_name = inp.name
+        # Statik export: (B, 3, imgsz, imgsz); batch ekseni dinamikse 0
+        self.imgsz = int(inp.shape[2]) if isinstance(inp.shape[2], int) else 640
+        self.batch_size = int(inp.shape[0]) if isinstance(inp.shape[0], int) else 0
+        self.name = name
+
+    def _run(self, blobs: List[np.ndarray]) -> np.ndarray:
+        blob = np.concatenate(blobs)
+        if self.batch_size > blob.shape[0]:
+            # Sabit batch'li model: eksik yuvalar boş frame (çıktısı kullanılmaz)
+            pad = np.zeros((self.batch_size - blob.shape[0],) + blob.shape[1:], dtype=blob.dtype)
+            blob = np.concatenate([blob, pad])
+        return self.session.run(None, {self.input_name: blob})[0]
+
+    def __call__(self, frame: np.ndarray) -> List[Box]:
+        return self.batch([frame])[0]
+
+    def batch(self, frames: Sequence[np.ndarray]) -> List[List[Box]]:
+        """
+        Frame'ler modelin batch boyutunca gruplanıp tek session.run ile işlenir.
+        batch_size == 1 olan (varsayılan) modelde frame başına bir çağrı yapılır.
+        """
+        step = self.batch_size or max(1, len(frames))
+        out: List[List[Box]] = []
+        for s in range(0, len(frames), step):
+            chunk = frames[s:s + step]
+            preps = [preprocess(f, self.imgsz) for f in chunk]
+            pred = self._run([blob for blob, _, _ in preps])
+            for j, (f, (_, gain, pad)) in enumerate(zip(chunk, preps)):
+                out.append(postprocess(pred[j:j + 1], gain, pad, f.shape[1], f.shape[0]))
+        return out
+
+
+def detect_batch(detector, frames: Sequence[np.ndarray]) -> List[List[Box]]:
+    """Birden fazla frame: dedektörün batch yolu varsa tek çağrı, yoksa sırayla."""
+    batch = getattr(detector, "batch", None)
+    if batch is not None and len(frames) > 1:
+        return batch(frames)
+    return [detector(f) for f in frames]
+
+
+# ---- Export / kuantizasyon ----
+def onnx_path_for(model_path: str, int8: bool = False) -> str:
+    base = os.path.splitext(model_path)[0]
+    return base + (".int8.onnx" if int8 else ".onnx")
+
+
+def export_onnx(model_path: str, imgsz: int = 640, batch: int = DETECTOR_BATCH) -> str:
+    """best.pt -> best.onnx (statik giriş boyutu ve batch, NMS'siz ham çıktı)."""
+    from ultralytics import YOLO
+
+    out = YOLO(model_path).export(format="onnx", imgsz=imgsz, batch=batch, dynamic=False, simplify=True)
+    target = onnx_path_for(model_path)
+    if os.path.abspath(out) != os.path.abspath(target):
+        os.replace(out, target)
+    return target
+
+
+def iter_sample_frames(source: str, limit: int) -> Iterator[np.ndarray]:
+    """Görüntü klasöründen ya da videodan en fazla `limit` BGR frame (eşit aralıklı)."""
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(IMAGE_EXTS))
+        step = max(1, len(names) // max(1, limit))
+        for name in names[::step][:limit]:
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is not None:
+                yield frame
+        return
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Video açılamadı: {source}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    step = max(1, total // max(1, limit)) if total > 0 else 1
+    i = n = 0
+    try:
+        while n < limit:
+            ok, frame = cap.read()
+            if not ok or frame is None:
+                break
+            if i % step == 0:
+                yield frame
+                n += 1
+            i += 1
+    finally:
+        cap.release()
+
+
+def quantize_int8(onnx_path: str, calib_source: str, out_path: Optional[str] = None, samples: int = 100) -> str:
+    """Sınıf görüntüleriyle kalibre edilen statik INT8 (QDQ) model üretir."""
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    import onnxruntime as ort
+
+    out_path = out_path or onnx_path.replace(".onnx", ".int8.onnx")
+    sess = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    inp = sess.get_inputs()[0]
+    imgsz = int(inp.shape[2])
+    blobs = [preprocess(f, imgsz)[0] for f in iter_sample_frames(calib_source, samples)]
+    if not blobs:
+        raise RuntimeError(f"Kalibrasyon için frame bulunamadı: {calib_source}")
+    # Sabit batch'li modelde kalibrasyon örnekleri de batch boyutunda gruplanır
+    bs = int(inp.shape[0]) if isinstance(inp.shape[0], int) else 1
+    if bs > 1:
+        blobs = [np.concatenate(blobs[i:i + bs]) for i in range(0, len(blobs) - bs + 1, bs)]
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self._it = iter(blobs)
+
+        def get_next(self):
+            blob = next(self._it, None)
+            return None if blob is None else {inp.name: blob}
+
+    prep = out_path + ".prep.onnx"
+    quant_pre_process(onnx_path, prep)
+    try:
+        quantize_static(
+            prep, out_path, _Reader(),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+            calibrate_method=CalibrationMethod.MinMax,
+        )
+    finally:
+        if os.path.exists(prep):
+            os.remove(prep)
+    print(f"INT8 model: {out_path} ({len(blobs)} kalibrasyon frame'i)")
+    return out_path
+
+
+def make_detector(backend: str = DETECTOR_BACKEND, model_path: str = "", imgsz: int = 640,
+                  calib_source: str = DETECTOR_CALIB):
+    """Arka uca göre dedektör; ONNX dosyaları yoksa bir kez üretilir (model_path yanına)."""
+    if backend == "ultralytics":
+        return UltralyticsDetector(model_path, imgsz)
+    if backend not in ("onnx", "onnx-int8"):
+        raise ValueError(f"Bilinmeyen dedektör arka ucu: {backend}")
+
+    fp32 = model_path if model_path.endswith(".onnx") else onnx_path_for(model_path)
+    if not os.path.exists(fp32):
+        print(f"[DEDEKTÖR] ONNX export: {model_path} -> {fp32}")
+        fp32 = export_onnx(model_path, imgsz)
+    if backend == "onnx":
+        return OnnxDetector(fp32, name="onnx")
+
+    int8 = fp32.replace(".onnx", ".int8.onnx")
+    if not os.path.exists(int8):
+        if not calib_source:
+            raise RuntimeError("INT8 model yok; DETECTOR_CALIB ile kalibrasyon görüntüleri verin.")
+        quantize_int8(fp32, calib_source, int8)
+    return OnnxDetector(int8, name="onnx-int8")
+
+
+# ---- Benchmark ----
+def box_agreement(ref: Sequence[Box], other: Sequence[Box], thr: float = 0.5) -> Tuple[int, int, List[float]]:
+    """Açgözlü IoU eşleştirme: (eşleşen, referans kutu sayısı, eşleşenlerin IoU'ları)."""
+    from takip import iou_matrix
+
+    ious = iou_matrix(ref, other)
+    used_r, used_o, matched = set(), set(), []
+    if ious.size:
+        for flat in np.argsort(-ious, axis=None):
+            r, o = np.unravel_index(flat, ious.shape)
+            if ious[r, o] < thr:
+                break
+            if r not in used_r and o not in used_o:
+                used_r.add(r)
+                used_o.add(o)
+                matched.append(float(ious[r, o]))
+    return len(matched), len(ref), matched
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Yüz dedektörü arka uçları: export ve benchmark")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    e = sub.add_parser("export", help="best.pt -> ONNX (ve isteğe bağlı INT8)")
+    e.add_argument("--model", required=True)
+    e.add_argument("--imgsz", type=int, default=640)
+    e.add_argument("--batch", type=int, default=DETECTOR_BATCH, help="sabit batch (kamera sayısı)")
+    e.add_argument("--int8", action="store_true")
+    e.add_argument("--calib", default=DETECTOR_CALIB, help="kalibrasyon görüntü klasörü / video")
+    e.add_argument("--samples", type=int, default=100)
+
+    b = sub.add_parser("bench", help="FPS ve ultralytics ile kutu uyumu")
+    b.add_argument("--model", required=True, help="best.pt")
+    b.add_argument("--source", required=True, help="video ya da görüntü klasörü")
+    b.add_argument("--frames", type=int, default=200)
+    b.add_argument("--imgsz", type=int, default=640)
+    b.add_argument("--backend", nargs="+", default=["onnx"])
+    b.add_argument("--calib", default=DETECTOR_CALIB)
+    args = ap.parse_args()
+
+    if args.cmd == "export":
+        path = export_onnx(args.model, args.imgsz, args.batch)
+        print(f"ONNX model: {path}")
+        if args.int8:
+            if not args.calib:
+                ap.error("--int8 için --calib gerekli")
+            quantize_int8(path, args.calib, samples=args.samples)
+        return
+
+    frames = list(iter_sample_frames(args.source, args.frames))
+    if not frames:
+        ap.error(f"frame okunamadı: {args.source}")
+
+    def run(det) -> Tuple[float, List[List[Box]]]:
+        det(frames[0])  # ısınma
+        t0 = time.perf_counter()
+        out = [det(f) for f in frames]
+        return len(frames) / (time.perf_counter() - t0), out
+
+    ref_fps, ref_boxes = run(UltralyticsDetector(args.model, args.imgsz))
+    print(f"{len(frames)} frame, imgsz={args.imgsz}")
+    print(f"{'arka uç':<12} | {'FPS':>7} | {'hızlanma':>9} | {'kutu recall':>11} | {'ort IoU':>8} | {'fazla':>6}")
+    print(f"{'ultralytics':<12} | {ref_fps:>7.2f} | {'1.0x':>9} | {'-':>11} | {'-':>8} | {'-':>6}")
+    for backend in args.backend:
+        det = make_detector(backend, args.model, args.imgsz, calib_source=args.calib)
+        fps, boxes = run(det)
+        matched = total = extra = 0
+        ious: List[float] = []
+        for ref, other in zip(ref_boxes, boxes):
+            m, n, mi = box_agreement(ref, other)
+            matched += m
+            total += n
+            extra += len(other) - m
+            ious.extend(mi)
+        recall = matched / total if total else 1.0
+        mean_iou = float(np.mean(ious)) if ious else 0.0
+        print(f"{backend:<12} | {fps:>7.2f} | {fps / ref_fps:>8.1f}x | {recall:>11.3f} | "
+              f"{mean_iou:>8.3f} | {extra:>6d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# ============================================
+# file: dikkat_dogrulama.py
+# Olay güdümlü dikkat motorunun eski per-frame hesapla aynı sayıları verdiğini
+# rastgele üretilen ders senaryolarıyla (özellik tabanlı) doğrular.
+# Kullanım: python dikkat_dogrulama.py [--cases 2000] [--seed 0]
+# ============================================
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import sqlite3
+import tempfile
+from typing import Dict, List, Set, Tuple
+
+import hesaplamalar2 as h2
+import zaman_cizelgesi
+
+
+# ---- Referans: önceki per-frame tarama sürümü (değiştirmeyin) ----
+class LegacyTracker:
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.tracking: Dict[str, Dict[str, float | str]] = {}
+
+    def _ensure(self, okul_no: str, ts: float) -> None:
+        if okul_no in self.tracking:
+            return
+        self.tracking[okul_no] = {
+            "first_seen": ts,
+            "state": "visible",
+            "state_since": ts,
+            "visible_total": 0.0,
+            "grace_total": 0.0,
+            "grace_in_streak": 0.0,
+        }
+
+    def mark_seen(self, okul_no: str, ts: float) -> None:
+        self._ensure(okul_no, ts)
+
+    def update_missing(self, recognized_ids: Set[str], ts: float) -> None:
+        timeout = self.timeout
+        for okul_no, st in list(self.tracking.items()):
+            state = st["state"]
+            state_since = float(st["state_since"])
+            if okul_no in recognized_ids:
+                if state == "visible":
+                    dt = ts - state_since
+                    if dt > 0:
+                        st["visible_total"] = float(st["visible_total"]) + dt
+                        st["state_since"] = ts
+                else:
+                    st["state"] = "visible"
+                    st["state_since"] = ts
+                    st["grace_in_streak"] = 0.0
+            else:
+                if state == "visible":
+                    dt = ts - state_since
+                    if dt > 0:
+                        st["visible_total"] = float(st["visible_total"]) + dt
+                    st["state"] = "invisible"
+                    st["state_since"] = ts
+                    st["grace_in_streak"] = 0.0
+                else:
+                    dt = ts - state_since
+                    if dt > 0:
+                        used = float(st["grace_in_streak"])
+                        can_add = max(0.0, timeout - used)
+                        add_grace = min(dt, can_add)
+                        if add_grace > 0:
+                            st["grace_total"] = float(st["grace_total"]) + add_grace
+                        st["grace_in_streak"] = used + dt
+                        st["state_since"] = ts
+        for okul_no in recognized_ids:
+            if okul_no not in self.tracking:
+                self._ensure(okul_no, ts)
+
+    def final_stats(self, okul_no: str, at_time: float) -> Tuple[float, float, float]:
+        st = self.tracking[okul_no]
+        visible_total = float(st["visible_total"])
+        grace_total = float(st["grace_total"])
+        dt = at_time - float(st["state_since"])
+        if st["state"] == "visible":
+            if dt > 0:
+                visible_total += dt
+        elif dt > 0:
+            used = float(st["grace_in_streak"])
+            add_grace = min(dt, max(0.0, self.timeout - used))
+            if add_grace > 0:
+                grace_total += add_grace
+        return visible_total, grace_total, max(0.0, at_time - float(st["first_seen"]))
+
+    def row(self, okul_no: str, at_time: float) -> Tuple[int, float]:
+        vis, grace, elapsed = self.final_stats(okul_no, at_time)
+        attention_seconds = vis + grace
+        ratio_0_1 = attention_seconds / elapsed if elapsed > 0.0 else 0.0
+        return int(max(0.0, min(100.0, ratio_0_1 * 100.0))), attention_seconds
+
+
+# ---- Senaryo üretimi ----
+def _random_lesson(rng: random.Random) -> Tuple[List[Tuple[float, Set[str]]], float]:
+    """(zaman, tanınanlar) frame listesi + ders bitiş anı."""
+    students = [str(1000 + i) for i in range(rng.randint(1, 8))]
+    p_stay = rng.uniform(0.5, 0.99)
+    visible = {s: rng.random() < 0.5 for s in students}
+    ts = rng.uniform(0.0, 1e6)
+    frames = []
+    for _ in range(rng.randint(1, 400)):
+        r = rng.random()
+        if r < 0.05:
+            ts += rng.uniform(20.0, 90.0)      # uzun boşluk (tolerans sınırını aşsın)
+        elif r < 0.08:
+            pass                               # aynı zaman damgası (dt == 0)
+        else:
+            ts += rng.uniform(0.01, 2.0)
+        for s in students:
+            if rng.random() > p_stay:
+                visible[s] = not visible[s]
+        frames.append((ts, {s for s in students if visible[s]}))
+    return frames, ts + rng.choice([0.0, rng.uniform(0.0, 120.0)])
+
+
+def _near_int(x: float) -> bool:
+    return abs(x - round(x)) < 1e-6
+
+
+def check_case(rng: random.Random) -> None:
+    frames, end = _random_lesson(rng)
+    timeout = rng.choice([h2.MISSING_TOLERANCE_SECONDS, rng.uniform(0.5, 60.0)])
+    legacy = LegacyTracker(timeout)
+    h2.reset_tracking()
+
+    for ts, ids in frames:
+        for s in sorted(ids):
+            legacy.mark_seen(s, ts)
+            h2.mark_seen(s, ts)
+        legacy.update_missing(ids, ts)
+        h2.update_missing(ids, ts, timeout=timeout)
+
+    assert set(legacy.tracking) == set(h2.tracking), "takip edilen öğrenciler farklı"
+    for s in legacy.tracking:
+        old = legacy.final_stats(s, end)
+        new = h2._compute_final_stats_for(s, end, timeout=timeout)
+        for a, b in zip(old, new):
+            assert math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6), (s, old, new)
+
+        # Ders sonunda yazılan zaman çizelgesi (RLE) aynı dikkat süresini vermeli; aynı zaman
+        # damgalı frame'lerde sıfır uzunluklu görünür dilimler de çizelgede yer alır
+        st = h2.tracking[s]
+        total, _ = zaman_cizelgesi.attention_from_intervals(
+            h2.engine.timeline(s, end), st.first_seen, end, timeout=timeout, visible_at_end=st.visible
+        )
+        assert math.isclose(total, new[0] + new[1], rel_tol=1e-9, abs_tol=1e-6), (s, total, new)
+
+    # write_attentions_to_db yolu (sabit tolerans ile yazılır)
+    if timeout == h2.MISSING_TOLERANCE_SECONDS:
+        fd, db = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        try:
+            con = sqlite3.connect(db)
+            con.execute("CREATE TABLE ogrenciler (okul_numarasi TEXT, dikkat_orani REAL, dikkat_sure REAL)")
+            con.executemany("INSERT INTO ogrenciler VALUES (?, 0, 0)", [(s,) for s in legacy.tracking])
+            con.commit()
+            h2.write_attentions_to_db(frames[0][0], db, now=end)
+            for s, pct, sure in con.execute("SELECT okul_numarasi, dikkat_orani, dikkat_sure FROM ogrenciler"):
+                exp_pct, exp_sure = legacy.row(s, end)
+                vis, grace, elapsed = legacy.final_stats(s, end)
+                boundary = elapsed > 0 and _near_int((vis + grace) / elapsed * 100.0)
+                assert boundary or int(pct) == exp_pct, (s, pct, exp_pct)
+                assert math.isclose(sure, exp_sure, rel_tol=1e-9, abs_tol=1e-6), (s, sure, exp_sure)
+            con.close()
+        finally:
+            # Havuzdaki bağlantılar kapanınca WAL dosyaları da temizlenir
+            h2.oys_veri.close_pool(db)
+            for path in (db, db + "-wal", db + "-shm"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Dikkat motoru eşdeğerlik kontrolü")
+    ap.add_argument("--cases", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    for i in range(args.cases):
+        case_seed = rng.randrange(2**32)
+        try:
+            check_case(random.Random(case_seed))
+        except AssertionError as e:
+            raise SystemExit(f"FARKLI: senaryo {i} (seed={case_seed}): {e}")
+    print(f"{args.cases} senaryo: eski ve yeni hesap aynı.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# ============================================
+# file: dikkat_motoru.py
+# Olay güdümlü dikkat takibi: yalnızca görünür/görünmez geçişlerinde iş yapılır.
+# 30 sn tolerans bitişleri bir min-heap'te bekler (her frame tüm öğrenciler taranmaz).
+# ============================================
+
+from __future__ import annotations
+
+import heapq
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+MISSING_TOLERANCE_SECONDS = 30.0
+
+
+class StudentAttention:
+    """
+    Öğrenci başına sabit alanlı kayıt.
+    since: açık dilimin (görünür ya da görünmez) başladığı an.
+    visible_total / grace_total: kapanmış dilimlerin toplamları.
+    runs: kapanmış görünür dilimler (RLE zaman çizelgesi), düz üçlüler
+          [önceki boşluğun son görünmez frame'i, başlangıç, bitiş, ...]
+    run_gap_end: açık görünür dilimin "önceki boşluğun son görünmez frame'i" değeri
+    """
+
+    __slots__ = (
+        "first_seen", "visible", "since", "visible_total", "grace_total",
+        "expired", "runs", "run_gap_end",
+    )
+
+    def __init__(self, ts: float):
+        self.first_seen = ts
+        self.visible = True
+        self.since = ts
+        self.visible_total = 0.0
+        self.grace_total = 0.0
+        self.expired = False   # görünmez ve tolerans süresi dolmuş
+        self.runs = array("d")
+        self.run_gap_end = ts
+
+
+class AttentionEngine:
+    """
+    hesaplamalar2'deki kuralların olay güdümlü karşılığı (aynı sayıları üretir):
+    - Görünür dilim, öğrencinin görünmediği ilk frame'in zamanında kapanır.
+    - Görünmez dilimin toleransı = min(son görünmez frame - dilim başı, timeout);
+      geri döndüğü frame ile önceki frame arasındaki boşluk eklenmez.
+    Frame başına iş: tanınanlar ile görünür küme arasındaki fark + süresi dolan heap kayıtları.
+    """
+
+    def __init__(self, timeout: float = MISSING_TOLERANCE_SECONDS):
+        self.timeout = timeout
+        self.records: Dict[str, StudentAttention] = {}
+        self._visible: Set[str] = set()
+        # (tolerans bitişi, okul_no, görünmez dilim başı)
+        self._expiry: List[Tuple[float, str, float]] = []
+        self._last_ts: Optional[float] = None
+        # Son update'te toleransı biten (dikkatsiz sayılmaya başlayan) öğrenciler
+        self.last_expired: List[str] = []
+
+    def reset(self) -> None:
+        self.records.clear()
+        self._visible.clear()
+        self._expiry.clear()
+        self._last_ts = None
+        self.last_expired = []
+
+    def seen(self, okul_no: str, ts: float) -> None:
+        """Öğrenciyi ilk kez görüyorsak takibe alır (görünür, ts anından itibaren)."""
+        if okul_no not in self.records:
+            self.records[okul_no] = StudentAttention(ts)
+            self._visible.add(okul_no)
+
+    def update(self, recognized_ids: Iterable[str], ts: float) -> Tuple[Set[str], Set[str]]:
+        """
+        Bir frame'i işler. Dönüş: (bu frame'de görünür olanlar, görünmez olanlar).
+        """
+        recognized = recognized_ids if isinstance(recognized_ids, (set, frozenset)) else set(recognized_ids)
+        prev = ts if self._last_ts is None else self._last_ts
+
+        appeared = recognized - self._visible
+        disappeared = self._visible - recognized
+
+        for okul_no in disappeared:
+            st = self.records[okul_no]
+            dt = ts - st.since
+            if dt > 0:
+                st.visible_total += dt
+            # Sıfır uzunluklu dilim (aynı zaman damgalı frame'ler) de yazılır: çizelgeden yeniden
+            # hesapta önceki boşluğun toleransı burada biter, sonraki boşluk buradan başlar
+            st.runs.extend((st.run_gap_end, st.since, ts))
+            st.visible = False
+            st.since = ts
+            heapq.heappush(self._expiry, (ts + self.timeout, okul_no, ts))
+
+        for okul_no in appeared:
+            st = self.records.get(okul_no)
+            if st is None:
+                self.records[okul_no] = StudentAttention(ts)
+                continue
+            # Kapanan görünmez dilim: son görünmez frame'e kadar, en fazla timeout
+            used = prev - st.since
+            if used > 0:
+                st.grace_total += min(used, self.timeout)
+            st.visible = True
+            st.since = ts
+            st.run_gap_end = prev
+            st.expired = False
+
+        self._visible -= disappeared
+        self._visible |= appeared
+
+        # Süresi dolan toleranslar (yalnızca hâlâ aynı görünmez dilimdeyse)
+        heap = self._expiry
+        expired: List[str] = []
+        while heap and heap[0][0] <= ts:
+            _, okul_no, run_start = heapq.heappop(heap)
+            st = self.records.get(okul_no)
+            if st is not None and not st.visible and st.since == run_start:
+                st.expired = True
+                expired.append(okul_no)
+        self.last_expired = expired
+
+        self._last_ts = ts
+        return appeared, disappeared
+
+    def final_stats(self, okul_no: str, at_time: float, timeout: Optional[float] = None) -> Tuple[float, float, float]:
+        """
+        at_time anındaki (görünür, tolerans, ilk görülmeden beri geçen) süreler.
+        Açık dilim, eski per-frame hesabıyla aynı biçimde kapatılır.
+        """
+        t_out = self.timeout if timeout is None else timeout
+        st = self.records[okul_no]
+        visible_total = st.visible_total
+        grace_total = st.grace_total
+
+        if st.visible:
+            dt = at_time - st.since
+            if dt > 0:
+                visible_total += dt
+        else:
+            last = self._last_ts if self._last_ts is not None else st.since
+            used = max(0.0, last - st.since)
+            grace_total += min(used, t_out)
+            dt = at_time - max(last, st.since)
+            if dt > 0:
+                add_grace = min(dt, max(0.0, t_out - used))
+                if add_grace > 0:
+                    grace_total += add_grace
+
+        elapsed = max(0.0, at_time - st.first_seen)
+        return visible_total, grace_total, elapsed
+
+    def timeline(self, okul_no: str, at_time: float) -> List[Tuple[float, float, float]]:
+        """
+        Görünür dilimler [(önceki boşluğun son görünmez frame'i, başlangıç, bitiş), ...];
+        açık dilim at_time'da kapatılır.
+        """
+        st = self.records[okul_no]
+        r = st.runs
+        out = [(r[i], r[i + 1], r[i + 2]) for i in range(0, len(r), 3)]
+        if st.visible:
+            out.append((st.run_gap_end, st.since, max(at_time, st.since)))
+        return out
+
+    def is_attentive(self, okul_no: str) -> bool:
+        """Görünür ya da tolerans içinde mi?"""
+        st = self.records.get(okul_no)
+        return st is not None and (st.visible or not st.expired)
+
+    def visible_ids(self) -> Set[str]:
+        return set(self._visible)
@@ -0,0 +1,366 @@
+# ============================================
+# file: galeri.py
+# Öğrenci yüz galerisi: tüm embedding'ler tek (N,128) float32 matriste
+# Çoklu şablon: öğrencinin yuz_sablonlari satırları en fazla GALLERY_PROTOTYPES prototipe
+# sıkıştırılır; prototipler ardışık satırlardır, eşleştirmede öğrenci başına minimum alınır.
+# ============================================
+
+from __future__ import annotations
+
+import os
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import oys_veri
+
+EMB_DIM = 128
+UNKNOWN_NAME = "Bilinmiyor"
+# Öğrenci başına en fazla prototip sayısı; 0: şablon tablosu okunmaz (yalnızca ortalama vektör)
+GALLERY_PROTOTYPES = int(os.environ.get("GALLERY_PROTOTYPES", "4"))
+_PROTO_ITERS = 10
+
+# (ad_soyad, mesafe, okul_no) -> match_face ile aynı dönüş biçimi
+MatchResult = Tuple[str, float, Optional[str]]
+
+
+# ---- DB yardımcıları (mevcut yapıyla uyumlu) ----
+def _to_arr(vec) -> Optional[np.ndarray]:
+    if isinstance(vec, np.ndarray):
+        v = vec.astype(np.float32, copy=False).reshape(-1)
+        return v if v.size == 128 else None
+    if isinstance(vec, (list, tuple)):
+        v = np.asarray(vec, dtype=np.float32).reshape(-1)
+        return v if v.size == 128 else None
+    if isinstance(vec, (bytes, bytearray, memoryview)):
+        b = bytes(vec) if not isinstance(vec, (bytes, bytearray)) else vec
+        if len(b) % 4 == 0:
+            arr32 = np.frombuffer(b, dtype=np.float32)
+            if arr32.size == 128:
+                return arr32.astype(np.float32, copy=False)
+        if len(b) % 8 == 0:
+            arr64 = np.frombuffer(b, dtype=np.float64)
+            if arr64.size == 128:
+                return arr64.astype(np.float32)
+        try:
+            s = b.decode("utf-8", errors="ignore")
+            arr = np.fromstring(s, sep=",", dtype=np.float32)
+            if arr.size == 128:
+                return arr
+        except Exception:
+            return None
+    if isinstance(vec, str):
+        s = vec.strip().replace("[", "").replace("]", "")
+        arr = np.fromstring(s, sep=",", dtype=np.float32)
+        return arr if arr.size == 128 else None
+    return None
+
+
+def compress_templates(templates, k: int = GALLERY_PROTOTYPES) -> np.ndarray:
+    """
+    Bir öğrencinin şablonlarını en fazla k prototipe indirir (küçük k-means).
+    Başlangıç merkezleri en uzak nokta seçimiyle (deterministik), ardından birkaç Lloyd adımı.
+    """
+    x = np.asarray(templates, dtype=np.float32).reshape(-1, EMB_DIM)
+    if k <= 0 or x.shape[0] <= k:
+        return x
+    d = np.linalg.norm(x - x.mean(axis=0), axis=1)
+    picks = [int(np.argmin(d))]
+    d = np.linalg.norm(x - x[picks[0]], axis=1)
+    for _ in range(1, k):
+        picks.append(int(np.argmax(d)))
+        d = np.minimum(d, np.linalg.norm(x - x[picks[-1]], axis=1))
+    centers = x[picks].copy()
+    for _ in range(_PROTO_ITERS):
+        assign = np.argmin(((x[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+        for j in range(k):
+            members = x[assign == j]
+            if len(members):
+                centers[j] = members.mean(axis=0)
+    return centers
+
+
+def load_templates(conn: sqlite3.Connection, okul_nos: Optional[Sequence[str]] = None) -> Dict[str, List[np.ndarray]]:
+    """yuz_sablonlari tablosundan okul_no -> şablon listesi (tablo yoksa boş sözlük)."""
+    sql = "SELECT okul_numarasi, vektor FROM yuz_sablonlari"
+    params: Sequence[str] = ()
+    if okul_nos is not None:
+        if not okul_nos:
+            return {}
+        sql += f" WHERE okul_numarasi IN ({','.join('?' * len(okul_nos))})"
+        params = list(okul_nos)
+    try:
+        rows = conn.execute(sql + " ORDER BY okul_numarasi, id", params).fetchall()
+    except sqlite3.OperationalError:
+        return {}  # eski veritabanı: şablon tablosu henüz yok
+    out: Dict[str, List[np.ndarray]] = {}
+    for okul, vec in rows:
+        v = _to_arr(vec)
+        if v is not None and np.isfinite(v).all():
+            out.setdefault(okul, []).append(v)
+    return out
+
+
+def with_prototypes(
+    conn: sqlite3.Connection,
+    rows: List[Tuple[int, str, str, str, np.ndarray]],
+    k: int = GALLERY_PROTOTYPES,
+) -> List[Tuple[int, str, str, str, np.ndarray]]:
+    """
+    Şablonu olan öğrencinin satırını prototipleriyle değiştirir (aynı id/etiket, ardışık satırlar).
+    Şablonu olmayan öğrenci tek ortalama vektörüyle kalır.
+    """
+    if k <= 0 or not rows:
+        return rows
+    templates = load_templates(conn, [okul for _, _, _, okul, _ in rows] if len(rows) < 500 else None)
+    if not templates:
+        return rows
+    out = []
+    for row_id, ad, soyad, okul, vec in rows:
+        tpl = templates.get(okul)
+        if not tpl:
+            out.append((row_id, ad, soyad, okul, vec))
+            continue
+        for proto in compress_templates(tpl, k):
+            out.append((row_id, ad, soyad, okul, proto))
+    return out
+
+
+def load_student_rows(db_path: str, prototypes: int = GALLERY_PROTOTYPES) -> List[Tuple[int, str, str, str, np.ndarray]]:
+    """
+    (id, ad, soyad, okul_no, vektör) satırları; id sırasıyla (galeri sırası kararlı olsun).
+    prototypes > 0 ise şablonu olan öğrenciler birden fazla (prototip) satırla gelir.
+    """
+    with oys_veri.connection(db_path) as conn:
+        rows = conn.execute("SELECT id, ad, soyad, okul_numarasi, yuz_vektoru FROM ogrenciler ORDER BY id").fetchall()
+
+        out = []
+        for row_id, ad, soyad, okul, vec in rows:
+            v = _to_arr(vec)
+            if v is None or not np.isfinite(v).all():
+                continue
+            out.append((int(row_id), ad, soyad, okul, v.astype(np.float32, copy=False)))
+        return with_prototypes(conn, out, prototypes)
+
+
+def load_students(db_path: str) -> List[Tuple[str, str, str, np.ndarray]]:
+    """veritabani.ogrencileri_cek ile aynı satırlar (id sırasıyla)."""
+    students = [(ad, soyad, okul, v) for _, ad, soyad, okul, v in load_student_rows(db_path, prototypes=0)]
+    print(f"{len(students)} öğrenci yüklendi (CPU).")
+    return students
+
+
+def gallery_fingerprint(db_path: str) -> Tuple[int, int]:
+    """(satır sayısı, en büyük id): galeriden türetilen dosyaların geçerliliği için."""
+    count, max_id = oys_veri.fetchone("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM ogrenciler", (), db_path)
+    return int(count), int(max_id)
+
+
+def templates_fingerprint(db_path: str) -> Tuple[int, int]:
+    """
+    yuz_sablonlari için (satır sayısı, en büyük id): şablonlar her yazımda silinip yeniden
+    eklendiğinden (AUTOINCREMENT) değişiklik en büyük id'yi büyütür.
+    """
+    count, max_id = oys_veri.fetchone("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM yuz_sablonlari", (), db_path)
+    return int(count), int(max_id)
+
+
+class Galeri:
+    """
+    Başlangıçta bir kez kurulan eşleştirme galerisi.
+    - vectors: (N,128) float32, C-contiguous
+    - labels / okul_nos / ids: vectors ile aynı sırada paralel diziler (ids: DB satır id'si)
+    Bir frame'deki tüm yüzler tek bir matris çarpımıyla eşleştirilir:
+        ||a - b||^2 = ||a||^2 + ||b||^2 - 2 a.b
+    Çoklu şablonda aynı okul_no'lu ardışık satırlar bir öğrencidir; öğrenci mesafesi
+    prototipler üzerinden tek bir min indirgemesiyle alınır (bkz. student_distances).
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        labels: Sequence[str],
+        okul_nos: Sequence[str],
+        ids: Optional[Sequence[int]] = None,
+        sq_norms: Optional[np.ndarray] = None,
+    ):
+        # Zaten C-contiguous float32 ise (ör. mmap edilmiş anlık görüntü) kopya yapılmaz
+        vecs = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, EMB_DIM)
+        if len(labels) != vecs.shape[0] or len(okul_nos) != vecs.shape[0]:
+            raise ValueError("vectors, labels ve okul_nos aynı uzunlukta olmalı.")
+        self.vectors = vecs
+        self.labels = np.asarray(labels, dtype=object)
+        self.okul_nos = np.asarray(okul_nos, dtype=object)
+        self.ids = (np.asarray(ids, dtype=np.int64) if ids is not None
+                    else np.full(vecs.shape[0], -1, dtype=np.int64))
+        # Her sorguda tekrar hesaplamamak için galeri normlarının karesi
+        if sq_norms is None:
+            sq_norms = np.einsum("ij,ij->i", vecs, vecs)
+        self.sq_norms = sq_norms
+        # Opsiyonel yaklaşık en yakın komşu indeksi (ann_indeks.IVFIndex); None ise tam arama
+        self.index = None
+
+        # Öğrenci bölütleri: her öğrencinin ilk satırı; her satır ayrı öğrenciyse None (hızlı yol)
+        n = vecs.shape[0]
+        change = np.ones(n, dtype=bool)
+        if n > 1:
+            change[1:] = self.okul_nos[1:] != self.okul_nos[:-1]
+        starts = np.flatnonzero(change)
+        self.starts = starts if starts.size < n else None
+        self.row_student = None
+        self.slots = None
+        self.max_prototypes = 1
+        if self.starts is not None:
+            counts = np.diff(np.append(starts, n))
+            self.row_student = np.repeat(np.arange(starts.size), counts)
+            self.max_prototypes = int(counts.max())
+            # (P,S) satır indeksleri: j. prototip yuvası; eksik yuvalar öğrencinin son satırıyla
+            # doldurulur (minimumu değiştirmez)
+            self.slots = starts[None, :] + np.minimum(
+                np.arange(self.max_prototypes)[:, None], counts[None, :] - 1
+            )
+
+    @classmethod
+    def from_students(cls, students: List[Tuple[str, str, str, np.ndarray]]) -> "Galeri":
+        """load_students çıktısından galeri kurar."""
+        if not students:
+            return cls(np.empty((0, EMB_DIM), dtype=np.float32), [], [])
+        vectors = np.stack([vec for _, _, _, vec in students]).astype(np.float32, copy=False)
+        labels = [f"{ad} {soyad}" for ad, soyad, _, _ in students]
+        okul_nos = [okul for _, _, okul, _ in students]
+        return cls(vectors, labels, okul_nos)
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple[int, str, str, str, np.ndarray]]) -> "Galeri":
+        """load_student_rows çıktısından (DB id'leriyle) galeri kurar."""
+        if not rows:
+            return cls(np.empty((0, EMB_DIM), dtype=np.float32), [], [], ids=[])
+        vectors = np.stack([vec for *_, vec in rows]).astype(np.float32, copy=False)
+        labels = [f"{ad} {soyad}" for _, ad, soyad, _, _ in rows]
+        okul_nos = [okul for _, _, _, okul, _ in rows]
+        return cls(vectors, labels, okul_nos, ids=[row_id for row_id, *_ in rows])
+
+    def updated(self, remove_ids, rows: List[Tuple[int, str, str, str, np.ndarray]]) -> "Galeri":
+        """
+        Yeni bir galeri döndürür: remove_ids id'li satırlar çıkarılır, rows (load_student_rows
+        biçiminde) sona eklenir. Mevcut galeri değişmez; çağıran tek atamayla yenisine geçer.
+        Bağlı ANN indeksi de yeniden eğitilmeden güncellenir.
+        """
+        keep = ~np.isin(self.ids, np.fromiter(remove_ids, dtype=np.int64))
+        add = Galeri.from_rows(rows)
+        out = Galeri(
+            np.concatenate([self.vectors[keep], add.vectors]),
+            np.concatenate([self.labels[keep], add.labels]),
+            np.concatenate([self.okul_nos[keep], add.okul_nos]),
+            ids=np.concatenate([self.ids[keep], add.ids]),
+            sq_norms=np.concatenate([self.sq_norms[keep], add.sq_norms]),
+        )
+        if self.index is not None:
+            out.index = self.index.updated(keep, add.vectors)
+        return out
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    @property
+    def n_students(self) -> int:
+        return len(self) if self.starts is None else int(self.starts.size)
+
+    @staticmethod
+    def _as_queries(encodings) -> np.ndarray:
+        q = np.asarray(encodings, dtype=np.float32)
+        return np.ascontiguousarray(q.reshape(-1, EMB_DIM))
+
+    def distances(self, encodings) -> np.ndarray:
+        """(M,128) sorgular için (M,N) Öklid mesafe matrisi."""
+        q = self._as_queries(encodings)
+        d2 = np.einsum("ij,ij->i", q, q)[:, None] + self.sq_norms[None, :]
+        d2 -= 2.0 * (q @ self.vectors.T)
+        np.maximum(d2, 0.0, out=d2)  # float hatasıyla oluşan küçük negatifleri kırp
+        return np.sqrt(d2, out=d2)
+
+    def student_distances(self, encodings) -> np.ndarray:
+        """
+        (M,128) sorgular için (M,S) öğrenci mesafesi: prototipler üzerinden minimum.
+        Kare mesafe (N,M) düzeninde hesaplanır, prototip yuvalarına göre (P,S,M) toplanıp ilk
+        eksende tek min ile indirgenir (küçük bölütlerde np.minimum.reduceat'ten ~6 kat hızlı);
+        karekök yalnızca S öğrenci için alınır.
+        """
+        if self.starts is None:
+            return self.distances(encodings)
+        q = self._as_queries(encodings)
+        d2 = self.sq_norms[:, None] - 2.0 * (self.vectors @ q.T)
+        student_d2 = np.take(d2, self.slots.ravel(), axis=0).reshape(*self.slots.shape, q.shape[0]).min(axis=0)
+        student_d2 += np.einsum("ij,ij->i", q, q)[None, :]
+        np.maximum(student_d2, 0.0, out=student_d2)
+        return np.sqrt(student_d2, out=student_d2).T
+
+    @staticmethod
+    def _smallest(dist: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(M,N) mesafeden satır başına en küçük k (sütun indeksi, mesafe), artan sırada."""
+        m, n = dist.shape
+        if k < n:
+            part = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            part = np.broadcast_to(np.arange(n), (m, n)).copy()
+        part_d = np.take_along_axis(dist, part, axis=1)
+        order = np.argsort(part_d, axis=1, kind="stable")
+        return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_d, order, axis=1)
+
+    def topk(self, encodings, k: int = 1, exact: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Her sorgu için en yakın k adayı döndürür.
+        Dönüş: (indices (M,k), distances (M,k)) -> mesafeye göre artan sırada.
+        İndeks bağlıysa (ve exact=False) aday listesi indeksten gelir, mesafeler yine tamdır.
+        Çoklu şablonda adaylar öğrencidir (aynı öğrenci iki kez gelmez); indeks, öğrencinin
+        ilk satırını gösterir (labels / okul_nos için).
+        """
+        q = self._as_queries(encodings)
+        m = q.shape[0]
+        k = max(0, min(int(k), self.n_students))
+        if m == 0 or k == 0:
+            return np.empty((m, k), dtype=np.int64), np.empty((m, k), dtype=np.float32)
+        if self.starts is not None:
+            return self._topk_students(q, k, exact)
+        if self.index is not None and not exact:
+            return self.index.search(self, q, k)
+        return self._smallest(self.distances(q), k)
+
+    def _topk_students(self, q: np.ndarray, k: int, exact: bool) -> Tuple[np.ndarray, np.ndarray]:
+        if self.index is None or exact:
+            idx, dist = self._smallest(self.student_distances(q), k)
+            return self.starts[idx], dist
+
+        # İndeks satır döndürür: k öğrenciyi garantilemek için k * maks_prototip satır iste
+        rows, row_d = self.index.search(self, q, min(len(self), k * self.max_prototypes))
+        out_i = np.empty((q.shape[0], k), dtype=np.int64)
+        out_d = np.empty((q.shape[0], k), dtype=np.float32)
+        for i in range(q.shape[0]):
+            # Satırlar artan mesafede: her öğrencinin ilk görüldüğü satır onun minimumudur
+            _, first = np.unique(self.row_student[rows[i]], return_index=True)
+            first = np.sort(first)[:k]
+            out_i[i] = self.starts[self.row_student[rows[i][first]]]
+            out_d[i] = row_d[i][first]
+        return out_i, out_d
+
+    def match_all(self, encodings, thr: float = 0.55) -> List[MatchResult]:
+        """
+        Frame'deki tüm yüzleri tek seferde eşleştirir.
+        Her yüz için match_face ile aynı üçlüyü döner; eşik üzerindeyse 'Bilinmiyor'.
+        """
+        q = self._as_queries(encodings)
+        if q.shape[0] == 0:
+            return []
+        if len(self) == 0:
+            return [(UNKNOWN_NAME, float("inf"), None)] * q.shape[0]
+
+        idx, dist = self.topk(q, k=1)
+        out: List[MatchResult] = []
+        for i, d in zip(idx[:, 0], dist[:, 0]):
+            d = float(d)
+            if (not np.isfinite(d)) or d >= thr:
+                out.append((UNKNOWN_NAME, d, None))
+            else:
+                out.append((str(self.labels[i]), d, self.okul_nos[i]))
+        return out
@@ -0,0 +1,187 @@
+# ============================================
+# file: galeri_onbellek.py
+# Galerinin önceden derlenmiş ikili anlık görüntüsü (DB'nin yanında: <db>.galeri.bin)
+# Açılışta BLOB'ları tek tek _to_arr ile çözmek yerine dosya mmap edilir; matris
+# kopyalanmaz ve aynı makinedeki birden fazla tanıma süreci aynı sayfaları paylaşır.
+# Kullanım (derleme): python galeri_onbellek.py --db ogrenciler.db
+# ============================================
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from galeri import (
+    EMB_DIM,
+    GALLERY_PROTOTYPES,
+    Galeri,
+    gallery_fingerprint,
+    load_student_rows,
+    templates_fingerprint,
+)
+
+MAGIC = b"GALSNAP\0"
+# 2: satırlar öğrenci başına prototip; başlıkta prototip sayısı (k) + şablon tablosu fingerprint'i
+VERSION = 2
+
+# magic, sürüm, N, boyut, prototip sayısı (k), DB satır sayısı, DB en büyük id,
+# etiket tablosu ofseti/uzunluğu, şablon satır sayısı, şablon en büyük id
+_HEADER = struct.Struct("<8sIIIIqqqqqq")
+_DATA_OFFSET = 128  # matris 64 bayt hizalı başlar
+assert _HEADER.size <= _DATA_OFFSET
+
+# Dosya düzeni (N satır):
+#   [başlık][dolgu] | vektörler (N,128) float32 | id'ler (N,) int64 | normların karesi (N,) float32
+#   | etiket tablosu (UTF-8 JSON: [[ad_soyad, okul_no], ...])
+
+
+def snapshot_path(db_path: str) -> str:
+    return db_path + ".galeri.bin"
+
+
+def _layout(n: int) -> Tuple[int, int, int]:
+    """(id ofseti, norm ofseti, etiket tablosu ofseti)"""
+    ids_off = _DATA_OFFSET + n * EMB_DIM * 4
+    norms_off = ids_off + n * 8
+    return ids_off, norms_off, norms_off + n * 4
+
+
+def write_snapshot(
+    galeri: Galeri,
+    fingerprint: Tuple[int, int],
+    path: str,
+    tpl_fingerprint: Tuple[int, int] = (0, 0),
+    prototypes: int = GALLERY_PROTOTYPES,
+) -> None:
+    """
+    Galeriyi anlık görüntü dosyasına yazar (geçici dosya + os.replace ile atomik).
+    prototypes: galerinin kurulduğu k (load_student_rows); farklı k ile açılışta dosya bayat sayılır.
+    """
+    n = len(galeri)
+    table = json.dumps(
+        [[str(label), str(okul)] for label, okul in zip(galeri.labels, galeri.okul_nos)],
+        ensure_ascii=False,
+    ).encode("utf-8")
+    ids_off, norms_off, table_off = _layout(n)
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, n, EMB_DIM, max(0, prototypes),
+                             fingerprint[0], fingerprint[1], table_off, len(table),
+                             tpl_fingerprint[0], tpl_fingerprint[1]))
+        f.write(b"\0" * (_DATA_OFFSET - _HEADER.size))
+        f.write(np.ascontiguousarray(galeri.vectors, dtype=np.float32).tobytes())
+        f.write(galeri.ids.astype(np.int64).tobytes())
+        f.write(np.asarray(galeri.sq_norms, dtype=np.float32).tobytes())
+        f.write(table)
+    # Açık mmap'ler eski dosyayı görmeye devam eder; yeni açılışlar yenisini alır
+    os.replace(tmp, path)
+
+
+def open_snapshot(
+    path: str,
+    fingerprint: Optional[Tuple[int, int]] = None,
+    tpl_fingerprint: Optional[Tuple[int, int]] = None,
+    prototypes: Optional[int] = GALLERY_PROTOTYPES,
+) -> Optional[Galeri]:
+    """
+    Anlık görüntüyü salt-okunur mmap ile açar. Dosya yoksa, sürümü farklıysa, prototip sayısı
+    farklıysa ya da fingerprint'ler (öğrenci / şablon: satır sayısı, en büyük id) uyuşmuyorsa
+    None döner. None verilen kontrol atlanır.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return None
+            (magic, version, n, dim, k, count, max_id, table_off, table_len,
+             tpl_count, tpl_max_id) = _HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION or dim != EMB_DIM:
+                return None
+            if prototypes is not None and k != max(0, prototypes):
+                return None
+            if fingerprint is not None and (count, max_id) != tuple(fingerprint):
+                return None
+            if tpl_fingerprint is not None and (tpl_count, tpl_max_id) != tuple(tpl_fingerprint):
+                return None
+            if table_off != _layout(n)[2]:
+                return None
+            f.seek(table_off)
+            table = json.loads(f.read(table_len).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+    if len(table) != n:
+        return None
+    if n == 0:
+        return Galeri.from_rows([])
+
+    ids_off, norms_off, _ = _layout(n)
+    vectors = np.memmap(path, dtype=np.float32, mode="r", offset=_DATA_OFFSET, shape=(n, EMB_DIM))
+    ids = np.memmap(path, dtype=np.int64, mode="r", offset=ids_off, shape=(n,))
+    sq_norms = np.memmap(path, dtype=np.float32, mode="r", offset=norms_off, shape=(n,))
+    labels = [label for label, _ in table]
+    okul_nos = [okul for _, okul in table]
+    return Galeri(vectors, labels, okul_nos, ids=ids, sq_norms=sq_norms)
+
+
+def compile_snapshot(db_path: str, path: Optional[str] = None) -> Galeri:
+    """DB'den galeriyi kurup anlık görüntüyü (yeniden) yazar; bellekteki galeriyi döndürür."""
+    path = path or snapshot_path(db_path)
+    # Fingerprint'ler satırlardan önce alınır: arada DB değişirse bir sonraki açılış yeniden derler
+    fp = gallery_fingerprint(db_path)
+    tpl_fp = templates_fingerprint(db_path)
+    galeri = Galeri.from_rows(load_student_rows(db_path, GALLERY_PROTOTYPES))
+    write_snapshot(galeri, fp, path, tpl_fp, GALLERY_PROTOTYPES)
+    return galeri
+
+
+def load_gallery(db_path: str, path: Optional[str] = None) -> Galeri:
+    """Geçerli anlık görüntü varsa mmap ile açar; yoksa/bayatsa derleyip açar."""
+    path = path or snapshot_path(db_path)
+    t0 = time.perf_counter()
+    galeri = open_snapshot(path, gallery_fingerprint(db_path), templates_fingerprint(db_path))
+    if galeri is not None:
+        print(f"{galeri.n_students} öğrenci anlık görüntüden yüklendi "
+              f"({(time.perf_counter() - t0) * 1000.0:.1f} ms).")
+        return galeri
+
+    try:
+        built = compile_snapshot(db_path, path)
+    except OSError as e:
+        # Dosya yazılamıyorsa (salt-okunur dizin vb.) doğrudan DB'den devam
+        print(f"[GALERİ] Anlık görüntü yazılamadı ({path}): {e}")
+        return Galeri.from_rows(load_student_rows(db_path))
+    # Derlenen dosya da mmap ile açılır (süreçler arası paylaşılan sayfalar)
+    galeri = open_snapshot(path)
+    if galeri is None:
+        galeri = built
+    print(f"{galeri.n_students} öğrenci yüklendi, anlık görüntü derlendi "
+          f"({(time.perf_counter() - t0) * 1000.0:.1f} ms).")
+    return galeri
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Galeri anlık görüntüsünü derle")
+    ap.add_argument("--db", required=True)
+    ap.add_argument("--out", default=None, help="varsayılan: <db>.galeri.bin")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    galeri = compile_snapshot(args.db, args.out)
+    path = args.out or snapshot_path(args.db)
+    print(f"{galeri.n_students} öğrenci -> {path} ({os.path.getsize(path) / 1e6:.1f} MB, "
+          f"{time.perf_counter() - t0:.2f} sn)")
+
+    t0 = time.perf_counter()
+    snap = open_snapshot(path, gallery_fingerprint(args.db), templates_fingerprint(args.db))
+    print(f"mmap açılış: {(time.perf_counter() - t0) * 1000.0:.1f} ms, geçerli: {snap is not None}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# ============================================
+# file: galeri_yenileme.py
+# Çalışan tanıyıcıya yeni kaydedilen öğrencilerin yeniden başlatmadan eklenmesi
+# Arka plan iş parçacığı DB değişikliğini ucuz yoldan yoklar:
+#   1) PRAGMA data_version (kalıcı bağlantı; başka bir bağlantı yazdıysa değişir)
+#   2) (satır sayısı, en büyük id) -> yoklama/dikkat UPDATE'leri galeriyi etkilemez, elenir
+#   3) yalnızca id farkı: eklenen / silinen satırlar (INSERT OR REPLACE = sil + yeni id)
+# Yeni galeri yan tarafta kurulur ve tek atamayla devreye alınır; frame döngüsü durmaz.
+# ============================================
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import oys_veri
+from galeri import Galeri, _to_arr, with_prototypes
+
+# Yoklama aralığı (sn); 0: kapalı
+GALLERY_RELOAD_SEC = float(os.environ.get("GALLERY_RELOAD_SEC", "2.0"))
+
+# SQLite parametre sınırının altında kalmak için IN (...) parça boyu
+_ID_CHUNK = 500
+
+
+def _fetch_rows(con: sqlite3.Connection, ids: Iterable[int]) -> List[Tuple[int, str, str, str, np.ndarray]]:
+    """Verilen id'lerin satırları (load_student_rows biçiminde; geçersiz vektörler atlanır)."""
+    ids = sorted(ids)
+    out = []
+    for s in range(0, len(ids), _ID_CHUNK):
+        chunk = ids[s:s + _ID_CHUNK]
+        rows = con.execute(
+            "SELECT id, ad, soyad, okul_numarasi, yuz_vektoru FROM ogrenciler "
+            f"WHERE id IN ({','.join('?' * len(chunk))}) ORDER BY id",
+            chunk,
+        ).fetchall()
+        for row_id, ad, soyad, okul, vec in rows:
+            v = _to_arr(vec)
+            if v is None or not np.isfinite(v).all():
+                continue
+            out.append((int(row_id), ad, soyad, okul, v.astype(np.float32, copy=False)))
+    # Şablonu olan öğrenciler prototip satırlarıyla gelir (load_student_rows ile aynı)
+    return with_prototypes(con, out)
+
+
+class GalleryReloader:
+    """
+    get_galeri(): o anki galeri; set_galeri(g): yeni galeriyi devreye alır (tek atama).
+    start() ile arka planda `interval` saniyede bir poll() çağrılır.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        get_galeri: Callable[[], Galeri],
+        set_galeri: Callable[[Galeri], None],
+        interval: float = GALLERY_RELOAD_SEC,
+    ):
+        self.db_path = db_path
+        self.get_galeri = get_galeri
+        self.set_galeri = set_galeri
+        self.interval = interval
+        self._con: Optional[sqlite3.Connection] = None
+        self._version: Optional[int] = None
+        self._fingerprint: Optional[Tuple[int, int]] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="gallery-reloader", daemon=True)
+        self.reloads = 0
+        self.added = 0
+        self.removed = 0
+
+    def start(self) -> "GalleryReloader":
+        if (self.get_galeri().ids < 0).any():
+            print("[GALERİ] Galeride DB id'leri yok; canlı yenileme kapalı.")
+            return self
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except sqlite3.Error as e:
+                # Kilit / geçici hata: bağlantıyı bırak, bir sonraki turda yeniden dene
+                print(f"[GALERİ] Yenileme hatası: {e}")
+                self._close()
+        self._close()
+
+    def _close(self) -> None:
+        if self._con is not None:
+            self._con.close()
+            self._con = None
+            self._version = None
+
+    def poll(self) -> Optional[Tuple[int, int]]:
+        """Değişiklik varsa galeriye uygular; (eklenen, silinen) ya da None döner."""
+        if self._con is None:
+            # data_version bağlantıya özeldir: havuz yerine kendi (WAL ayarlı) bağlantısı
+            self._con = oys_veri.connect(self.db_path)
+        con = self._con
+
+        version = con.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version:
+            return None
+        self._version = version
+
+        count, max_id = con.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM ogrenciler").fetchone()
+        fp = (int(count), int(max_id))
+        if fp == self._fingerprint:
+            return None
+
+        current = self.get_galeri()
+        db_ids = {row_id for (row_id,) in con.execute("SELECT id FROM ogrenciler")}
+        have = set(current.ids.tolist())
+        removed = have - db_ids
+        rows = _fetch_rows(con, db_ids - have)
+        self._fingerprint = fp
+        if not removed and not rows:
+            return None
+
+        galeri = current.updated(removed, rows)
+        if galeri.index is not None:
+            galeri.index.fingerprint = fp
+        self.set_galeri(galeri)
+        self.reloads += 1
+        added = len({row[0] for row in rows})
+        self.added += added
+        self.removed += len(removed)
+        print(f"[GALERİ] Güncellendi: +{added} / -{len(removed)} -> {galeri.n_students} öğrenci")
+        return added, len(removed)
+
+    def stats(self):
+        return {"reloads": self.reloads, "added": self.added, "removed": self.removed}
@@ -3,27 +3,85 @@ import json
 import os
 import subprocess
 import sys
+import threading
+import time
 import tkinter as tk
-from typing import Optional
+from typing import Callable, Optional
 import signal
 
 # Ortak yardımcılar
-from hesaplamalar import read_stats, format_ratio, STATS_PATH
+from hesaplamalar import read_stats, format_ratio, format_diagnostics, STATS_PATH
+from tanima_servisi import send_command, is_running
+from canli_yayin import subscribe
 
 PROCESS: Optional[subprocess.Popen] = None
+SERVICE: Optional[subprocess.Popen] = None   # bu arayüzün başlattığı tanıma servisi
 PYTHON = sys.executable
 
-# hybrid.py bu klasörde
+# hybrid.py ve tanima_servisi.py bu klasörde
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 HYBRID_SCRIPT = os.path.join(BASE_DIR, "hybrid.py")
+SERVICE_SCRIPT = os.path.join(BASE_DIR, "tanima_servisi.py")
+
+# 1: modeller sıcak tutulan servis üzerinden; 0: her derste hybrid.py ayrı süreç (eski yol)
+USE_SERVICE = os.environ.get("RECOGNIZER_DAEMON", "1") == "1"
+# Servis ilk açılışta modelleri yüklerken komutlar bu süre boyunca yeniden denenir (sn)
+SERVICE_WAIT_SEC = 120.0
+
+
+def _child_env() -> dict:
+    env = os.environ.copy()
+    env.setdefault("ATTENDANCE_STATS_PATH", STATS_PATH)
+    return env
+
+
+def ensure_service() -> None:
+    """Servis çalışmıyorsa arka planda başlatır (modeller yüklenirken arayüz beklemez)."""
+    global SERVICE
+    if not USE_SERVICE or is_running():
+        return
+    if SERVICE is None or SERVICE.poll() is not None:
+        SERVICE = subprocess.Popen([PYTHON, SERVICE_SCRIPT], env=_child_env())
+
+
+def _send_async(cmd: str, on_result: Callable[[Optional[dict], Optional[str]], None]) -> None:
+    """Komutu arka planda gönderir (servis hazırlanıyorsa yeniden dener); sonuç Tk döngüsünde işlenir."""
+    def worker() -> None:
+        deadline = time.monotonic() + SERVICE_WAIT_SEC
+        while True:
+            try:
+                resp, err = send_command(cmd), None
+                break
+            except (OSError, ValueError) as e:
+                if cmd == "stop" or time.monotonic() > deadline or (SERVICE is not None and SERVICE.poll() is not None):
+                    resp, err = None, str(e)
+                    break
+                time.sleep(0.5)
+        root.after(0, on_result, resp, err)
+
+    threading.Thread(target=worker, name=f"servis-{cmd}", daemon=True).start()
+
 
 def start_record() -> None:
     global PROCESS
+    if USE_SERVICE:
+        ensure_service()
+        status_var.set("Kayıt başlatılıyor...")
+
+        def done(resp: Optional[dict], err: Optional[str]) -> None:
+            if resp and resp.get("ok"):
+                status_var.set(f"Kayıt başlatıldı ({resp.get('started_in_s', 0):.2f} sn).")
+            elif resp:
+                status_var.set(f"Başlatılamadı: {resp.get('error')}")
+            else:
+                status_var.set(f"Tanıma servisine ulaşılamadı: {err}")
+
+        _send_async("start", done)
+        return
+
     if PROCESS is None:
         try:
-            env = os.environ.copy()
-            env.setdefault("ATTENDANCE_STATS_PATH", STATS_PATH)
-            PROCESS = subprocess.Popen([PYTHON, HYBRID_SCRIPT], env=env)
+            PROCESS = subprocess.Popen([PYTHON, HYBRID_SCRIPT], env=_child_env())
             status_var.set("Kayıt başlatıldı.")
         except Exception as e:
             status_var.set(f"Başlatılamadı: {e}")
@@ -32,6 +90,21 @@ def start_record() -> None:
 
 def stop_record() -> None:
     global PROCESS
+    live_var.set("Anlık Katılım Oranı: ---")
+    if USE_SERVICE:
+        status_var.set("Kayıt durduruluyor...")
+
+        def done(resp: Optional[dict], err: Optional[str]) -> None:
+            if resp is None:
+                status_var.set("Çalışan kayıt yok.")
+            elif resp.get("ok"):
+                status_var.set("Kayıt durduruldu.")
+            else:
+                status_var.set(f"Kayıt durduruldu (hata: {resp.get('last_error')})")
+
+        _send_async("stop", done)
+        return
+
     if PROCESS is not None:
         try:
             # Hybrid.py'ye SIGINT gönder → finally bloğu düzgün çalışır.
@@ -42,17 +115,84 @@ def stop_record() -> None:
         status_var.set("Kayıt durduruldu.")
     else:
         status_var.set("Çalışan kayıt yok.")
-    live_var.set("Anlık Katılım Oranı: ---")
+
+# Canlı kanal (canli_yayin): bağlıyken dosya okunmaz; bağlantı yoksa dosya yoklanır (eski yol)
+LIVE_STOP = threading.Event()
+LIVE = {"connected": False, "stats": {}, "students": {}}
+
+
+def _show_stats(stats: dict) -> None:
+    text = format_ratio(stats)
+    students = LIVE["students"]
+    if LIVE["connected"] and students:
+        present = sum(1 for s in students.values() if s.get("present"))
+        attentive = sum(1 for s in students.values() if s.get("attentive"))
+        text += f"\nYoklama: {present} öğrenci  |  Dikkatli: {attentive}"
+    live_var.set(text)
+    if diag_visible.get():
+        diag_var.set(format_diagnostics(stats))
+
+
+def _apply_live(msg: dict) -> None:
+    """Canlı mesajı işler (Tk iş parçacığında)."""
+    kind = msg.get("type")
+    if kind == "snapshot":
+        LIVE["stats"] = dict(msg.get("stats") or {})
+        LIVE["students"] = dict(msg.get("students") or {})
+    elif kind == "stats":
+        # Sayaç mesajları kısa, periyodik olanlar tanılama alanlarını da taşır: birleştir
+        LIVE["stats"].update({k: v for k, v in msg.items() if k != "type"})
+    elif kind == "student":
+        LIVE["students"][msg["okul_no"]] = msg
+    elif kind == "lesson" and msg.get("state") == "started":
+        LIVE["stats"], LIVE["students"] = {}, {}
+    if LIVE["stats"]:
+        _show_stats(LIVE["stats"])
+
+
+def _set_live_connected(connected: bool) -> None:
+    LIVE["connected"] = connected
+
+
+def start_live_channel() -> None:
+    subscribe(
+        lambda msg: root.after(0, _apply_live, msg),
+        LIVE_STOP,
+        on_connection=lambda ok: root.after(0, _set_live_connected, ok),
+    )
+
 
 def _poll_stats() -> None:
-    stats = read_stats()
-    if stats:
-        live_var.set(format_ratio(stats))
+    if not LIVE["connected"]:
+        stats = read_stats()
+        if stats:
+            _show_stats(stats)
     root.after(500, _poll_stats)
 
+def toggle_diagnostics() -> None:
+    """Aşama gecikmeleri / FPS panelini aç-kapa (opsiyonel)."""
+    if diag_visible.get():
+        diag_frame.pack_forget()
+        diag_visible.set(False)
+        root.geometry("640x460")
+    else:
+        stats = LIVE["stats"] if LIVE["connected"] and LIVE["stats"] else read_stats()
+        diag_var.set(format_diagnostics(stats) if stats else "Henüz ölçüm yok.")
+        diag_frame.pack(after=live_label, pady=5)
+        diag_visible.set(True)
+        root.geometry("640x720")
+
 def exit_app() -> None:
+    LIVE_STOP.set()
     try:
-        stop_record()
+        if USE_SERVICE:
+            # Dersi kapat (yoklama / dikkat yazılsın); servisi bu arayüz açtıysa onu da kapat
+            try:
+                send_command("shutdown" if SERVICE is not None else "stop")
+            except (OSError, ValueError):
+                pass
+        else:
+            stop_record()
     finally:
         root.destroy()
 
@@ -123,6 +263,32 @@ btn_exit = tk.Button(
 )
 btn_exit.pack(side="right", padx=40)
 
+btn_diag = tk.Button(
+    frame_bottom,
+    text="TANILAMA",
+    bg="#bdbdbd",
+    fg="black",
+    width=12,
+    height=2,
+    font=("Arial", 11, "bold"),
+    command=toggle_diagnostics
+)
+btn_diag.pack(side="left", padx=40)
+
+# Tanılama paneli (varsayılan gizli)
+diag_visible = tk.BooleanVar(value=False)
+diag_var = tk.StringVar(value="")
+diag_frame = tk.Frame(root, bg="#d9f2f7")
+diag_label = tk.Label(
+    diag_frame,
+    textvariable=diag_var,
+    bg="#d9f2f7",
+    fg="black",
+    justify="left",
+    font=("Courier", 10)
+)
+diag_label.pack()
+
 status_var = tk.StringVar(value="")
 status_label = tk.Label(
     root,
@@ -134,4 +300,6 @@ status_label = tk.Label(
 status_label.pack(pady=5)
 
 root.after(500, _poll_stats)
+start_live_channel()
+ensure_service()   # modeller ilk derse kadar ısınsın
 root.mainloop()
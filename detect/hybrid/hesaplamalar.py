@@ -35,13 +35,22 @@ def _atomic_write_json(path: str, payload: Dict) -> None:
         except Exception:
             pass
 
-def write_stats(current: int, max_seen: int, path: str = STATS_PATH) -> None:
-    """current, max ve percent alanlarını birlikte yazar."""
-    _atomic_write_json(path, {
+def stats_payload(current: int, max_seen: int, extra: Optional[Dict] = None) -> Dict:
+    """current, max ve percent alanları; extra varsa (ör. kuyruk sayaçları) eklenir."""
+    payload = {
         "current": int(current),
         "max": int(max_seen),
         "percent": compute_percent(int(current), int(max_seen))
-    })
+    }
+    if extra:
+        payload.update(extra)
+    return payload
+
+def write_stats(current: int, max_seen: int, path: str = STATS_PATH, extra: Optional[Dict] = None) -> Dict:
+    """Payload'ı dosyaya atomik yazar (canlı kanalı dinlemeyen eski okuyucular için); payload'ı döner."""
+    payload = stats_payload(current, max_seen, extra)
+    _atomic_write_json(path, payload)
+    return payload
 
 def read_stats(path: str = STATS_PATH) -> Optional[Dict]:
     """Yoksa None döner; varsa sözlük döner."""
@@ -57,3 +66,16 @@ def format_ratio(stats: Dict) -> str:
     mx = int(stats.get("max", 0))
     pct = int(stats.get("percent", 0))
     return f"Anlık Katılım Oranı: %{pct}  (Şimdi: {cur} / Maks: {mx})"
+
+def format_diagnostics(stats: Dict) -> str:
+    """Tanılama paneli metni: FPS, düşen frame ve aşama gecikmeleri (ms)."""
+    lines = [
+        f"FPS: {float(stats.get('fps', 0.0)):.1f}   Düşen frame: {int(stats.get('dropped', 0))}",
+        f"{'aşama':<11}{'adet':>7}{'p50':>9}{'p95':>9}{'p99':>9}",
+    ]
+    for name, h in sorted((stats.get("stages") or {}).items()):
+        lines.append(
+            f"{name:<11}{int(h.get('count', 0)):>7}"
+            f"{float(h.get('p50', 0)):>9.1f}{float(h.get('p95', 0)):>9.1f}{float(h.get('p99', 0)):>9.1f}"
+        )
+    return "\n".join(lines)
@@ -5,12 +5,18 @@
 
 from __future__ import annotations
 
+import threading
 import time
-from typing import Dict, Set, Optional
+from typing import Collection, Dict, List, Set, Optional, Tuple
 import sqlite3
 
-# Varsayılan DB yolu (gerekirse hybrid.py'den parametre olarak da geliyor)
-DB_PATH = "/home/krm/Desktop/dlibenv/OYS/ogrenciler.db"
+from dikkat_motoru import AttentionEngine, StudentAttention
+from olcum import StageTimings
+import oys_veri
+import zaman_cizelgesi
+
+# Varsayılan DB yolu: STUDENT_DB_PATH (gerekirse hybrid.py'den parametre olarak da geliyor)
+DB_PATH = oys_veri.DB_PATH
 
 # ---- Genel prensip ----
 # 1) Öğrenci görünüyorsa -> geçen süre "visible_total"e eklenir.
@@ -21,38 +27,21 @@ DB_PATH = "/home/krm/Desktop/dlibenv/OYS/ogrenciler.db"
 # 5) Dikkat oranı = (visible_total + grace_total) / (ilk_görülme_anından_itibaren_geçen_süre)
 
 # ---- İç veri yapısı ----
-# tracking[okul_no] = {
-#     "first_seen": float,
-#     "state": "visible" | "invisible",
-#     "state_since": float,
-#     "visible_total": float,
-#     "grace_total": float,
-#     "grace_in_streak": float,  # o anki kaybolma serisi içinde kullanılan tolerans
-# }
-tracking: Dict[str, Dict[str, float | str]] = {}
+# Olay güdümlü motor (dikkat_motoru.AttentionEngine): her frame tüm öğrencileri taramak yerine
+# yalnızca görünür/görünmez geçişleri işlenir, tolerans bitişleri min-heap'te bekler.
+# tracking[okul_no] -> StudentAttention (__slots__: first_seen, visible, since,
+#                      visible_total, grace_total, expired)
 
 # Sabit tolerans (saniye)
 MISSING_TOLERANCE_SECONDS = 30.0
 
-
-def _ensure_student(okul_no: str, now: Optional[float] = None) -> None:
-    """Öğrenciyi takipte başlatır; ilk görünme anını işaretler (neden: oran paydasını doğru tutmak)."""
-    if okul_no in tracking:
-        return
-    ts = time.time() if now is None else now
-    tracking[okul_no] = {
-        "first_seen": ts,
-        "state": "visible",
-        "state_since": ts,
-        "visible_total": 0.0,
-        "grace_total": 0.0,
-        "grace_in_streak": 0.0,
-    }
+engine = AttentionEngine(MISSING_TOLERANCE_SECONDS)
+tracking: Dict[str, StudentAttention] = engine.records
 
 
 def reset_tracking() -> None:
     """Ders başlangıcında çağrılır; tüm RAM takibini sıfırlar."""
-    tracking.clear()
+    engine.reset()
 
 
 def mark_seen(okul_no: str, now: Optional[float] = None) -> None:
@@ -60,61 +49,28 @@ def mark_seen(okul_no: str, now: Optional[float] = None) -> None:
     Bu frame'de öğrenciyi gördüğümüzü bildirir.
     Neden sadece başlatıyoruz: süre birikimi tek noktadan (update_missing) yönetilsin, çifte sayım olmasın.
     """
-    _ensure_student(okul_no, now=now)
+    engine.seen(okul_no, time.time() if now is None else now)
 
 
-def update_missing(recognized_ids: Set[str], now: Optional[float] = None, timeout: float = MISSING_TOLERANCE_SECONDS) -> None:
+def update_missing(
+    recognized_ids: Set[str], now: Optional[float] = None, timeout: float = MISSING_TOLERANCE_SECONDS
+) -> Tuple[Set[str], Set[str], List[str]]:
     """
-    Bu frame için görünür/görünmez öğrencilerin sürelerini günceller.
+    Bu frame için görünür/görünmez geçişlerini işler.
     - recognized_ids: Bu frame'de tanınan okul numaraları.
     - now: Zaman damgası. None ise time.time().
     - timeout: Kaybolma başına en fazla eklenecek tolerans (varsayılan 30 sn).
+    Dönüş: (görünür olanlar, görünmez olanlar, toleransı bitenler) -> canlı yayın için.
     """
-    ts = time.time() if now is None else now
+    engine.timeout = timeout
+    appeared, disappeared = engine.update(recognized_ids, time.time() if now is None else now)
+    return appeared, disappeared, engine.last_expired
 
-    # Takipte olup bu frame'de de görünenlerin görünür sürelerini güncelle
-    for okul_no, st in list(tracking.items()):
-        state = st["state"]
-        state_since = float(st["state_since"])
 
-        if okul_no in recognized_ids:
-            # Görünüyor
-            if state == "visible":
-                dt = ts - state_since
-                if dt > 0:
-                    st["visible_total"] = float(st["visible_total"]) + dt
-                    st["state_since"] = ts
-            else:
-                # invisible -> visible
-                st["state"] = "visible"
-                st["state_since"] = ts
-                st["grace_in_streak"] = 0.0
-        else:
-            # Görünmüyor
-            if state == "visible":
-                # visible -> invisible
-                dt = ts - state_since
-                if dt > 0:
-                    st["visible_total"] = float(st["visible_total"]) + dt
-                st["state"] = "invisible"
-                st["state_since"] = ts
-                st["grace_in_streak"] = 0.0
-            else:
-                # invisible serisinde tolerans ekle (maks. timeout)
-                dt = ts - state_since
-                if dt > 0:
-                    used = float(st["grace_in_streak"])
-                    can_add = max(0.0, timeout - used)
-                    add_grace = min(dt, can_add)
-                    if add_grace > 0:
-                        st["grace_total"] = float(st["grace_total"]) + add_grace
-                    st["grace_in_streak"] = used + dt
-                    st["state_since"] = ts
-
-    # Bu frame'de yeni görünen öğrenciler varsa başlat
-    for okul_no in recognized_ids:
-        if okul_no not in tracking:
-            _ensure_student(okul_no, now=ts)
+def student_state(okul_no: str) -> Tuple[bool, bool]:
+    """(görünür mü, dikkatli mi: görünür ya da tolerans içinde)."""
+    st = engine.records.get(okul_no)
+    return (st is not None and st.visible), engine.is_attentive(okul_no)
 
 
 def _compute_final_stats_for(okul_no: str, at_time: float, timeout: float = MISSING_TOLERANCE_SECONDS) -> tuple[float, float, float]:
@@ -122,92 +78,208 @@ def _compute_final_stats_for(okul_no: str, at_time: float, timeout: float = MISS
     Bir öğrenci için (at_time anında) nihai görünür, tolerans ve toplam geçen süreyi döndürür.
     Dönüş: (visible_total_final, grace_total_final, elapsed_total)
     """
-    st = tracking[okul_no]
-    first_seen = float(st["first_seen"])
-    visible_total = float(st["visible_total"])
-    grace_total = float(st["grace_total"])
-    state = st["state"]
-    state_since = float(st["state_since"])
-
-    if state == "visible":
-        # Son görünür dilimi de ekle
-        dt = at_time - state_since
-        if dt > 0:
-            visible_total += dt
+    return engine.final_stats(okul_no, at_time, timeout=timeout)
+
+
+def _attention_row(okul_no: str, at_time: float) -> tuple[int, float]:
+    """DB'ye yazılacak (yüzde 0–100 tam sayı, dikkat süresi sn) ikilisi."""
+    vis, grace, elapsed = _compute_final_stats_for(okul_no, at_time=at_time, timeout=MISSING_TOLERANCE_SECONDS)
+    attention_seconds = vis + grace
+
+    # 0–1 oran -> yüzde (0–100)
+    if elapsed > 0.0:
+        ratio_0_1 = attention_seconds / elapsed
     else:
-        # Son kaybolma dilimi için kalan toleransı ekle
-        dt = at_time - state_since
-        if dt > 0:
-            used = float(st["grace_in_streak"])
-            can_add = max(0.0, timeout - used)
-            add_grace = min(dt, can_add)
-            if add_grace > 0:
-                grace_total += add_grace
+        ratio_0_1 = 0.0
+
+    percent = max(0.0, min(100.0, ratio_0_1 * 100.0))  # uç değerler için kırp
 
-    elapsed = max(0.0, at_time - first_seen)
-    return visible_total, grace_total, elapsed
+    #ondaliklari kaldirdik.
+    return int(percent), attention_seconds
 
 
-def write_attentions_to_db(record_start_time: float, db_path: str = DB_PATH) -> None:
+def write_attentions_to_db(record_start_time: float, db_path: str = DB_PATH, now: Optional[float] = None) -> None:
     """
     Ders sonunda çağrılır. Her öğrenci için dikkat oranını DB'ye yazar.
     Not: Bu sürüm yüzde (0–100) olarak kaydeder.
+    now: Ders bitiş anı (None ise time.time()).
     """
-    now = time.time()
+    now = time.time() if now is None else now
 
-    try:
-        con = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
-        cur = con.cursor()
+    # Şema göçü (sema.py) dikkat_sure sütununu garanti eder: tek sabit ifade, tek executemany
+    rows = []
+    for okul_no in list(tracking.keys()):
+        percent, attention_seconds = _attention_row(okul_no, now)
+        rows.append((percent, attention_seconds, okul_no))  # dikkat_sure saniye cinsinden
+    oys_veri.executemany(
+        "UPDATE ogrenciler SET dikkat_orani=?, dikkat_sure=? WHERE okul_numarasi=?",
+        rows,
+        db_path,
+    )
 
-        for okul_no in list(tracking.keys()):
-            vis, grace, elapsed = _compute_final_stats_for(okul_no, at_time=now, timeout=MISSING_TOLERANCE_SECONDS)
-            attention_seconds = vis + grace
 
-            # 0–1 oran -> yüzde (0–100)
-            if elapsed > 0.0:
-                ratio_0_1 = attention_seconds / elapsed
-            else:
-                ratio_0_1 = 0.0
+def write_timelines_to_db(record_start_time: float, db_path: str = DB_PATH, now: Optional[float] = None) -> int:
+    """
+    Ders sonunda her öğrencinin görünür dilimlerini (run-length) ders_gorunurluk tablosuna
+    tek transaction'da yazar. Dönüş: yazılan öğrenci sayısı.
+    """
+    now = time.time() if now is None else now
+    timelines = {
+        okul_no: (st.first_seen, engine.timeline(okul_no, now))
+        for okul_no, st in tracking.items()
+    }
+    if not timelines:
+        return 0
+    return zaman_cizelgesi.write_timelines_to_db(record_start_time, timelines, now, db_path)
 
-            percent = max(0.0, min(100.0, ratio_0_1 * 100.0))  # uç değerler için kırp
-            # İsterseniz yuvarlama: percent = round(percent, 2)
 
-            # Şema farklılıklarına toleranslı güncelleme (dikkat_sure saniye cinsinden kalır)
+def session_date(ts: float) -> str:
+    """Ders başlangıcının yerel günü ('YYYY-MM-DD'); sessions / session_attendance.tarih."""
+    return time.strftime("%Y-%m-%d", time.localtime(ts))
 
-            #ondaliklari kaldirdik.
-            percent=int(percent)
 
-            try:
-                cur.execute(
-                    "UPDATE ogrenciler SET dikkat_orani=?, dikkat_sure=? WHERE okul_numarasi=?",
-                    (percent, attention_seconds, okul_no),
-                )
-            except sqlite3.OperationalError:
-                cur.execute(
-                    "UPDATE ogrenciler SET dikkat_orani=? WHERE okul_numarasi=?",
-                    (percent, okul_no),
-                )
+def start_session(record_start_time: float, db_path: str = DB_PATH) -> None:
+    """
+    Ders başlangıcı: sessions satırı açılır ve ogrenciler üzerindeki anlık yoklama/dikkat alanları
+    tek ifadeyle sıfırlanır (önceki dersin 'var'ları bu derse karışmasın).
+    Yalnızca değişmiş satırlar yazılır; ardışık derslerde çoğu satır zaten sıfırdır.
+    """
+    with oys_veri.transaction(db_path) as con:
+        con.execute(
+            "INSERT OR IGNORE INTO sessions (ders_baslangic, tarih) VALUES (?, ?)",
+            (record_start_time, session_date(record_start_time)),
+        )
+        con.execute(
+            "UPDATE ogrenciler SET yoklama='yok', dikkat_orani=0, dikkat_sure=0 "
+            "WHERE yoklama IS NOT 'yok' OR dikkat_orani != 0 OR dikkat_sure != 0"
+        )
 
-        con.commit()
-    finally:
-        try:
-            con.close()
-        except Exception:
-            pass
+
+def write_session_attendance(
+    record_start_time: float, present: Collection[str], db_path: str = DB_PATH, now: Optional[float] = None
+) -> int:
+    """
+    Ders sonu: kayıtlı her öğrenci için (devamsızlar dahil) session_attendance satırı, tek
+    transaction + tek executemany. start_session çağrılmadıysa (tekrar_oynat) ders satırı burada açılır.
+    Dönüş: yazılan satır sayısı.
+    """
+    now = time.time() if now is None else now
+    day = session_date(record_start_time)
+    with oys_veri.transaction(db_path) as con:
+        con.execute(
+            "INSERT OR IGNORE INTO sessions (ders_baslangic, tarih) VALUES (?, ?)", (record_start_time, day)
+        )
+        con.execute("UPDATE sessions SET ders_bitis=? WHERE ders_baslangic=?", (now, record_start_time))
+        (session_id,) = con.execute(
+            "SELECT id FROM sessions WHERE ders_baslangic=?", (record_start_time,)
+        ).fetchone()
+        rows = []
+        for (okul_no,) in con.execute("SELECT okul_numarasi FROM ogrenciler").fetchall():
+            st = tracking.get(okul_no)
+            if st is not None:
+                percent, attention_seconds = _attention_row(okul_no, now)
+                first_seen = st.first_seen
+            else:
+                percent, attention_seconds, first_seen = 0, 0.0, None
+            durum = "var" if okul_no in present else "yok"
+            rows.append((session_id, okul_no, day, durum, first_seen, percent, attention_seconds))
+        con.executemany(
+            "INSERT OR REPLACE INTO session_attendance "
+            "(session_id, okul_numarasi, tarih, durum, ilk_gorulme, dikkat_orani, dikkat_sure) "
+            "VALUES (?,?,?,?,?,?,?)",
+            rows,
+        )
+    return len(rows)
 
 
 def mark_present(okul_no: str, db_path: str = DB_PATH) -> None:
     """Yoklamayı 'var' yapar (idempotent; tekrar çalışsa da sorun olmaz)."""
-    try:
-        con = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
-        cur = con.cursor()
-        cur.execute(
-            "UPDATE ogrenciler SET yoklama='var' WHERE okul_numarasi=?",
-            (okul_no,),
-        )
-        con.commit()
-    finally:
+    oys_veri.execute("UPDATE ogrenciler SET yoklama='var' WHERE okul_numarasi=?", (okul_no,), db_path)
+
+
+class PresenceWriter:
+    """
+    Yoklama yazımlarını frame döngüsünden ayırır.
+    - mark(): yalnızca RAM'deki "zaten var" kümesine bakar; diske dokunmaz.
+    - Arka plan iş parçacığı, yeni gelenleri `interval` saniyede bir tek transaction +
+      executemany ile yazar (frame başına commit/fsync yerine).
+    - close(): bekleyenleri kesin olarak yazar (ders sonu / kapanış).
+    DB kilitliyse (OYS uygulaması yazıyorsa) bekleyenler bir sonraki tura kalır.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, interval: float = 1.0, timings: Optional[StageTimings] = None):
+        self.db_path = db_path
+        self.interval = interval
+        self.timings = timings if timings is not None else StageTimings()
+        self._present: Set[str] = set()
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="presence-writer", daemon=True)
+        self.flushes = 0
+        self.written = 0
+
+    def start(self) -> "PresenceWriter":
+        self._thread.start()
+        return self
+
+    def mark(self, okul_no: str) -> None:
+        """Öğrenciyi 'var' olarak işaretler (idempotent, O(1), disk yok)."""
+        if okul_no in self._present:
+            return
+        with self._lock:
+            if okul_no in self._present:
+                return
+            self._present.add(okul_no)
+            self._pending.append(okul_no)
+
+    def is_present(self, okul_no: str) -> bool:
+        return okul_no in self._present
+
+    def present_ids(self) -> Set[str]:
+        """Bu derste 'var' işaretlenenlerin kopyası (ders sonu kaydı için)."""
+        with self._lock:
+            return set(self._present)
+
+    def reset(self) -> None:
+        """Yeni ders: RAM kümesini boşaltır (bekleyen yazımlar yine de yazılır)."""
+        with self._lock:
+            self._present.clear()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self) -> int:
+        """Bekleyenleri tek transaction'da yazar; yazılan öğrenci sayısını döner."""
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
         try:
-            con.close()
-        except Exception:
-            pass
+            with self.timings.stage("db"):
+                oys_veri.executemany(
+                    "UPDATE ogrenciler SET yoklama='var' WHERE okul_numarasi=?",
+                    [(okul_no,) for okul_no in batch],
+                    self.db_path,
+                )
+        except sqlite3.Error:
+            # Kilit vb.: kaybetme, bir sonraki turda tekrar dene
+            with self._lock:
+                self._pending[:0] = batch
+            return 0
+        self.flushes += 1
+        self.written += len(batch)
+        return len(batch)
+
+    def close(self) -> None:
+        """İş parçacığını durdurur ve son kez (kesin) yazar."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=5.0)
+        for _ in range(3):
+            self.flush()
+            with self._lock:
+                if not self._pending:
+                    return
+            time.sleep(0.5)
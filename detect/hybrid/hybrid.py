@@ -3,221 +3,504 @@ import os
 os.environ["CUDA_VISIBLE_DEVICES"] = ""
 os.environ["PYTORCH_NO_CUDA_MEMORY_CACHING"] = "1"
 
-import time
-from typing import List, Tuple, Optional
 import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
 import numpy as np
 import cv2
-from ultralytics import YOLO
-import face_recognition
 
-from hesaplamalar import write_stats, update_max, compute_percent, STATS_PATH
+from dedektor import DETECTOR_BACKEND, detect_batch, make_detector
+from boru_hatti import DropOldestQueue, FramePacket, LatestFrameGrabber, MultiFrameReader, StageWorker
+from ann_indeks import ANN_MIN_GALLERY, load_or_build
+from galeri import Galeri, load_student_rows, load_students, _to_arr  # noqa: F401 (eski içe aktarımlar için)
+from galeri_onbellek import load_gallery
+from galeri_yenileme import GALLERY_RELOAD_SEC, GalleryReloader
+from kadans import AdaptiveCadence, FlowBoxTracker
+from kodlama_havuzu import EncodePool
+from olcum import RateMeter, StageTimings
+from takip import FaceTracker
+from tanima import encode_faces
+from canli_yayin import LivePublisher
+import oys_veri
+from hesaplamalar import write_stats, stats_payload, update_max, compute_percent, STATS_PATH
 from hesaplamalar2 import (
     reset_tracking,
     mark_seen,
     update_missing,
+    student_state,
     write_attentions_to_db,
-    mark_present,
+    write_timelines_to_db,
+    start_session,
+    write_session_attendance,
+    PresenceWriter,
 )
 
 # ---- Yapılandırma ----
-DB_PATH = os.environ.get("STUDENT_DB_PATH", "/home/krm/Desktop/dlibenv/OYS/ogrenciler.db")
+# Tek ayar: STUDENT_DB_PATH (OYS/veri_erisim.py)
+DB_PATH = oys_veri.DB_PATH
 MODEL_PATH = os.environ.get("YOLO_MODEL_PATH", "/home/krm/Desktop/detectenv/hybrid/best.pt")
 IMGSZ = int(os.environ.get("YOLO_IMGSZ", "640"))
 DOWNSCALE = float(os.environ.get("DOWNSCALE", "1.0"))
 MATCH_THR = float(os.environ.get("MATCH_THR", "0.55"))
-
-
-# ---- DB yardımcıları (mevcut yapıyla uyumlu) ----
-def _to_arr(vec) -> Optional[np.ndarray]:
-    if isinstance(vec, np.ndarray):
-        v = vec.astype(np.float32, copy=False).reshape(-1)
-        return v if v.size == 128 else None
-    if isinstance(vec, (list, tuple)):
-        v = np.asarray(vec, dtype=np.float32).reshape(-1)
-        return v if v.size == 128 else None
-    if isinstance(vec, (bytes, bytearray, memoryview)):
-        b = bytes(vec) if not isinstance(vec, (bytes, bytearray)) else vec
-        if len(b) % 4 == 0:
-            arr32 = np.frombuffer(b, dtype=np.float32)
-            if arr32.size == 128:
-                return arr32.astype(np.float32, copy=False)
-        if len(b) % 8 == 0:
-            arr64 = np.frombuffer(b, dtype=np.float64)
-            if arr64.size == 128:
-                return arr64.astype(np.float32)
-        try:
-            s = b.decode("utf-8", errors="ignore")
-            arr = np.fromstring(s, sep=",", dtype=np.float32)
-            if arr.size == 128:
-                return arr
-        except Exception:
-            return None
-    if isinstance(vec, str):
-        s = vec.strip().replace("[", "").replace("]", "")
-        arr = np.fromstring(s, sep=",", dtype=np.float32)
-        return arr if arr.size == 128 else None
-    return None
-
-
-def load_students(db_path: str) -> List[Tuple[str, str, str, np.ndarray]]:
-    conn = sqlite3.connect(db_path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
-    cur = conn.cursor()
-    cur.execute("SELECT ad, soyad, okul_numarasi, yuz_vektoru FROM ogrenciler")
-    rows = cur.fetchall()
-    conn.close()
-
-    students = []
-    for ad, soyad, okul, vec in rows:
-        v = _to_arr(vec)
-        if v is None or not np.isfinite(v).all():
-            continue
-        students.append((ad, soyad, okul, v.astype(np.float32, copy=False)))
-    print(f"{len(students)} öğrenci yüklendi (CPU).")
-    return students
+QUEUE_SIZE = int(os.environ.get("PIPELINE_QUEUE_SIZE", "2"))
+# 0: encoding tanıma iş parçacığında; >0: bu kadar işçi sürece dağıtılır
+ENCODE_WORKERS = int(os.environ.get("ENCODE_WORKERS", "0"))
+# 0: YOLO her frame'de; >0: YOLO aralığı bu FPS hedefine göre ayarlanır, arada optik akış
+DETECT_TARGET_FPS = float(os.environ.get("DETECT_TARGET_FPS", "0"))
+DETECT_MAX_INTERVAL = int(os.environ.get("DETECT_MAX_INTERVAL", "8"))
+PRESENCE_FLUSH_SEC = float(os.environ.get("PRESENCE_FLUSH_SEC", "1.0"))
+# 1: galeri DB yanındaki mmap anlık görüntüsünden açılır (bayatsa yeniden derlenir)
+GALLERY_SNAPSHOT = os.environ.get("GALLERY_SNAPSHOT", "1") == "1"
+CAMERA_INDEX = int(os.environ.get("CAMERA_INDEX", "2"))
+# Çok kamera: virgülle ayrılmış kaynaklar; sayı V4L2 cihazı, diğerleri URL / dosya
+# (ör. "2,4" ya da "2,rtsp://10.0.0.5/stream"). Boşsa yalnızca CAMERA_INDEX.
+CAMERA_SOURCES = [s.strip() for s in os.environ.get("CAMERA_SOURCES", "").split(",") if s.strip()] or [CAMERA_INDEX]
+# 1: canlı durum Unix soketinden de yayınlanır (canli_yayin); istatistik dosyası her durumda yazılır
+LIVE_CHANNEL = os.environ.get("ATTENDANCE_LIVE_CHANNEL", "1") == "1"
 
 
 def match_face(
     encoding: np.ndarray,
-    students_list: List[Tuple[str, str, str, np.ndarray]],
+    students_list,
     thr: float = 0.55,
 ):
     """
     En iyi eşleşen öğrencinin ad+soyad'ını ve okul numarasını döndürür.
     Eşik üzerindeyse veya geçersizse 'Bilinmiyor', inf, None döner.
+    students_list: Galeri ya da load_students listesi (liste ise her çağrıda galeri kurulur).
     """
     if encoding is None or encoding.size != 128:
         return "Bilinmiyor", float("inf"), None
 
-    enc = np.asarray(encoding, dtype=np.float32, order="C")
-    best_dist = float("inf")
-    best_name = "Bilinmiyor"
-    best_okul = None
+    galeri = students_list if isinstance(students_list, Galeri) else Galeri.from_students(students_list)
+    return galeri.match_all(encoding, thr=thr)[0]
+
+
+def downscale(frame: np.ndarray) -> np.ndarray:
+    if DOWNSCALE == 1.0:
+        return frame
+    return cv2.resize(
+        frame,
+        (
+            int(frame.shape[1] * DOWNSCALE),
+            int(frame.shape[0] * DOWNSCALE),
+        ),
+        interpolation=cv2.INTER_AREA,
+    )
+
+
+def open_camera(source: Union[int, str]):
+    """Sayı (ya da sayı metni) V4L2 cihazı olarak, diğerleri OpenCV'nin seçtiği arka uçla açılır."""
+    if isinstance(source, int) or str(source).isdigit():
+        return cv2.VideoCapture(int(source), cv2.CAP_V4L2)
+    return cv2.VideoCapture(source)
+
+
+def draw_results(frame: np.ndarray, boxes, matches) -> None:
+    for (x1, y1, x2, y2), (name, dist, okul_no) in zip(boxes, matches):
+        color = (0, 255, 0) if name != "Bilinmiyor" else (0, 0, 255)
+        label = f"{name} ({dist:.2f})"
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(
+            frame,
+            label,
+            (x1, y1 - 8),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            color,
+            2,
+        )
+
+
+class DetectStage:
+    """
+    Downscale + YOLO (uyarlanabilir aralıkla) + aradaki frame'lerde optik akışla kutu taşıma.
+    detector: frame -> kutular (dedektor.make_detector; ultralytics ya da ONNX Runtime).
+    Çok kamerada kadans ve optik akış kamera başınadır; o turda YOLO gereken tüm kameraların
+    frame'leri tek batch çağrısıyla tespit edilir.
+    """
 
-    for ad, soyad, okul, vec in students_list:
-        d = float(np.linalg.norm(enc - vec))
-        if d < best_dist:
-            best_dist = d
-            best_name = f"{ad} {soyad}"
-            best_okul = okul
+    def __init__(
+        self,
+        detector,
+        target_fps: float = DETECT_TARGET_FPS,
+        max_interval: int = DETECT_MAX_INTERVAL,
+        timings: Optional[StageTimings] = None,
+    ):
+        self.detector = detector
+        self.target_fps = target_fps
+        self.max_interval = max_interval
+        self._cams: Dict[int, Tuple[AdaptiveCadence, FlowBoxTracker]] = {}
+        self.timings = timings if timings is not None else StageTimings()
+
+    def _state(self, cam: int) -> Tuple[AdaptiveCadence, FlowBoxTracker]:
+        st = self._cams.get(cam)
+        if st is None:
+            st = self._cams[cam] = (AdaptiveCadence(self.target_fps, max_interval=self.max_interval),
+                                    FlowBoxTracker())
+        return st
+
+    @property
+    def cadence(self) -> AdaptiveCadence:
+        """Tek kamera (kamera 0) kadansı."""
+        return self._state(0)[0]
+
+    def cadence_stats(self):
+        if len(self._cams) <= 1:
+            return self.cadence.stats()
+        return {str(cam): cadence.stats() for cam, (cadence, _) in sorted(self._cams.items())}
+
+    def process(self, pkt: FramePacket) -> FramePacket:
+        return self.process_set([pkt])[0]
+
+    def process_set(self, pkts: List[FramePacket]) -> List[FramePacket]:
+        t0 = time.perf_counter()
+        states = [self._state(pkt.cam) for pkt in pkts]
+        grays = []
+        with self.timings.stage("resize"):
+            for pkt, (cadence, _) in zip(pkts, states):
+                pkt.frame = downscale(pkt.frame)
+                grays.append(cv2.cvtColor(pkt.frame, cv2.COLOR_BGR2GRAY) if cadence.enabled else None)
+
+        detect = [cadence.should_detect(force=flow.lost) for cadence, flow in states]
+        todo = [i for i, d in enumerate(detect) if d]
+        if todo:
+            with self.timings.stage("yolo"):
+                found = detect_batch(self.detector, [pkts[i].frame for i in todo])
+            for i, boxes in zip(todo, found):
+                pkts[i].boxes = boxes
+                if grays[i] is not None:
+                    states[i][1].reset(grays[i], boxes)
+        for i, pkt in enumerate(pkts):
+            if not detect[i]:
+                # YOLO atlandı: son kutular optik akışla taşınır
+                with self.timings.stage("flow"):
+                    pkt.boxes = states[i][1].step(grays[i])
+            pkt.current_faces = len(pkt.boxes)
+
+        elapsed = time.perf_counter() - t0
+        for (cadence, _), d in zip(states, detect):
+            cadence.record(d, elapsed)
+        return pkts
+
+
+class RecognizeStage:
+    """
+    İz takibi + encode + galeri eşleştirmesi + yoklama/dikkat takibi (bir ders boyunca).
+    Çok kamerada iz takibi kamera başınadır (kutular kendi görüntü koordinatında); kimlikler
+    tek bir dikkat durumunda birleşir: öğrenci herhangi bir kamerada görünüyorsa görünür sayılır.
+    """
 
-    if (not np.isfinite(best_dist)) or best_dist >= thr:
-        return "Bilinmiyor", best_dist, None
+    def __init__(
+        self,
+        galeri: Galeri,
+        encode,
+        presence: PresenceWriter,
+        thr: float = MATCH_THR,
+        timings: Optional[StageTimings] = None,
+        live: Optional[LivePublisher] = None,
+    ):
+        self.galeri = galeri
+        self.encode = encode
+        self.presence = presence
+        self.thr = thr
+        self.trackers: Dict[int, FaceTracker] = {}
+        # Kamera başına son frame'de tanınan kimlikler (o turda frame'i gelmeyen kamera da sayılır)
+        self._cam_ids: Dict[int, Set[str]] = {}
+        self.current_faces = 0
+        self.max_faces_seen = 0
+        self.timings = timings if timings is not None else StageTimings()
+        self.live = live
+        self._published_counts = (-1, -1)
+
+    def _tracker(self, cam: int) -> FaceTracker:
+        tracker = self.trackers.get(cam)
+        if tracker is None:
+            tracker = self.trackers[cam] = FaceTracker()
+        return tracker
+
+    @property
+    def tracker(self) -> FaceTracker:
+        """Tek kamera (kamera 0) iz takibi."""
+        return self._tracker(0)
+
+    def process(self, pkt: FramePacket) -> FramePacket:
+        return self.process_set([pkt])[0]
+
+    def process_set(self, pkts: List[FramePacket]) -> List[FramePacket]:
+        now = max(pkt.ts for pkt in pkts)
+        gained_all: List[str] = []
+        for pkt in pkts:
+            # Yalnızca yeni / doğrulama zamanı gelmiş izler encode edilir (tek RGB dönüşümü + tek
+            # encode çağrısı + tek galeri eşleştirmesi); diğerleri kimliğini izden alır.
+            tracks, gained = self._tracker(pkt.cam).recognize(
+                pkt.boxes, pkt.frame, self.encode, self.galeri, self.thr, timings=self.timings
+            )
+            pkt.matches = [t.match() for t in tracks]
+            self._cam_ids[pkt.cam] = {t.okul_no for t in tracks if t.okul_no is not None}
+
+            # Yoklama (RAM'e; disk yazımı arka planda) yalnızca iz yeni kimlik kazandığında
+            for okul_no in gained:
+                self.presence.mark(okul_no)
+            gained_all.extend(gained)
+
+        recognized_ids = set().union(*self._cam_ids.values())
+        # Aynı öğrenci iki kamerada birden görünebilir: yüz sayısı, en kalabalık kamera ile
+        # tekil tanınan kimlik sayısının büyüğü (tek kamerada kutu sayısı)
+        self.current_faces = max(max(pkt.current_faces for pkt in pkts), len(recognized_ids))
+        self.max_faces_seen = update_max(self.max_faces_seen, self.current_faces)
+
+        # Dikkat takibi birleşik kimliklerden
+        with self.timings.stage("attention"):
+            for okul_no in recognized_ids:
+                mark_seen(okul_no, now)
+
+            # Hiçbir kamerada görünmeyen aktif öğrenciler için 30 sn kaybolma kontrolü
+            appeared, disappeared, expired = update_missing(recognized_ids, now, timeout=30.0)
+
+        if self.live is not None:
+            self._publish(gained_all, appeared | disappeared | set(expired))
+        return pkts
+
+    def _publish(self, gained, changed) -> None:
+        """Yalnızca durumu değişen öğrenciler ve değişen sayaçlar yayınlanır."""
+        for okul_no in changed.union(gained):
+            visible, attentive = student_state(okul_no)
+            self.live.student(okul_no, self.presence.is_present(okul_no), visible, attentive)
+        counts = (self.current_faces, self.max_faces_seen)
+        if counts != self._published_counts:
+            self._published_counts = counts
+            self.live.stats(stats_payload(*counts))
+
+    def stats(self):
+        trackers = self.trackers.values()
+        return {
+            "tracks": sum(len(t.tracks) for t in trackers),
+            "encoded": sum(t.recognized_count for t in trackers),
+            "reused": sum(t.reused_count for t in trackers),
+        }
+
+
+def finish_lesson(record_start_time: float, presence: PresenceWriter, db_path: str, end_time: float) -> None:
+    """
+    Ders sonu: bekleyen yoklamaları kesin olarak yaz, ardından dikkat oranları, ders yoklama
+    geçmişi (session_attendance) ve zaman çizelgeleri.
+    """
+    presence.close()
+    write_attentions_to_db(record_start_time, db_path, now=end_time)
+    write_session_attendance(record_start_time, presence.present_ids(), db_path, now=end_time)
+    write_timelines_to_db(record_start_time, db_path, now=end_time)
 
-    return best_name, best_dist, best_okul
 
+class Recognizer:
+    """
+    Dersler arası sıcak tutulan kaynaklar: encode havuzu, galeri (+ANN, canlı yenileme) ve dedektör.
+    Her ders run_lesson ile başlar; ders durumu (takip, yoklama yazıcısı, aşamalar) ders başına
+    yeniden kurulur, süreç kapanmaz (tanima_servisi bunu kullanır).
+    """
 
-def main():
-    students = load_students(DB_PATH)
-    model = YOLO(MODEL_PATH)
-    cap = cv2.VideoCapture(2, cv2.CAP_V4L2)
-    if not cap.isOpened():
-        raise RuntimeError("Kamera açılamadı.")
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        # İşçi süreçler fork ile açılır; YOLO yüklenmeden ve iş parçacıkları başlamadan önce kurulmalı
+        self.encode_pool = EncodePool(ENCODE_WORKERS) if ENCODE_WORKERS > 0 else None
+        self.encode = self.encode_pool.encode if self.encode_pool is not None else encode_faces
+
+        galeri = load_gallery(db_path) if GALLERY_SNAPSHOT else Galeri.from_rows(load_student_rows(db_path))
+        if ANN_MIN_GALLERY > 0 and len(galeri) >= ANN_MIN_GALLERY:
+            galeri.index = load_or_build(galeri, db_path)
+        self.galeri = galeri
+        self.face_detector = make_detector(DETECTOR_BACKEND, MODEL_PATH, IMGSZ)
+        self._stage: Optional[RecognizeStage] = None
+        self.live: Optional[LivePublisher] = None
+        if LIVE_CHANNEL:
+            try:
+                self.live = LivePublisher().start()
+            except OSError as e:
+                print(f"[CANLI] Yayın soketi açılamadı, yalnızca dosya yazılacak: {e}")
+        self.lessons = 0
+        # Son dersin kapanış yazımı hatası (None: kayıt tamam)
+        self.last_finish_error: Optional[Exception] = None
+
+        # Yeni kaydedilen öğrenciler: galeri arka planda güncellenir, tanıma bir sonraki frame'de yenisini kullanır
+        self.reloader = (GalleryReloader(db_path, lambda: self.galeri, self._set_galeri).start()
+                         if GALLERY_RELOAD_SEC > 0 else None)
+
+    def _set_galeri(self, g: Galeri) -> None:
+        self.galeri = g
+        stage = self._stage
+        if stage is not None:
+            stage.galeri = g
+
+    def close(self) -> None:
+        if self.reloader is not None:
+            self.reloader.stop()
+        if self.live is not None:
+            self.live.close()
+        if self.encode_pool is not None:
+            self.encode_pool.close()
+
+    def run_lesson(
+        self,
+        stop: threading.Event,
+        sources: Optional[Sequence[Union[int, str]]] = None,
+        on_started: Optional[Callable[[float], None]] = None,
+    ) -> float:
+        """
+        Bir dersi stop set edilene (ya da pencerede 'q') kadar çalıştırır, sonunda yoklama +
+        dikkat + zaman çizelgelerini yazar. on_started(ders başlangıcı) kameralar açılınca çağrılır.
+        sources: kamera kaynakları (varsayılan CAMERA_SOURCES; tek int de verilebilir).
+        Dönüş: ders başlangıç zamanı.
+        """
+        self.last_finish_error = None
+        if sources is None:
+            sources = CAMERA_SOURCES
+        elif isinstance(sources, (int, str)):
+            sources = [sources]
+        caps = []
+        for source in sources:
+            cap = open_camera(source)
+            if not cap.isOpened():
+                for c in caps:
+                    c.release()
+                raise RuntimeError(f"Kamera açılamadı: {source}")
+            caps.append(cap)
+        multi = len(caps) > 1
+
+        # Ders başlangıç zamanı ve takip reset'i
+        record_start_time = time.time()
+        reset_tracking()
+        try:
+            start_session(record_start_time, self.db_path)
+        except sqlite3.Error as e:
+            # Ders yine başlar; ders satırı sonda write_session_attendance ile açılır
+            print(f"[DB] Ders başlangıcı yazılamadı: {e}")
+        timings = StageTimings()
+        rate = RateMeter()
+        presence = PresenceWriter(self.db_path, interval=PRESENCE_FLUSH_SEC, timings=timings)
+        detector = DetectStage(self.face_detector, timings=timings)
+        live = self.live
+        recognizer = RecognizeStage(self.galeri, self.encode, presence, timings=timings, live=live)
+        self._stage = recognizer
+        reloader = self.reloader
+        last_write = [0.0]  # yalnızca tanıma iş parçacığı değiştirir
+
+        # Aşamalar: yakalama (kamera başına, yalnızca en yeni frame) -> tespit (tüm kameralar tek
+        # batch) -> tanıma -> gösterim (bu iş parçacığı). Kuyruklarda tur başına frame listesi taşınır.
+        frame_cond = threading.Condition()
+        grabbers = [
+            LatestFrameGrabber(cap, name=f"capture{i}" if multi else "capture", timings=timings,
+                               cam=i, cond=frame_cond)
+            for i, cap in enumerate(caps)
+        ]
+        reader = MultiFrameReader(grabbers, frame_cond)
+        det_q = DropOldestQueue(QUEUE_SIZE, "detect->recognize")
+        disp_q = DropOldestQueue(QUEUE_SIZE, "recognize->display")
+        windows = [f"YOLOv8 + DLIB (CPU) - kamera {src}" if multi else "YOLOv8 + DLIB (CPU)" for src in sources]
+
+        def stats_extra():
+            queues = {g.name: g.stats() for g in grabbers}
+            queues.update(detect=det_q.stats(), display=disp_q.stats())
+            return {
+                "fps": round(rate.update(), 2),
+                "dropped": sum(q["dropped"] for q in queues.values()),
+                "stages": timings.snapshot(),
+                "queues": queues,
+                "tracker": recognizer.stats(),
+                "cadence": detector.cadence_stats(),
+                "cameras": len(caps),
+                "gallery": dict(size=recognizer.galeri.n_students, **(reloader.stats() if reloader else {})),
+            }
+
+        def recognize_stage(pkts: List[FramePacket]) -> List[FramePacket]:
+            recognizer.process_set(pkts)
+            rate.tick()
+            ts = max(pkt.ts for pkt in pkts)
+            if ts - last_write[0] >= 0.5:
+                payload = write_stats(recognizer.current_faces, recognizer.max_faces_seen, STATS_PATH,
+                                      extra=stats_extra())
+                if live is not None:
+                    live.stats(payload)
+                last_write[0] = ts
+            return pkts
+
+        workers = [
+            StageWorker("detect", reader.read, detector.process_set, det_q.put, stop),
+            StageWorker("recognize", det_q.get, recognize_stage, disp_q.put, stop),
+        ]
+
+        presence.start()
+        for grabber in grabbers:
+            grabber.start()
+        for wk in workers:
+            wk.start()
+        if live is not None:
+            live.lesson("started", record_start_time)
+        if on_started is not None:
+            on_started(record_start_time)
 
-    max_faces_seen = 0
-    last_write = 0.0
+        try:
+            while not stop.is_set():
+                pkts = disp_q.get(timeout=0.05) or []
+                t0 = time.perf_counter()
+                for pkt in pkts:
+                    draw_results(pkt.frame, pkt.boxes, pkt.matches)
+                    cv2.imshow(windows[pkt.cam], pkt.frame)
+                key = cv2.waitKey(1) & 0xFF
+                if pkts:
+                    t1 = time.perf_counter()
+                    timings.record("display", t1 - t0)
+                    for pkt in pkts:
+                        timings.record("end_to_end", t1 - pkt.t0)
+                if key == ord("q"):
+                    break
+        finally:
+            stop.set()
+            det_q.close()
+            disp_q.close()
+            for wk in workers:
+                wk.join(timeout=5.0)
+            for grabber in grabbers:
+                grabber.stop()
+            self._stage = None
+
+            # Ders sonunda yoklama, dikkat oranları ve görünürlük zaman çizelgeleri DB'ye.
+            # Hata kapanışı yarıda kesmez (kameralar yine bırakılır) ama yutulmaz: kaydedilir ve
+            # temizlikten sonra fırlatılır (tanima_servisi 'stop' yanıtında / last_error'da bildirir)
+            finish_error: Optional[Exception] = None
+            try:
+                finish_lesson(record_start_time, presence, self.db_path, end_time=time.time())
+            except Exception as e:
+                finish_error = e
+                print(f"[DB] Ders kaydı yazılamadı (yoklama / dikkat / ders geçmişi): {type(e).__name__}: {e}")
+            self.last_finish_error = finish_error
+
+            for cap in caps:
+                cap.release()
+            cv2.destroyAllWindows()
+            payload = write_stats(0, recognizer.max_faces_seen, STATS_PATH, extra=stats_extra())
+            if live is not None:
+                live.stats(payload)
+                live.lesson("ended", record_start_time)
+            self.lessons += 1
+
+        for wk in workers:
+            if wk.error is not None:
+                raise wk.error
+        if finish_error is not None:
+            raise RuntimeError(f"Ders kaydı yazılamadı: {finish_error}") from finish_error
+        return record_start_time
 
-    # Ders başlangıç zamanı ve takip reset'i
-    record_start_time = time.time()
-    reset_tracking()
 
+def main():
+    rec = Recognizer()
     try:
-        while True:
-            now = time.time()
-
-            ok, frame = cap.read()
-            if not ok or frame is None:
-                continue
-
-            if DOWNSCALE != 1.0:
-                frame = cv2.resize(
-                    frame,
-                    (
-                        int(frame.shape[1] * DOWNSCALE),
-                        int(frame.shape[0] * DOWNSCALE),
-                    ),
-                    interpolation=cv2.INTER_AREA,
-                )
-
-            res = model(frame, device="cpu", verbose=False, imgsz=IMGSZ)[0]
-            boxes = [] if (res.boxes is None) else res.boxes
-            current_faces = int(len(boxes))
-            max_faces_seen = update_max(max_faces_seen, current_faces)
-
-            h, w = frame.shape[:2]
-            recognized_ids = set()
-
-            for box in boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                x1 = max(0, min(x1, w - 1))
-                x2 = max(0, min(x2, w - 1))
-                y1 = max(0, min(y1, h - 1))
-                y2 = max(0, min(y2, h - 1))
-                if x2 <= x1 or y2 <= y1:
-                    continue
-
-                roi = frame[y1:y2, x1:x2]
-                if roi.size == 0:
-                    continue
-
-                rgb = cv2.cvtColor(roi, cv2.COLOR_BGR2RGB)
-                encs = face_recognition.face_encodings(rgb, num_jitters=1, model="small")
-                if not encs:
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                    cv2.putText(
-                        frame,
-                        "No encoding",
-                        (x1, y1 - 8),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.6,
-                        (0, 0, 255),
-                        2,
-                    )
-                    continue
-
-                encoding = np.asarray(encs[0], dtype=np.float32).reshape(-1)
-                name, dist, okul_no = match_face(encoding, students, thr=MATCH_THR)
-
-                color = (0, 255, 0) if name != "Bilinmiyor" else (0, 0, 255)
-                label = f"{name} ({dist:.2f})"
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(
-                    frame,
-                    label,
-                    (x1, y1 - 8),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.7,
-                    color,
-                    2,
-                )
-
-                # Eğer öğrenci biliniyorsa: yoklama + dikkat takibi
-                if okul_no is not None:
-                    recognized_ids.add(okul_no)
-                    mark_present(okul_no, DB_PATH)
-                    mark_seen(okul_no, now)
-
-            # Bu frame'de görünmeyen aktif öğrenciler için 30 sn kaybolma kontrolü
-            update_missing(recognized_ids, now, timeout=30.0)
-
-            if now - last_write >= 0.5:
-                write_stats(current_faces, max_faces_seen, STATS_PATH)
-                last_write = now
-
-            cv2.imshow("YOLOv8 + DLIB (CPU)", frame)
-            if cv2.waitKey(1) & 0xFF == ord("q"):
-                break
+        rec.run_lesson(threading.Event())
+    except KeyboardInterrupt:
+        # gui_app eski yolda SIGINT gönderir; ders kapanışı run_lesson'ın finally bloğunda yapıldı
+        pass
     finally:
-        # Ders sonunda dikkat oranlarını DB'ye yaz
-        try:
-            write_attentions_to_db(record_start_time, DB_PATH)
-        except Exception:
-            # Burada sessiz geçmek daha güvenli; kamera kapanırken crash istemeyiz.
-            pass
-
-        cap.release()
-        cv2.destroyAllWindows()
-        write_stats(0, max_faces_seen, STATS_PATH)
+        rec.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,148 @@
+# ============================================
+# file: kadans.py
+# Uyarlanabilir YOLO çalıştırma aralığı + aradaki frame'lerde optik akışla kutu taşıma
+# ============================================
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import cv2
+
+Box = Tuple[int, int, int, int]
+
+
+class AdaptiveCadence:
+    """
+    YOLO'nun kaç frame'de bir çalışacağını (k) ölçülen gecikmeye göre ayarlar.
+    Hedef: ortalama frame süresi <= 1 / target_fps.
+        ort = (t_det + (k - 1) * t_trk) / k  =>  k >= (t_det - t_trk) / (bütçe - t_trk)
+    t_det / t_trk: YOLO'lu ve izlemeli frame sürelerinin üssel ortalaması (EMA).
+    """
+
+    def __init__(self, target_fps: float, max_interval: int = 8, alpha: float = 0.2):
+        self.budget = 1.0 / target_fps if target_fps > 0 else 0.0
+        self.max_interval = max(1, int(max_interval))
+        self.alpha = alpha
+        self.interval = 1
+        self._since_detect = 0
+        self._t_det: Optional[float] = None
+        self._t_trk: Optional[float] = None
+        # Sayaçlar
+        self.detector_runs = 0
+        self.skipped = 0
+        self.forced = 0   # izleyici kutuyu kaybettiği için aralık dolmadan yapılan çalıştırma
+
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0
+
+    def should_detect(self, force: bool = False) -> bool:
+        if not self.enabled or self._since_detect == 0 or self._since_detect >= self.interval:
+            return True
+        if force:
+            self.forced += 1
+            return True
+        return False
+
+    def record(self, detected: bool, latency_s: float) -> None:
+        """Bir frame'in işlenme süresini kaydeder ve k'yı yeniden hesaplar."""
+        if detected:
+            self.detector_runs += 1
+            self._since_detect = 1
+            self._t_det = latency_s if self._t_det is None else self._t_det + self.alpha * (latency_s - self._t_det)
+        else:
+            self.skipped += 1
+            self._since_detect += 1
+            self._t_trk = latency_s if self._t_trk is None else self._t_trk + self.alpha * (latency_s - self._t_trk)
+        self._adjust()
+
+    def _adjust(self) -> None:
+        if not self.enabled or self._t_det is None:
+            return
+        if self._t_det <= self.budget:
+            self.interval = 1
+            return
+        t_trk = self._t_trk if self._t_trk is not None else 0.0
+        if t_trk >= self.budget:
+            self.interval = self.max_interval
+            return
+        need = (self._t_det - t_trk) / (self.budget - t_trk)
+        self.interval = int(min(self.max_interval, max(1, np.ceil(need))))
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "interval": self.interval,
+            "detector_runs": self.detector_runs,
+            "skipped": self.skipped,
+            "forced": self.forced,
+        }
+
+
+class FlowBoxTracker:
+    """
+    Son YOLO kutularını Lucas-Kanade optik akışıyla sonraki frame'lere taşır.
+    Her kutu, içindeki köşe noktalarının medyan yer değiştirmesi kadar kaydırılır.
+    Bir kutunun yeterli noktası kalmazsa `lost` olur ve bir sonraki frame'de YOLO zorlanır.
+    """
+
+    def __init__(self, max_corners: int = 20, min_points: int = 3):
+        self.max_corners = max_corners
+        self.min_points = min_points
+        self._prev_gray: Optional[np.ndarray] = None
+        self._boxes: List[Box] = []
+        self._points: List[Optional[np.ndarray]] = []
+        self.lost = False
+
+    def reset(self, gray: np.ndarray, boxes: Sequence[Box]) -> None:
+        """YOLO çalıştıktan sonra kutuları ve izlenecek noktaları yeniler."""
+        self._prev_gray = gray
+        self._boxes = list(boxes)
+        self._points = [self._corners(gray, b) for b in self._boxes]
+        self.lost = any(p is None for p in self._points)
+
+    def _corners(self, gray: np.ndarray, box: Box) -> Optional[np.ndarray]:
+        x1, y1, x2, y2 = box
+        mask = np.zeros_like(gray)
+        mask[y1:y2, x1:x2] = 255
+        pts = cv2.goodFeaturesToTrack(gray, self.max_corners, 0.01, 3, mask=mask)
+        if pts is None or len(pts) < self.min_points:
+            return None
+        return pts.astype(np.float32)
+
+    def step(self, gray: np.ndarray) -> List[Box]:
+        """Kutuları yeni frame'e taşır; kaybedilen kutular listeden çıkar."""
+        if self._prev_gray is None or not self._boxes:
+            self._prev_gray = gray
+            return list(self._boxes)
+
+        h, w = gray.shape[:2]
+        new_boxes: List[Box] = []
+        new_points: List[Optional[np.ndarray]] = []
+        lost = False
+        for box, pts in zip(self._boxes, self._points):
+            if pts is None:
+                lost = True
+                continue
+            nxt, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, pts, None)
+            if nxt is None or status is None:
+                lost = True  # akış hesaplanamadı: bu kutu için tespite dönülür
+                continue
+            ok = status.reshape(-1) == 1
+            if int(ok.sum()) < self.min_points:
+                lost = True
+                continue
+            dx, dy = np.median((nxt - pts).reshape(-1, 2)[ok], axis=0)
+            x1, y1, x2, y2 = box
+            bw, bh = x2 - x1, y2 - y1
+            nx1 = int(round(max(0, min(x1 + dx, w - 1 - bw))))
+            ny1 = int(round(max(0, min(y1 + dy, h - 1 - bh))))
+            new_boxes.append((nx1, ny1, nx1 + bw, ny1 + bh))
+            new_points.append(nxt[ok].reshape(-1, 1, 2))
+
+        self._prev_gray = gray
+        self._boxes = new_boxes
+        self._points = new_points
+        self.lost = lost
+        return list(new_boxes)
@@ -0,0 +1,123 @@
+# ============================================
+# file: kodlama_havuzu.py
+# Yüz encoding'lerini süreç havuzuna dağıtma (opsiyonel, ENCODE_WORKERS > 0)
+# ============================================
+
+from __future__ import annotations
+
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import cv2
+import face_recognition
+
+from tanima import Box, encode_faces, to_dlib_locations
+
+# Bu sayının altındaki yüz sayısında süreçler arası gidip gelmeye değmez
+MIN_FACES_FOR_POOL = 2
+
+# ---- İşçi süreç tarafı ----
+# İşçi başına açık paylaşımlı bellek bağlantıları (ad -> SharedMemory)
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _worker_init() -> None:
+    """
+    İşçi başına bir kez çalışır: dlib modelleri face_recognition import'unda yüklenir;
+    burada küçük bir çağrıyla ısıtılır ki ilk frame'de gecikme olmasın.
+    """
+    dummy = np.zeros((32, 32, 3), dtype=np.uint8)
+    face_recognition.face_encodings(dummy, known_face_locations=[(0, 31, 31, 0)], model="small")
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    shm = _attached.get(name)
+    if shm is None:
+        # Ana süreç tamponu büyüttüyse eski bağlantılar artık kullanılmaz
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+    return shm
+
+
+def _encode_chunk(task) -> List[np.ndarray]:
+    """Paylaşımlı bellekteki RGB frame üzerinde verilen kutuların encoding'lerini çıkarır."""
+    name, shape, boxes, model = task
+    shm = _attach(name)
+    rgb = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+    encs = face_recognition.face_encodings(
+        rgb,
+        known_face_locations=to_dlib_locations(boxes),
+        num_jitters=1,
+        model=model,
+    )
+    return [np.asarray(e, dtype=np.float32).reshape(-1) for e in encs]
+
+
+# ---- Ana süreç tarafı ----
+class EncodePool:
+    """
+    Bir frame'deki yüzleri işçi süreçlere böler.
+    - Frame bir kez RGB'ye çevrilip doğrudan paylaşımlı belleğe yazılır (pickle yok);
+      işçilere yalnızca bellek adı, şekil ve kutu listesi gider.
+    - Sonuçlar kutu sırasıyla birleştirilir; encode() frame başına senkron olduğundan
+      frame sırası da korunur.
+    """
+
+    def __init__(self, workers: int, model: str = "small"):
+        if workers < 1:
+            raise ValueError("workers en az 1 olmalı.")
+        self.workers = workers
+        self.model = model
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        # fork: işçiler __main__'i (ultralytics import'u dahil) yeniden yüklemesin.
+        # Havuz, YOLO yüklenmeden ve iş parçacıkları başlamadan önce kurulmalı.
+        ctx = mp.get_context("fork")
+        self._pool = ctx.Pool(processes=workers, initializer=_worker_init)
+
+    def _frame_buffer(self, shape) -> np.ndarray:
+        size = int(np.prod(shape))
+        if self._shm is None or self._shm.size < size:
+            self._release_shm()
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        return np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf)
+
+    def encode(self, frame_bgr: np.ndarray, boxes: Sequence[Box]) -> List[np.ndarray]:
+        """tanima.encode_faces ile aynı sözleşme: boxes sırasıyla (128,) float32 vektörler."""
+        if len(boxes) < MIN_FACES_FOR_POOL:
+            return encode_faces(frame_bgr, boxes, model=self.model)
+
+        shape = frame_bgr.shape
+        rgb = self._frame_buffer(shape)
+        cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB, dst=rgb)
+
+        # Kutuları sırayı bozmadan ardışık parçalara böl
+        n_chunks = min(self.workers, len(boxes))
+        bounds = np.linspace(0, len(boxes), n_chunks + 1).astype(int)
+        tasks = [
+            (self._shm.name, shape, list(boxes[a:b]), self.model)
+            for a, b in zip(bounds[:-1], bounds[1:])
+            if b > a
+        ]
+        out: List[np.ndarray] = []
+        for chunk in self._pool.map(_encode_chunk, tasks):
+            out.extend(chunk)
+        return out
+
+    def _release_shm(self) -> None:
+        if self._shm is not None:
+            try:
+                self._shm.close()
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = None
+
+    def close(self) -> None:
+        self._pool.terminate()
+        self._pool.join()
+        self._release_shm()
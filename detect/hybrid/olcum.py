@@ -0,0 +1,120 @@
+# ============================================
+# file: olcum.py
+# Aşama bazlı gecikme ölçümü: sabit kovalı histogramlar (p50/p95/p99, adet)
+# Monotonik saat (time.perf_counter) kullanılır; kovalar sabit olduğundan bellek ve
+# kayıt maliyeti ölçüm sayısından bağımsızdır.
+# ============================================
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+# 0.05 ms .. ~20 sn arası, her kova bir öncekinin ~1.25 katı (yüzdelik hatası <= %25)
+_BUCKET_BOUNDS_MS: List[float] = []
+_b = 0.05
+while _b < 20_000.0:
+    _BUCKET_BOUNDS_MS.append(round(_b, 4))
+    _b *= 1.25
+del _b
+
+
+class LatencyHistogram:
+    """Tek bir aşamanın gecikme dağılımı."""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKET_BOUNDS_MS) + 1)  # son kova: taşma
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        i = bisect.bisect_left(_BUCKET_BOUNDS_MS, ms)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    def percentile(self, p: float) -> float:
+        """p (0–100) yüzdeliği; ilgili kovanın üst sınırı (ms) olarak."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = max(1, int(round(self.count * p / 100.0)))
+            seen = 0
+            for i, c in enumerate(self.counts):
+                seen += c
+                if seen >= rank:
+                    return _BUCKET_BOUNDS_MS[i] if i < len(_BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, float]:
+        count = self.count
+        return {
+            "count": count,
+            "mean": round(self.total_ms / count, 3) if count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class StageTimings:
+    """Aşama adı -> histogram. Farklı iş parçacıklarından güvenle kaydedilebilir."""
+
+    def __init__(self):
+        self._hists: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def hist(self, name: str) -> LatencyHistogram:
+        h = self._hists.get(name)
+        if h is None:
+            with self._lock:
+                h = self._hists.setdefault(name, LatencyHistogram())
+        return h
+
+    def record(self, name: str, seconds: float) -> None:
+        self.hist(name).record(seconds)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.hist(name).record(time.perf_counter() - t0)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            items = list(self._hists.items())
+        return {name: h.snapshot() for name, h in items}
+
+
+class RateMeter:
+    """Son ölçümden bu yana geçen frame sayısından FPS."""
+
+    def __init__(self):
+        self._count = 0
+        self._t0 = time.perf_counter()
+        self.fps = 0.0
+
+    def tick(self) -> None:
+        self._count += 1
+
+    def update(self) -> float:
+        now = time.perf_counter()
+        dt = now - self._t0
+        if dt > 0:
+            self.fps = self._count / dt
+        self._count = 0
+        self._t0 = now
+        return self.fps
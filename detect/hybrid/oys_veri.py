@@ -0,0 +1,43 @@
+# ============================================
+# file: oys_veri.py
+# Tanıma tarafının veritabanı erişimi: OYS/veri_erisim.py (tek DB yolu ayarı, WAL, bağlantı havuzu)
+# OYS klasörü sırayla aranır: OYS_DIR, STUDENT_DB_PATH'in klasörü, depo içindeki ../../OYS
+# ============================================
+
+from __future__ import annotations
+
+import os
+import sys
+
+
+def _oys_dir() -> str:
+    here = os.path.dirname(os.path.abspath(__file__))
+    candidates = [
+        os.environ.get("OYS_DIR", ""),
+        os.path.dirname(os.environ.get("STUDENT_DB_PATH", "")),
+        os.path.join(here, os.pardir, os.pardir, "OYS"),
+        "/home/krm/Desktop/dlibenv/OYS",
+    ]
+    for d in candidates:
+        if d and os.path.isfile(os.path.join(d, "veri_erisim.py")):
+            return os.path.abspath(d)
+    raise ImportError("veri_erisim.py bulunamadı; OYS_DIR ile OYS klasörünü belirtin.")
+
+
+_dir = _oys_dir()
+if _dir not in sys.path:
+    sys.path.append(_dir)  # sona: tanıma modülleri OYS modülleriyle gölgelenmesin
+
+from veri_erisim import (  # noqa: E402
+    DB_PATH,
+    close_pool,
+    connect,
+    connection,
+    execute,
+    executemany,
+    fetchall,
+    fetchone,
+    migrate,
+    transaction,
+)
+
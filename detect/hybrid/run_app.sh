@@ -4,6 +4,9 @@ cd /home/krm/Desktop/detectenv/hybrid
 
 source /home/krm/Desktop/detectenv/bin/activate
 
+# Öğrenci DB yolu: OYS ve tanıma sistemi bu tek ayarı okur (veri_erisim.py)
+export STUDENT_DB_PATH="${STUDENT_DB_PATH:-/home/krm/Desktop/dlibenv/OYS/ogrenciler.db}"
+
 python gui_app.py
 
 
@@ -0,0 +1,214 @@
+# ============================================
+# file: takip.py
+# YOLO kutuları için hafif çoklu nesne takibi (IoU + merkez yakınlığı)
+# Kimliği doğrulanmış bir iz, her frame yeniden encode edilmez.
+# ============================================
+
+from __future__ import annotations
+
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from galeri import MatchResult, UNKNOWN_NAME
+from olcum import StageTimings
+
+Box = Tuple[int, int, int, int]
+
+TRACK_IOU = float(os.environ.get("TRACK_IOU", "0.3"))
+TRACK_MAX_MISSES = int(os.environ.get("TRACK_MAX_MISSES", "5"))
+# Kimliği olan iz bu kadar frame'de bir yeniden doğrulanır
+TRACK_REVERIFY_EVERY = int(os.environ.get("TRACK_REVERIFY_EVERY", "30"))
+# Kimliği olmayan (tanınmayan) iz bu kadar frame'de bir yeniden denenir
+TRACK_UNKNOWN_RETRY = int(os.environ.get("TRACK_UNKNOWN_RETRY", "5"))
+# Merkez, kutu boyutunun bu oranından fazla kayarsa "sıçrama" sayılır
+TRACK_JUMP_RATIO = float(os.environ.get("TRACK_JUMP_RATIO", "0.5"))
+
+
+def iou_matrix(a: Sequence[Box], b: Sequence[Box]) -> np.ndarray:
+    """(len(a), len(b)) IoU matrisi."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    A = np.asarray(a, dtype=np.float32)[:, None, :]
+    B = np.asarray(b, dtype=np.float32)[None, :, :]
+    iw = np.clip(np.minimum(A[..., 2], B[..., 2]) - np.maximum(A[..., 0], B[..., 0]), 0, None)
+    ih = np.clip(np.minimum(A[..., 3], B[..., 3]) - np.maximum(A[..., 1], B[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (A[..., 2] - A[..., 0]) * (A[..., 3] - A[..., 1])
+    area_b = (B[..., 2] - B[..., 0]) * (B[..., 3] - B[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+def _center_size(box: Box) -> Tuple[float, float, float]:
+    x1, y1, x2, y2 = box
+    return (x1 + x2) / 2.0, (y1 + y2) / 2.0, max(x2 - x1, y2 - y1, 1)
+
+
+class Track:
+    """Tek bir yüz izi: son kutu + (varsa) doğrulanmış kimlik."""
+
+    __slots__ = (
+        "track_id", "box", "okul_no", "name", "dist",
+        "misses", "last_recognized", "failed_checks", "jumped",
+    )
+
+    def __init__(self, track_id: int, box: Box):
+        self.track_id = track_id
+        self.box = box
+        self.okul_no: Optional[str] = None
+        self.name = UNKNOWN_NAME
+        self.dist = float("inf")
+        self.misses = 0
+        self.last_recognized = -1     # son encode edildiği frame numarası (-1: hiç)
+        self.failed_checks = 0        # kimlikli izde üst üste başarısız doğrulama
+        self.jumped = False
+
+    def match(self) -> MatchResult:
+        return self.name, self.dist, self.okul_no
+
+
+class FaceTracker:
+    """
+    Frame'ler arası kutu eşleştirme:
+    1) IoU >= iou_thr olan çiftler açgözlü (en yüksek IoU önce) eşleşir,
+    2) kalanlar merkez mesafesi kutu boyutunun jump_ratio katı içindeyse eşleşir
+       (bu durumda iz "sıçradı" sayılır ve kimliği yeniden doğrulanır),
+    3) eşleşmeyen kutular yeni iz açar; max_misses frame görünmeyen iz silinir.
+    """
+
+    def __init__(
+        self,
+        iou_thr: float = TRACK_IOU,
+        max_misses: int = TRACK_MAX_MISSES,
+        reverify_every: int = TRACK_REVERIFY_EVERY,
+        unknown_retry: int = TRACK_UNKNOWN_RETRY,
+        jump_ratio: float = TRACK_JUMP_RATIO,
+    ):
+        self.iou_thr = iou_thr
+        self.max_misses = max_misses
+        self.reverify_every = reverify_every
+        self.unknown_retry = unknown_retry
+        self.jump_ratio = jump_ratio
+        self.tracks: List[Track] = []
+        self._next_id = 1
+        self.frame_idx = 0
+        # Sayaçlar: kaç kutu encode edildi / kaçı izden kimlik aldı
+        self.recognized_count = 0
+        self.reused_count = 0
+        self.timings = StageTimings()
+
+    def reset(self) -> None:
+        self.tracks.clear()
+        self.frame_idx = 0
+
+    def update(self, boxes: Sequence[Box]) -> List[Track]:
+        """Bu frame'in kutularını izlere bağlar; boxes ile aynı sırada iz listesi döner."""
+        self.frame_idx += 1
+        out: List[Optional[Track]] = [None] * len(boxes)
+        free_tracks = set(range(len(self.tracks)))
+        free_boxes = set(range(len(boxes)))
+
+        ious = iou_matrix([t.box for t in self.tracks], boxes)
+        if ious.size:
+            for flat in np.argsort(-ious, axis=None):
+                ti, bi = np.unravel_index(flat, ious.shape)
+                if ious[ti, bi] < self.iou_thr:
+                    break
+                if ti in free_tracks and bi in free_boxes:
+                    self._attach(self.tracks[ti], boxes[bi], jumped=False)
+                    out[bi] = self.tracks[ti]
+                    free_tracks.discard(ti)
+                    free_boxes.discard(bi)
+
+        # Merkez yakınlığıyla ikinci tur (hızlı hareket / IoU düşük)
+        for bi in sorted(free_boxes):
+            bx, by, bs = _center_size(boxes[bi])
+            best, best_d = None, float("inf")
+            for ti in free_tracks:
+                tx, ty, ts = _center_size(self.tracks[ti].box)
+                d = ((bx - tx) ** 2 + (by - ty) ** 2) ** 0.5
+                if d <= self.jump_ratio * max(bs, ts) and d < best_d:
+                    best, best_d = ti, d
+            if best is not None:
+                self._attach(self.tracks[best], boxes[bi], jumped=True)
+                out[bi] = self.tracks[best]
+                free_tracks.discard(best)
+            else:
+                tr = Track(self._next_id, boxes[bi])
+                self._next_id += 1
+                self.tracks.append(tr)
+                out[bi] = tr
+
+        for ti in free_tracks:
+            self.tracks[ti].misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+        return out  # type: ignore[return-value]
+
+    @staticmethod
+    def _attach(track: Track, box: Box, jumped: bool) -> None:
+        track.box = box
+        track.misses = 0
+        track.jumped = track.jumped or jumped
+
+    def needs_recognition(self, track: Track) -> bool:
+        if track.last_recognized < 0 or track.jumped:
+            return True
+        age = self.frame_idx - track.last_recognized
+        if track.okul_no is None:
+            return age >= self.unknown_retry
+        return age >= self.reverify_every
+
+    def assign(self, track: Track, match: MatchResult) -> bool:
+        """
+        Encode + eşleştirme sonucunu ize işler.
+        Kimlikli iz, tek bir başarısız doğrulamayla kimliğini kaybetmez (iki üst üste gerekir).
+        Dönüş: iz yeni bir kimlik kazandıysa True.
+        """
+        name, dist, okul_no = match
+        track.last_recognized = self.frame_idx
+        track.jumped = False
+        self.recognized_count += 1
+
+        if okul_no is not None:
+            gained = okul_no != track.okul_no
+            track.name, track.dist, track.okul_no = name, dist, okul_no
+            track.failed_checks = 0
+            return gained
+
+        if track.okul_no is not None:
+            track.failed_checks += 1
+            if track.failed_checks < 2:
+                return False
+        track.name, track.dist, track.okul_no = UNKNOWN_NAME, dist, None
+        track.failed_checks = 0
+        return False
+
+    def recognize(
+        self,
+        boxes: Sequence[Box],
+        frame,
+        encode,
+        galeri,
+        thr: float,
+        timings: Optional[StageTimings] = None,
+    ) -> Tuple[List[Track], List[str]]:
+        """
+        Tek adımda: izleri güncelle, yalnızca gereken kutuları encode et ve eşleştir.
+        Dönüş: (boxes sırasıyla izler, bu frame'de yeni kimlik kazanan okul numaraları)
+        """
+        timings = timings if timings is not None else self.timings
+        with timings.stage("track"):
+            tracks = self.update(boxes)
+            todo = [i for i, t in enumerate(tracks) if self.needs_recognition(t)]
+        self.reused_count += len(tracks) - len(todo)
+        gained: List[str] = []
+        if todo:
+            with timings.stage("encode"):
+                encodings = encode(frame, [boxes[i] for i in todo])
+            with timings.stage("match"):
+                matches = galeri.match_all(encodings, thr=thr) if encodings else []
+            for i, m in zip(todo, matches):
+                if self.assign(tracks[i], m):
+                    gained.append(tracks[i].okul_no)
+        return tracks, gained
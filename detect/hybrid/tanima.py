@@ -0,0 +1,60 @@
+# ============================================
+# file: tanima.py
+# Tanıma aşaması: YOLO kutuları -> dlib encoding'leri (frame başına tek çağrı)
+# ============================================
+
+from __future__ import annotations
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import cv2
+import face_recognition
+
+# (x1, y1, x2, y2) piksel koordinatları, frame sınırlarına kırpılmış
+Box = Tuple[int, int, int, int]
+
+
+def yolo_boxes(res, w: int, h: int) -> List[Box]:
+    """YOLO (ultralytics) sonucundaki kutuları frame'e kırpar; boş/ters kutuları atar."""
+    if res.boxes is None or len(res.boxes) == 0:
+        return []
+    return clip_boxes(res.boxes.xyxy.cpu().numpy(), w, h)
+
+
+def clip_boxes(xyxy: np.ndarray, w: int, h: int) -> List[Box]:
+    """(N,4) x1,y1,x2,y2 dizisini tamsayı kutulara çevirip frame'e kırpar (tüm dedektörler için)."""
+    out: List[Box] = []
+    for x1, y1, x2, y2 in np.asarray(xyxy).reshape(-1, 4).astype(int):
+        x1 = max(0, min(int(x1), w - 1))
+        x2 = max(0, min(int(x2), w - 1))
+        y1 = max(0, min(int(y1), h - 1))
+        y2 = max(0, min(int(y2), h - 1))
+        if x2 <= x1 or y2 <= y1:
+            continue
+        out.append((x1, y1, x2, y2))
+    return out
+
+
+def to_dlib_locations(boxes: Sequence[Box]) -> List[Tuple[int, int, int, int]]:
+    """(x1, y1, x2, y2) -> dlib/face_recognition sırası (top, right, bottom, left)."""
+    return [(y1, x2, y2, x1) for x1, y1, x2, y2 in boxes]
+
+
+def encode_faces(frame_bgr: np.ndarray, boxes: Sequence[Box], model: str = "small") -> List[np.ndarray]:
+    """
+    Frame'i bir kez RGB'ye çevirir ve tüm kutuları known_face_locations olarak verir.
+    Neden: dlib kendi HOG dedektörünü her kırpıntıda tekrar çalıştırmasın; YOLO'nun
+    bulduğu her yüz için (ikinci dedektör kaçırsa bile) bir encoding dönsün.
+    Dönüş: boxes ile aynı sırada (128,) float32 vektörler.
+    """
+    if not boxes:
+        return []
+    rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+    encs = face_recognition.face_encodings(
+        rgb,
+        known_face_locations=to_dlib_locations(boxes),
+        num_jitters=1,
+        model=model,
+    )
+    return [np.asarray(e, dtype=np.float32).reshape(-1) for e in encs]
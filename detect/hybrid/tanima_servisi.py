@@ -0,0 +1,208 @@
+# ============================================
+# file: tanima_servisi.py
+# Sıcak tanıma servisi: modeller (YOLO, dlib), encode havuzu ve galeri bir kez yüklenir;
+# dersler yerel bir Unix soketi üzerinden başlatılıp durdurulur (süreç kapanmaz).
+# Protokol: satır başına bir JSON komut -> satır başına bir JSON yanıt
+#   {"cmd": "start"}   -> dersi başlat (kamera açılınca yanıt döner)
+#   {"cmd": "stop"}    -> dersi bitir (yoklama / dikkat yazıldıktan sonra yanıt döner)
+#   {"cmd": "status"}  -> durum
+#   {"cmd": "shutdown"}-> (varsa) dersi bitirip servisi kapat
+# Kullanım: python tanima_servisi.py   (gui_app gerektiğinde kendisi başlatır)
+# ============================================
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Dict, Optional
+
+SOCKET_PATH = os.environ.get("RECOGNIZER_SOCKET", "/tmp/tubitak_tanima.sock")
+# start/stop yanıtı için en fazla bekleme (sn)
+COMMAND_TIMEOUT = float(os.environ.get("RECOGNIZER_COMMAND_TIMEOUT", "30"))
+
+
+# ---- İstemci (gui_app): hafif, hybrid'i içe aktarmaz ----
+def send_command(cmd: str, path: str = SOCKET_PATH, timeout: float = COMMAND_TIMEOUT) -> Dict[str, Any]:
+    """Servise tek komut gönderir; servis yoksa OSError (ConnectionRefused/FileNotFound) fırlatır."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(path)
+        s.sendall((json.dumps({"cmd": cmd}) + "\n").encode("utf-8"))
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            buf += chunk
+    return json.loads(buf.decode("utf-8") or "{}")
+
+
+def is_running(path: str = SOCKET_PATH) -> bool:
+    try:
+        return bool(send_command("status", path, timeout=1.0).get("ok"))
+    except (OSError, ValueError):
+        return False
+
+
+# ---- Servis ----
+class RecognitionService:
+    """
+    Ders döngüsü ana iş parçacığında çalışır (cv2.imshow ana iş parçacığı ister);
+    soket sunucusu ayrı iş parçacığında komutları alır.
+    """
+
+    def __init__(self, path: str = SOCKET_PATH):
+        import hybrid  # ağır içe aktarım (YOLO / dlib) yalnızca serviste
+
+        self.path = path
+        t0 = time.perf_counter()
+        self.recognizer = hybrid.Recognizer()
+        self.warmup_s = time.perf_counter() - t0
+        self.state = "idle"              # idle | starting | recording | stopping
+        self.lesson_start: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._stop: Optional[threading.Event] = None
+        self._started = threading.Event()
+        self._finished = threading.Event()
+        self._finished.set()
+        self._requests: "queue.Queue[str]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._server: Optional[socketserver.UnixStreamServer] = None
+
+    # -- komutlar (sunucu iş parçacığından) --
+    def handle(self, cmd: str) -> Dict[str, Any]:
+        if cmd == "status":
+            return self.status()
+        if cmd == "start":
+            return self._start()
+        if cmd == "stop":
+            return self._stop_lesson()
+        if cmd == "shutdown":
+            self._stop_lesson()
+            self._requests.put("shutdown")
+            return {"ok": True, "state": "shutting_down"}
+        return {"ok": False, "error": f"bilinmeyen komut: {cmd}"}
+
+    def status(self) -> Dict[str, Any]:
+        rec = self.recognizer
+        return {
+            "ok": True,
+            "state": self.state,
+            "lesson_start": self.lesson_start,
+            "lessons": rec.lessons,
+            "gallery": rec.galeri.n_students,
+            "warmup_s": round(self.warmup_s, 2),
+            "last_error": self.last_error,
+        }
+
+    def _start(self) -> Dict[str, Any]:
+        with self._lock:
+            if self.state != "idle":
+                return {"ok": False, "error": "ders zaten sürüyor", "state": self.state}
+            self.state = "starting"
+            self.last_error = None
+            self._started.clear()
+            self._finished.clear()
+            self._stop = threading.Event()
+        t0 = time.perf_counter()
+        self._requests.put("start")
+        self._started.wait(COMMAND_TIMEOUT)
+        if self.state != "recording":
+            return {"ok": False, "error": self.last_error or "ders başlatılamadı", "state": self.state}
+        return {"ok": True, "state": self.state, "lesson_start": self.lesson_start,
+                "started_in_s": round(time.perf_counter() - t0, 3)}
+
+    def _stop_lesson(self) -> Dict[str, Any]:
+        with self._lock:
+            stop = self._stop
+            if self.state not in ("starting", "recording") or stop is None:
+                return {"ok": True, "state": self.state}
+            self.state = "stopping"
+        stop.set()
+        # Ders kapanışı (yoklama + dikkat + zaman çizelgeleri) bitince yanıt ver
+        self._finished.wait(COMMAND_TIMEOUT)
+        return {"ok": self.last_error is None, "state": self.state, "last_error": self.last_error}
+
+    # -- ders döngüsü (ana iş parçacığı) --
+    def _on_started(self, record_start_time: float) -> None:
+        with self._lock:
+            self.lesson_start = record_start_time
+            if self.state == "starting":
+                self.state = "recording"
+        self._started.set()
+
+    def _run_lesson(self) -> None:
+        try:
+            self.recognizer.run_lesson(self._stop, on_started=self._on_started)
+        except Exception as e:
+            self.last_error = str(e)
+            # Aşama hatası öne geçtiyse kapanış yazımı hatası da bildirilsin (ikisi birden olabilir)
+            fin = self.recognizer.last_finish_error
+            if fin is not None and e.__cause__ is not fin:
+                self.last_error += f"; ders kaydı yazılamadı: {fin}"
+            print(f"[SERVİS] Ders hatası: {self.last_error}")
+        finally:
+            with self._lock:
+                self.state = "idle"
+                self._stop = None
+            self._started.set()
+            self._finished.set()
+
+    def serve_forever(self) -> None:
+        self._bind()
+        server_thread = threading.Thread(target=self._server.serve_forever, name="servis-soket", daemon=True)
+        server_thread.start()
+        print(f"[SERVİS] Hazır ({self.warmup_s:.1f} sn ısınma): {self.path}")
+        try:
+            while True:
+                req = self._requests.get()
+                if req == "shutdown":
+                    break
+                if req == "start":
+                    self._run_lesson()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.recognizer.close()
+
+    def _bind(self) -> None:
+        if os.path.exists(self.path):
+            if is_running(self.path):
+                raise RuntimeError(f"Servis zaten çalışıyor: {self.path}")
+            os.unlink(self.path)  # önceki çökmeden kalan soket dosyası
+
+        service = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for line in self.rfile:
+                    try:
+                        cmd = json.loads(line.decode("utf-8")).get("cmd", "")
+                        resp = service.handle(cmd)
+                    except ValueError as e:
+                        resp = {"ok": False, "error": f"geçersiz istek: {e}"}
+                    self.wfile.write((json.dumps(resp) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+        class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        self._server = _Server(self.path, _Handler)
+        os.chmod(self.path, 0o600)  # yalnızca aynı kullanıcı komut gönderebilsin
+
+
+def main() -> None:
+    RecognitionService().serve_forever()
+
+
+if __name__ == "__main__":
+    main()
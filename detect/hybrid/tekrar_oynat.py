@@ -0,0 +1,189 @@
+# ============================================
+# file: tekrar_oynat.py
+# Kayıtlı video / görüntü klasörü üzerinde kamerasız, ekransız ve deterministik çalıştırma.
+# Zaman, duvar saati yerine frame zaman damgalarından gelir (simüle saat); sonuçlar
+# geçici bir DB kopyasına yazılır. Aynı girdiyle iki çalıştırma aynı sonucu verir.
+# Kullanım: python tekrar_oynat.py <video|klasör> [--db ogrenciler.db] [--out sonuc.db] [--fps 10] [--start <unix sn>]
+# ============================================
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import cv2
+
+import hybrid
+import oys_veri
+from boru_hatti import FramePacket
+from dedektor import DETECTOR_BACKEND, make_detector
+from galeri import Galeri, load_student_rows
+from hesaplamalar2 import PresenceWriter, reset_tracking
+from olcum import StageTimings
+from tanima import encode_faces
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def iter_frames(source: str, fps: float, start: float) -> Iterator[Tuple[float, np.ndarray]]:
+    """(simüle zaman, BGR frame) üretir. Zaman = start + frame_no / fps."""
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(IMAGE_EXTS))
+        for i, name in enumerate(names):
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is not None:
+                yield start + i / fps, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Video açılamadı: {source}")
+    video_fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    if video_fps > 0:
+        fps = video_fps
+    i = 0
+    try:
+        while True:
+            ok, frame = cap.read()
+            if not ok or frame is None:
+                break
+            yield start + i / fps, frame
+            i += 1
+    finally:
+        cap.release()
+
+
+def recording_start(source: str) -> float:
+    """
+    --start verilmezse ders başlangıcı: video dosyasının / klasördeki en eski görüntünün
+    değiştirilme zamanı (aynı kayıtla her çalıştırmada aynı; ders tarihi 1970 olmaz).
+    """
+    if os.path.isdir(source):
+        paths = [os.path.join(source, n) for n in os.listdir(source) if n.lower().endswith(IMAGE_EXTS)]
+        if paths:
+            return float(int(min(os.path.getmtime(p) for p in paths)))
+    return float(int(os.path.getmtime(source)))
+
+
+def prepare_scratch_db(src_db: str, out_db: str) -> None:
+    """
+    Kaynak DB'yi kopyalar; yoklama/dikkat alanlarını ve ders geçmişini sıfırlar
+    (her çalıştırma aynı başlasın, kaynak DB'deki eski dersler sonuca karışmasın).
+    """
+    oys_veri.close_pool(out_db)  # önceki çalıştırmanın havuz bağlantıları silinen dosyada kalmasın
+    if os.path.exists(out_db):
+        os.remove(out_db)
+    src = sqlite3.connect(src_db)
+    dst = sqlite3.connect(out_db)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+    oys_veri.migrate(out_db)  # eski şemalı kaynak DB de son sürüme gelsin
+    with oys_veri.transaction(out_db) as con:
+        con.execute("DELETE FROM ders_gorunurluk")
+        con.execute("DELETE FROM session_attendance")
+        con.execute("DELETE FROM sessions")
+        con.execute("UPDATE ogrenciler SET yoklama='yok', dikkat_orani=0, dikkat_sure=0")
+
+
+def results_digest(db_path: str, record_start_time: float) -> Tuple[str, List[tuple], List[tuple]]:
+    """
+    Sonuç özeti (sha256) + öğrenci satırları (okul_no, yoklama, dikkat) + bu tekrarın ders
+    kayıtları (zaman çizelgesi ve session_attendance); iki çalıştırmayı karşılaştırmak için.
+    """
+    con = sqlite3.connect(db_path)
+    try:
+        students = con.execute(
+            "SELECT okul_numarasi, yoklama, dikkat_orani FROM ogrenciler ORDER BY okul_numarasi"
+        ).fetchall()
+        lesson = con.execute(
+            "SELECT okul_numarasi, ilk_gorulme, hex(araliklar) FROM ders_gorunurluk "
+            "WHERE ders_baslangic=? ORDER BY okul_numarasi",
+            (record_start_time,),
+        ).fetchall()
+        lesson += con.execute(
+            "SELECT a.okul_numarasi, a.durum, a.dikkat_orani FROM session_attendance a "
+            "JOIN sessions s ON s.id = a.session_id WHERE s.ders_baslangic=? ORDER BY a.okul_numarasi",
+            (record_start_time,),
+        ).fetchall()
+    finally:
+        con.close()
+    digest = hashlib.sha256(repr(students + lesson).encode("utf-8")).hexdigest()
+    return digest, students, lesson
+
+
+def _summary(name: str, snap: Dict[str, float]) -> str:
+    return (f"{name:<10} adet {snap['count']:6d} | ort {snap['mean']:8.2f} ms | p50 {snap['p50']:8.2f} | "
+            f"p95 {snap['p95']:8.2f} | p99 {snap['p99']:8.2f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Kayıtlı görüntü üzerinde deterministik tekrar oynatma")
+    ap.add_argument("source", help="video dosyası ya da görüntü klasörü")
+    ap.add_argument("--db", default=hybrid.DB_PATH, help="öğrenci galerisinin okunacağı DB")
+    ap.add_argument("--out", default=None, help="sonuçların yazılacağı geçici DB (varsayılan: tmp)")
+    ap.add_argument("--fps", type=float, default=10.0, help="klasör / FPS bilgisi olmayan video için")
+    ap.add_argument("--start", type=float, default=None,
+                    help="simüle saatin başlangıcı, unix sn (varsayılan: kaydın dosya zamanı)")
+    args = ap.parse_args()
+    start: float = args.start if args.start is not None else recording_start(args.source)
+
+    out_db = args.out or os.path.join(tempfile.gettempdir(), "replay_ogrenciler.db")
+    prepare_scratch_db(args.db, out_db)
+
+    # Canlı tanıma ile aynı galeri: şablonu olan öğrenciler prototip satırlarıyla (with_prototypes)
+    galeri = Galeri.from_rows(load_student_rows(out_db))
+    face_detector = make_detector(DETECTOR_BACKEND, hybrid.MODEL_PATH, hybrid.IMGSZ)
+
+    # Determinizm: YOLO her frame'de (uyarlanabilir aralık duvar saatine bağlı), encoding süreç içi
+    reset_tracking()
+    timings = StageTimings()
+    presence = PresenceWriter(out_db, timings=timings)   # start() yok: yazım yalnızca ders sonunda
+    detector = hybrid.DetectStage(face_detector, target_fps=0.0, timings=timings)
+    recognizer = hybrid.RecognizeStage(galeri, encode_faces, presence, timings=timings)
+
+    frames = 0
+    last_ts = start
+    t_start = time.perf_counter()
+    t_prev = t_start
+
+    for ts, frame in iter_frames(args.source, args.fps, start):
+        t_read = time.perf_counter()
+        pkt = FramePacket(frames + 1, ts, frame)
+        detector.process(pkt)
+        t_det = time.perf_counter()
+        recognizer.process(pkt)
+        t_rec = time.perf_counter()
+
+        timings.record("read", t_read - t_prev)
+        timings.record("detect", t_det - t_read)
+        timings.record("recognize", t_rec - t_det)
+        timings.record("frame", t_rec - t_prev)
+        t_prev = t_rec
+        frames += 1
+        last_ts = ts
+
+    wall = time.perf_counter() - t_start
+    hybrid.finish_lesson(start, presence, out_db, end_time=last_ts)
+
+    digest, students, _ = results_digest(out_db, start)
+    present = sum(1 for r in students if r[1] == "var")
+    print(f"{frames} frame, {wall:.2f} sn -> {frames / wall if wall > 0 else 0.0:.2f} FPS")
+    for name, snap in timings.snapshot().items():
+        print(_summary(name, snap))
+    print(f"tanıma: {recognizer.stats()} | maks yüz: {recognizer.max_faces_seen} | yoklama 'var': {present}")
+    print(f"ders başlangıcı: {start:.0f} ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start))})")
+    print(f"sonuç DB: {out_db}")
+    print(f"sonuç özeti: {digest}")
+
+
+if __name__ == "__main__":
+    main()
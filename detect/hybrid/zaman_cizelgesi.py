@@ -0,0 +1,115 @@
+# ============================================
+# file: zaman_cizelgesi.py
+# Ders başına öğrenci görünürlük zaman çizelgesi (run-length: görünür dilimler)
+# Ders sonunda toplu yazılır; herhangi bir zaman penceresi ve tolerans için
+# dikkat oranı sonradan yeniden hesaplanabilir.
+# ============================================
+
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import oys_veri
+
+# (önceki boşluğun son görünmez frame'i, görünür başlangıç, görünür bitiş)
+# İlk değer, canlı hesabın toleransı "son görünmez frame"e kadar saymasını birebir
+# yeniden üretebilmek için tutulur (öğrenci geri döndüğü frame'den bir önceki frame).
+Interval = Tuple[float, float, float]
+
+# Dilimler ders başlangıcına göre float32 saniye ofseti olarak saklanır:
+# dilim başına 12 bayt (45 dk'lık derste onlarca dilim -> birkaç yüz bayt).
+# ders_gorunurluk tablosu şema göçüyle oluşturulur (OYS/sema.py).
+
+
+def encode_intervals(intervals: Sequence[Interval], origin: float) -> bytes:
+    """[(boşluk sonu, başlangıç, bitiş), ...] -> float32 ofset üçlüleri (origin'e göre)."""
+    if not intervals:
+        return b""
+    arr = np.asarray(intervals, dtype=np.float64).reshape(-1) - origin
+    return arr.astype(np.float32).tobytes()
+
+
+def decode_intervals(blob: bytes, origin: float) -> List[Interval]:
+    arr = np.frombuffer(bytes(blob), dtype=np.float32).astype(np.float64) + origin
+    return [(float(arr[i]), float(arr[i + 1]), float(arr[i + 2])) for i in range(0, arr.size - 2, 3)]
+
+
+def write_timelines_to_db(
+    record_start_time: float,
+    timelines: Dict[str, Tuple[float, Sequence[Interval]]],
+    end_time: float,
+    db_path: str,
+) -> int:
+    """
+    timelines: okul_no -> (ilk görülme, görünür dilimler). Tek transaction + executemany.
+    Dönüş: yazılan öğrenci sayısı.
+    """
+    rows = [
+        (record_start_time, okul_no, first_seen, end_time,
+         sqlite3.Binary(encode_intervals(intervals, record_start_time)))
+        for okul_no, (first_seen, intervals) in timelines.items()
+    ]
+    return oys_veri.executemany(
+        "INSERT OR REPLACE INTO ders_gorunurluk "
+        "(ders_baslangic, okul_numarasi, ilk_gorulme, ders_bitis, araliklar) VALUES (?,?,?,?,?)",
+        rows,
+        db_path,
+    )
+
+
+def read_timelines(record_start_time: float, db_path: str) -> Dict[str, Tuple[float, float, List[Interval]]]:
+    """Bir dersin zaman çizelgeleri: okul_no -> (ilk görülme, ders bitişi, dilimler)."""
+    rows = oys_veri.fetchall(
+        "SELECT okul_numarasi, ilk_gorulme, ders_bitis, araliklar FROM ders_gorunurluk WHERE ders_baslangic=?",
+        (record_start_time,),
+        db_path,
+    )
+    return {
+        okul_no: (first_seen, end, decode_intervals(blob, record_start_time))
+        for okul_no, first_seen, end, blob in rows
+    }
+
+
+def attention_from_intervals(
+    intervals: Sequence[Interval],
+    first_seen: float,
+    end_time: float,
+    timeout: float = 30.0,
+    window: Optional[Tuple[float, float]] = None,
+    visible_at_end: Optional[bool] = None,
+) -> Tuple[float, float]:
+    """
+    Zaman çizelgesinden (dikkat süresi sn, oran 0–1) hesaplar.
+    - Görünür dilimler tam sayılır.
+    - İki dilim arasındaki boşluktan, son görünmez frame'e kadar en fazla `timeout` sn
+      tolerans eklenir; ders sonunda açık kalan boşluk end_time'a kadar sayılır.
+    - window verilirse yalnızca o pencere (ilk görülme anından itibaren) sayılır.
+    Tam ders + 30 sn ile write_attentions_to_db'nin yazdığı değerleri verir.
+    """
+    lo, hi = first_seen, end_time
+    if window is not None:
+        lo, hi = max(lo, window[0]), min(hi, window[1])
+    if hi <= lo:
+        return 0.0, 0.0
+
+    def clip(a: float, b: float) -> float:
+        return max(0.0, min(b, hi) - max(a, lo))
+
+    total = 0.0
+    prev_end: Optional[float] = None
+    for gap_end, start, stop in intervals:
+        if prev_end is not None:
+            total += clip(prev_end, min(gap_end, prev_end + timeout))
+        total += clip(start, stop)
+        prev_end = stop
+
+    if visible_at_end is None:
+        # float32 ofset yuvarlaması için küçük pay
+        visible_at_end = prev_end is not None and prev_end >= end_time - 1e-3
+    if prev_end is not None and not visible_at_end:
+        total += clip(prev_end, min(end_time, prev_end + timeout))
+
+    return total, min(1.0, total / (hi - lo))